@@ -1,27 +1,180 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+import time
+_INICIO_IMPORT = time.perf_counter()  # perfil de partida: mede os imports abaixo (PARTIDA["import_app"])
+
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from starlette.datastructures import MutableHeaders
+from contextlib import asynccontextmanager
+from typing import BinaryIO, List, Optional, Tuple
 from pathlib import Path
+import asyncio
+import gzip
+import hmac
+import io
 import os
+import shutil
+import tempfile
+import traceback
 
 # carregar .env de forma robusta (pega backend/.env mesmo se rodar de outro cwd)
 from dotenv import load_dotenv, find_dotenv
 ENV_PATH = find_dotenv(usecwd=True) or str((Path(__file__).parent / ".env").resolve())
 load_dotenv(ENV_PATH, override=False)
 
-from .models.schemas import RespostaClassificacao
-from .services.classifier import classificar_e_sugerir
-from .services.pdf_reader import extract_text_from_pdf  # leve, PyPDF2
+from .models.schemas import RespostaClassificacao, RespostaJob, RespostaLote
+from .services.classifier import (
+    CAMINHO_MODELO, aquecer_modelo, classificar_e_sugerir, classificar_lote, classificar_pdf,
+    estado_modelo, impressao_config, impressao_disco, impressao_modelo, recarregar_modelo,
+)
+from .services.pdf_reader import extract_text_from_pdf, importar_leitor  # PyPDF2 só no 1º PDF
+from .services import aprendizado, cache, executor, jobs, metricas, responders, similares
+from .services.executor import Saturado
 
 # Leitor de EML é opcional
 try:
+    from .services import eml_reader
     from .services.eml_reader import extract_text_from_eml
     HAS_EML = True
 except Exception:
     HAS_EML = False
 
+# Serialização rápida (orjson) e brotli são opcionais
+try:
+    from fastapi.responses import ORJSONResponse
+    import orjson  # noqa: F401
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+try:
+    import brotli
+    HAS_BROTLI = True
+except Exception:
+    HAS_BROTLI = False
+
+JSON_RAPIDO = HAS_ORJSON and os.getenv("AUTOU_JSON_RAPIDO", "1").strip() not in ("0", "false", "")
+
+# ====== MODELO: aquecimento e recarga ======
+ADMIN_TOKEN = (os.getenv("AUTOU_ADMIN_TOKEN") or "").strip()
+MODELO_VIGIAR = float(os.getenv("AUTOU_MODELO_VIGIAR", "0"))  # segundos; 0 = sem vigia
+VIGIAR_LOOP = float(os.getenv("AUTOU_VIGIAR_LOOP", "0.1"))  # segundos entre medições do atraso do loop; 0 = desligado
+# 1 = aquece antes de aceitar conexões | fundo = aceita já e aquece em segundo plano | 0 = tudo sob demanda
+AQUECER = os.getenv("AUTOU_AQUECER", "1").strip().lower()
+
+# ====== PERFIL DE PARTIDA ======
+# Segundos: import_app e aquecimento são durações; pronto (lifespan liberou
+# o tráfego) e primeira_classificacao (1º /classify com sucesso) contam
+# desde o início do processo. No /config e no /metrics; o import módulo a
+# módulo fica com `python -m backend.bench.partida`.
+PARTIDA = {"import_app": None, "aquecimento": None, "pronto": None, "primeira_classificacao": None}
+
+def _idade_processo() -> Optional[float]:
+    """Segundos desde o início do processo (Linux, via /proc); None se não der para saber."""
+    try:
+        with open("/proc/self/stat") as f:
+            inicio = int(f.read().rsplit(")", 1)[1].split()[19])  # campo 22: starttime, em ticks desde o boot
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return round(max(0.0, uptime - inicio / os.sysconf("SC_CLK_TCK")), 3)
+    except Exception:
+        return None
+
+async def _recarregar_modelo(respeitar_backoff: bool = False) -> bool:
+    """
+    Carrega o model.pkl novo numa thread (o event loop segue atendendo) e troca
+    atomicamente. No modo "process" os workers do pool pesado são reciclados:
+    os atuais terminam o que já pegaram; os novos nascem com o modelo novo.
+    """
+    ok = await asyncio.to_thread(recarregar_modelo, respeitar_backoff)
+    if ok and executor.pesado.processos:
+        executor.pesado.reciclar()
+    return ok
+
+async def _vigiar_modelo():
+    """Recarrega sozinho quando o model.pkl em disco muda (ex.: após um novo treino)."""
+    while True:
+        await asyncio.sleep(MODELO_VIGIAR)
+        try:
+            if impressao_disco() not in ("sem-modelo", impressao_modelo()):
+                await _recarregar_modelo(respeitar_backoff=True)
+        except Exception:
+            traceback.print_exc()
+
+async def _aprender_online():
+    """
+    A cada AUTOU_ONLINE segundos, aprende as correções novas do feedback.csv
+    (mini-lotes de partial_fit) e, se este servidor serve o modelo online,
+    troca para a versão nova na hora. Outros workers: flock + vigia do modelo.
+    """
+    servindo_online = CAMINHO_MODELO.resolve() == aprendizado.CAMINHO_MODELO_ONLINE.resolve()
+    while True:
+        await asyncio.sleep(aprendizado.INTERVALO)
+        try:
+            publicou = False
+            while True:  # drena o acumulado, um mini-lote por vez
+                info = await asyncio.to_thread(aprendizado.atualizar)
+                if info is None:
+                    break
+                publicou = True
+                metricas.observar("atualizacao_online", info["segundos"])
+            if publicou and servindo_online:
+                await _recarregar_modelo()
+        except Exception:
+            traceback.print_exc()
+
+async def _vigiar_loop():
+    """
+    Dorme VIGIAR_LOOP segundos e mede quanto acordou atrasado: com o loop
+    livre o atraso é ~0; trabalho síncrono no event loop (CPU, I/O
+    bloqueante) aparece aqui como atrasos de dezenas/centenas de ms.
+    """
+    relogio = time.perf_counter
+    while True:
+        t0 = relogio()
+        await asyncio.sleep(VIGIAR_LOOP)
+        metricas.observar("atraso_loop", max(0.0, relogio() - t0 - VIGIAR_LOOP))
+
+async def _aquecer():
+    """
+    Carrega o modelo e faz uma predição de teste, importa o leitor de PDF e
+    sobe os processos do pool pesado — a 1ª requisição não paga o unpickle,
+    os imports do sklearn/NumPy nem o do PyPDF2.
+    """
+    t0 = time.perf_counter()
+    try:
+        await asyncio.to_thread(aquecer_modelo)
+        await asyncio.to_thread(importar_leitor)
+        if executor.pesado.processos:
+            await executor.pesado.rodar(aquecer_modelo)  # sobe os processos (initializer aquece cada um)
+    except Exception:
+        traceback.print_exc()  # sem aquecimento tudo carrega sob demanda
+    PARTIDA["aquecimento"] = round(time.perf_counter() - t0, 3)
+
 # ====== FASTAPI APP ======
-app = FastAPI(title="AutoU — Classificador de Emails (Local-Only)")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Aquecimento antes de aceitar tráfego (padrão) ou, com AUTOU_AQUECER=fundo,
+    # em paralelo: o servidor atende já (cold start menor no autoscaling) e só
+    # quem chegar antes do fim do aquecimento paga a carga do modelo
+    aquecimento = None
+    if AQUECER == "fundo":
+        aquecimento = asyncio.create_task(_aquecer())
+    elif AQUECER not in ("0", "false", ""):
+        await _aquecer()
+    # SQLite: batimento deste worker + jobs órfãos de workers mortos viram erro
+    vigia_jobs = asyncio.create_task(jobs.fila.vigiar()) if isinstance(jobs.fila.armazem, jobs.ArmazemSQLite) else None
+    vigia = asyncio.create_task(_vigiar_modelo()) if MODELO_VIGIAR > 0 else None
+    online = asyncio.create_task(_aprender_online()) if aprendizado.INTERVALO > 0 else None
+    loop = asyncio.create_task(_vigiar_loop()) if VIGIAR_LOOP > 0 and metricas.ATIVO else None
+    PARTIDA["pronto"] = _idade_processo()
+    yield
+    for tarefa in (aquecimento, vigia, online, loop, vigia_jobs):
+        if tarefa is not None:
+            tarefa.cancel()
+    jobs.fila.encerrar()
+    executor.encerrar()
+
+app = FastAPI(title="AutoU — Classificador de Emails (Local-Only)", lifespan=lifespan)
 
 # CORS para permitir o frontend local acessar a API
 app.add_middleware(
@@ -32,8 +185,132 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ====== HELPERS ======
+# ====== LIMITES ======
 MAX_BYTES = 5 * 1024 * 1024  # 5 MB
+FOLGA_MULTIPART = 64 * 1024  # cabeçalhos do multipart + campo 'texto'
+CHUNK_UPLOAD = 256 * 1024
+
+class _LimiteCorpo:
+    """
+    Rejeita com 413 ANTES de ler o corpo quando o Content-Length já passa do
+    limite — o upload gigante nem chega a ser bufferizado/parseado.
+    (Uploads sem Content-Length são barrados na leitura em blocos.)
+    """
+
+    def __init__(self, app, rotas, limite: int):
+        self.app = app
+        self.rotas = set(rotas)
+        self.limite = limite
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.rotas:
+            for nome, valor in scope["headers"]:
+                if nome == b"content-length" and valor.isdigit() and int(valor) > self.limite:
+                    resp = JSONResponse(status_code=413, content={"detail": "Arquivo muito grande (máx. 5MB)."})
+                    await resp(scope, receive, send)
+                    return
+        await self.app(scope, receive, send)
+
+app.add_middleware(_LimiteCorpo, rotas=["/classify", "/jobs"], limite=MAX_BYTES + FOLGA_MULTIPART)
+
+# ====== COMPRESSÃO ======
+COMPRIMIR_MIN = int(os.getenv("AUTOU_COMPRIMIR_MIN", "1024"))  # bytes; 0 = sem compressão
+GZIP_NIVEL = 5          # ver backend/bench/serializacao.py: acima disso quase não diminui e custa CPU
+BROTLI_QUALIDADE = 4
+
+def _codificacao(scope) -> Optional[str]:
+    """br (se o pacote brotli estiver instalado) ou gzip, conforme o Accept-Encoding do cliente."""
+    aceitas = set()
+    for nome, valor in scope["headers"]:
+        if nome == b"accept-encoding":
+            for parte in valor.decode("latin-1").lower().split(","):
+                cod, _, params = parte.strip().partition(";")
+                if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                    aceitas.add(cod.strip())
+    if HAS_BROTLI and "br" in aceitas:
+        return "br"
+    if "gzip" in aceitas:
+        return "gzip"
+    return None
+
+def _comprimir(corpo: bytes, codificacao: str) -> bytes:
+    if codificacao == "br":
+        return brotli.compress(corpo, quality=BROTLI_QUALIDADE)
+    return gzip.compress(corpo, compresslevel=GZIP_NIVEL)
+
+class _Compressao:
+    """
+    Comprime com brotli/gzip (negociado pelo Accept-Encoding) as respostas das
+    rotas de lote a partir de `minimo` bytes — o texto das respostas padrão se
+    repete em todo item e comprime muito. Essas rotas mandam o corpo numa
+    mensagem só; resposta em partes passa sem compressão.
+    """
+
+    def __init__(self, app, rotas, minimo: int):
+        self.app = app
+        self.rotas = set(rotas)
+        self.minimo = minimo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.rotas or self.minimo <= 0:
+            await self.app(scope, receive, send)
+            return
+        codificacao = _codificacao(scope)
+        if codificacao is None:
+            await self.app(scope, receive, send)
+            return
+        inicio = None
+
+        async def enviar(mensagem):
+            nonlocal inicio
+            if mensagem["type"] == "http.response.start":
+                inicio = mensagem  # só sai junto com o corpo (os cabeçalhos podem mudar)
+                return
+            if mensagem["type"] == "http.response.body" and inicio is not None:
+                cabecalhos = MutableHeaders(scope=inicio)
+                corpo = mensagem.get("body", b"")
+                if not mensagem.get("more_body") and len(corpo) >= self.minimo and "content-encoding" not in cabecalhos:
+                    corpo = await asyncio.to_thread(_comprimir, corpo, codificacao)
+                    cabecalhos["content-encoding"] = codificacao
+                    cabecalhos["content-length"] = str(len(corpo))
+                    mensagem = {"type": "http.response.body", "body": corpo}
+                cabecalhos.add_vary_header("Accept-Encoding")
+                await send(inicio)
+                inicio = None
+            await send(mensagem)
+
+        await self.app(scope, receive, enviar)
+
+app.add_middleware(_Compressao, rotas=["/classify/batch"], minimo=COMPRIMIR_MIN)
+
+# Pools de execução cheios → 503 com Retry-After (cliente tenta de novo)
+@app.exception_handler(Saturado)
+async def _saturado(request: Request, exc: Saturado):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, tente novamente em instantes."},
+        headers={"Retry-After": "1"},
+    )
+
+# ====== HELPERS ======
+MAX_ITENS_LOTE = int(os.getenv("MAX_ITENS_LOTE", "1000"))
+RESPOSTA_VAZIA = "Mensagem vazia ou ilegível. Por favor, reenviar com mais detalhes."
+PAYLOAD_VAZIO = {
+    "categoria": "Improdutivo",
+    "confianca": 0.5,
+    "resposta_sugerida": RESPOSTA_VAZIA,
+    "origem": "heuristica",
+}
+
+# PDF: orçamento de leitura (0/vazio = sem limite) e parada antecipada
+# quando o score híbrido se afasta do limiar 0.5 por pelo menos a margem
+def _env_limite(nome: str) -> Optional[int]:
+    valor = int(os.getenv(nome) or 0)
+    return valor if valor > 0 else None
+
+PDF_MAX_PAGINAS = _env_limite("AUTOU_PDF_MAX_PAGINAS")
+PDF_MAX_CHARS = _env_limite("AUTOU_PDF_MAX_CHARS")
+PDF_MARGEM_PARADA = float(os.getenv("AUTOU_PDF_MARGEM_PARADA", "0"))
 
 def _infer_ext(filename: Optional[str]) -> str:
     if not filename:
@@ -44,6 +321,283 @@ def _infer_ext(filename: Optional[str]) -> str:
             return ext
     return os.path.splitext(lower)[1].lower()
 
+def _medir_upload(fonte: BinaryIO, ext: str) -> Tuple[int, Optional[str]]:
+    """
+    Percorre o arquivo em blocos (sem montar um único `bytes` do upload):
+    conta o tamanho — parando assim que passa de MAX_BYTES — e calcula a
+    chave do cache no caminho. Devolve o arquivo posicionado no início.
+    """
+    h = cache.hasher_bytes(ext) if cache.ATIVO else None
+    tamanho = 0
+    fonte.seek(0)
+    while True:
+        bloco = fonte.read(CHUNK_UPLOAD)
+        if not bloco:
+            break
+        tamanho += len(bloco)
+        if tamanho > MAX_BYTES:
+            break
+        if h is not None:
+            h.update(bloco)
+    fonte.seek(0)
+    return tamanho, (h.hexdigest() if h is not None else None)
+
+async def _ler_upload(arquivo: UploadFile) -> Optional[str]:
+    """Valida o tamanho do upload (400/413) e devolve a chave de cache (ou None)."""
+    if arquivo.size is not None and arquivo.size > MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Arquivo muito grande (máx. 5MB).")
+    with metricas.estagio("leitura_upload"):
+        tamanho, chave = await executor.leve.rodar(_medir_upload, arquivo.file, _infer_ext(arquivo.filename))
+    if tamanho == 0:
+        raise HTTPException(status_code=400, detail="Arquivo vazio.")
+    if tamanho > MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Arquivo muito grande (máx. 5MB).")
+    return chave
+
+def _ler_texto(fonte: BinaryIO) -> str:
+    """Decodifica o .txt direto do arquivo temporário (mesmo resultado de bytes.decode)."""
+    leitor = io.TextIOWrapper(fonte, encoding="utf-8", errors="ignore", newline="")
+    try:
+        return leitor.read()
+    finally:
+        leitor.detach()  # não fecha o arquivo do upload
+
+def _para_pool(pool: executor.Pool, fonte: BinaryIO):
+    """Processos não recebem arquivo aberto: só aí o upload vira `bytes`."""
+    return fonte.read() if pool.processos else fonte
+
+async def _extrair_conteudo(filename: Optional[str], fonte: BinaryIO) -> str:
+    """
+    Extrai o texto do upload (já validado por `_ler_upload`) conforme a extensão.
+    Os parsers leem do arquivo temporário do upload, sem cópias em memória.
+    PDF vai para o pool pesado e EML para o leve, fora do event loop.
+    """
+    with metricas.estagio("extracao"):
+        return await _extrair_por_tipo(_infer_ext(filename), fonte)
+
+async def _extrair_por_tipo(ext: str, fonte: BinaryIO) -> str:
+    if ext in (".txt", ""):
+        return _ler_texto(fonte)
+
+    if ext == ".pdf":
+        try:
+            return await executor.pesado.rodar(
+                extract_text_from_pdf, _para_pool(executor.pesado, fonte), PDF_MAX_PAGINAS, PDF_MAX_CHARS
+            )
+        except Saturado:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Falha ao ler PDF: {e}")
+
+    if ext == ".eml":
+        if not HAS_EML:
+            raise HTTPException(status_code=400, detail="Leitor de EML não disponível.")
+        try:
+            if eml_reader.ANEXOS:
+                return await _extrair_eml_com_anexos(fonte)
+            return await executor.leve.rodar(extract_text_from_eml, _para_pool(executor.leve, fonte))
+        except Saturado:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Falha ao ler EML: {e}")
+
+    raise HTTPException(status_code=400, detail="Tipo de arquivo não suportado. Use .txt, .pdf ou .eml.")
+
+async def _extrair_eml_com_anexos(fonte: BinaryIO) -> str:
+    """Corpo no pool leve; anexos PDF em paralelo no pool pesado (.txt é só decodificar)."""
+    corpo, anexos = await executor.leve.rodar(eml_reader.separar_eml, _para_pool(executor.leve, fonte), True)
+    textos = await asyncio.gather(*(
+        executor.pesado.rodar(eml_reader.texto_anexo, ext, dados) if ext == ".pdf"
+        else asyncio.to_thread(eml_reader.texto_anexo, ext, dados)
+        for ext, dados in anexos
+    ))
+    return eml_reader.juntar(corpo, textos)
+
+async def _classificar_pdf(fonte: BinaryIO) -> dict:
+    """PDF no /classify: leitura página a página + classificação, numa tarefa só do pool pesado."""
+    try:
+        with metricas.estagio("extracao_classificacao"):
+            resultado, paginas = await executor.pesado.rodar(
+                classificar_pdf, _para_pool(executor.pesado, fonte),
+                PDF_MAX_PAGINAS, PDF_MAX_CHARS, PDF_MARGEM_PARADA,
+            )
+    except Saturado:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Falha ao ler PDF: {e}")
+    if resultado is None:
+        return dict(PAYLOAD_VAZIO, paginas_lidas=paginas)
+    return _payload(resultado, paginas_lidas=paginas)
+
+def _payload(resultado, **extras) -> dict:
+    """Tupla do classificador → campos da resposta (é o que vai para o cache)."""
+    categoria, confianca, resposta, origem = resultado
+    payload = {
+        "categoria": categoria,
+        "confianca": float(confianca),
+        "resposta_sugerida": resposta,
+        "origem": origem,
+    }
+    payload.update({k: v for k, v in extras.items() if v is not None})
+    return payload
+
+# Modo compacto: a resposta padrão vira só o id (os textos saem uma vez em GET /respostas)
+MODELOS_RESPOSTA = {**responders.modelos(), "vazia": RESPOSTA_VAZIA}
+_ID_RESPOSTA = {texto: id_ for id_, texto in MODELOS_RESPOSTA.items()}
+
+def _compactar(payload: dict) -> dict:
+    """Troca resposta_sugerida por resposta_id (mesma posição); texto fora dos modelos fica como está."""
+    id_ = _ID_RESPOSTA.get(payload.get("resposta_sugerida"))
+    if id_ is None:
+        return payload
+    return {("resposta_id" if k == "resposta_sugerida" else k): (id_ if k == "resposta_sugerida" else v)
+            for k, v in payload.items()}
+
+def _json(modelo, corpo: dict) -> Response:
+    """
+    Resposta JSON de um dict montado pelo próprio servidor, com as chaves do
+    dict. Com orjson (AUTOU_JSON_RAPIDO) serializa direto, sem revalidar no
+    response_model; sem orjson valida no modelo e usa o json da stdlib.
+    Os dois caminhos geram os mesmos bytes.
+    """
+    if JSON_RAPIDO:
+        return ORJSONResponse(corpo)
+    return JSONResponse(modelo.model_validate(corpo).model_dump(mode="json", exclude_unset=True))
+
+def _item_lote(indice: int, nome: Optional[str], payload: Optional[dict] = None,
+               erro: Optional[str] = None, compacto: bool = False) -> dict:
+    """Item do /classify/batch com todos os campos do ItemLote (null quando ausentes)."""
+    payload = payload or {}
+    item = {
+        "indice": indice,
+        "arquivo": nome,
+        "categoria": payload.get("categoria"),
+        "confianca": payload.get("confianca"),
+        "resposta_sugerida": payload.get("resposta_sugerida"),
+        "origem": payload.get("origem"),
+        "paginas_lidas": payload.get("paginas_lidas"),
+        "erro": erro,
+    }
+    if similares.ATIVO:
+        item["cluster"] = payload.get("cluster")
+    return _compactar(item) if compacto else item
+
+def _impressao_cache(impressao: str) -> str:
+    """Modelo + configuração que muda o veredito: o SQLite do cache sobrevive a reinícios."""
+    return f"{impressao}+{impressao_config(PDF_MAX_PAGINAS, PDF_MAX_CHARS, PDF_MARGEM_PARADA)}"
+
+def _cache_obter(chave: Optional[str], impressao: str):
+    if chave is None or not cache.ATIVO:
+        return None
+    return cache.resultados.obter(chave, _impressao_cache(impressao))
+
+def _cache_guardar(chave: Optional[str], impressao: str, payload: dict):
+    # Fallback heurístico com modelo em disco não entra: pode ter sido falha transitória
+    if chave is None or not cache.ATIVO:
+        return
+    if payload["origem"] != "heuristica" or impressao == "sem-modelo":
+        cache.resultados.guardar(chave, _impressao_cache(impressao), payload)
+
+def _similar_obter(sig, impressao: str, conteudo: str) -> Optional[dict]:
+    """Veredito de uma quase-duplicata já classificada (com a resposta refeita p/ este texto)."""
+    achado = similares.indice.buscar(sig, impressao)
+    return similares.adaptar(achado[1], conteudo) if achado is not None else None
+
+def _similar_guardar(sig, impressao: str, payload: dict):
+    """Indexa o veredito (mesma regra do cache) e anota o cluster no próprio payload."""
+    if sig is None or (payload["origem"] == "heuristica" and impressao != "sem-modelo"):
+        return
+    cluster = similares.indice.guardar(sig, impressao, payload)
+    payload["cluster"] = cluster  # o dict guardado no índice é este mesmo
+
+def _similares_lote(idx: List[int], conteudos: List[Optional[str]], sigs: dict,
+                    impressao: str, resultados: dict) -> Tuple[List[int], dict]:
+    """
+    Itens do lote que ainda precisam do modelo: quase-duplicatas já
+    indexadas saem direto em `resultados`; as que se repetem dentro do
+    próprio lote seguem o 1º do grupo (representante → classificado uma vez).
+    Devolve (representantes, {seguidor: representante}).
+    """
+    grupos = similares.IndiceSimilares(similares.LIMIAR, len(idx), similares.BANDAS)
+    representantes, seguidores = [], {}
+    for i in idx:
+        payload = _similar_obter(sigs[i], impressao, conteudos[i])
+        if payload is not None:
+            resultados[i] = payload
+            continue
+        achado = grupos.buscar(sigs[i], "") if sigs[i] is not None else None
+        if achado is not None:
+            seguidores[i] = achado[1]
+            continue
+        grupos.guardar(sigs[i], "", i)
+        representantes.append(i)
+    return representantes, seguidores
+
+def _tipo_entrada(arquivo: Optional[UploadFile]) -> str:
+    """Rótulo 'tipo' das métricas: texto (JSON/form) ou a extensão do arquivo."""
+    if arquivo is None:
+        return "texto"
+    ext = _infer_ext(arquivo.filename)
+    return ext if ext in (".txt", ".pdf", ".eml") else "outro"
+
+def _metricas_cache() -> List[str]:
+    """Contadores do cache de resultados no /metrics."""
+    if not cache.ATIVO:
+        return []
+    e = cache.resultados.estado()
+    linhas = [
+        "# HELP autou_cache_consultas_total Consultas ao cache de resultados.",
+        "# TYPE autou_cache_consultas_total counter",
+        f'autou_cache_consultas_total{{resultado="hit"}} {e["hits"]}',
+        f'autou_cache_consultas_total{{resultado="miss"}} {e["misses"]}',
+        "# HELP autou_cache_itens Itens no cache de resultados em memória.",
+        "# TYPE autou_cache_itens gauge",
+        f"autou_cache_itens {e['itens']}",
+    ]
+    return linhas
+
+def _metricas_similares() -> List[str]:
+    """Consultas ao índice de quase-duplicatas no /metrics."""
+    if not similares.ATIVO:
+        return []
+    e = similares.indice.estado()
+    return [
+        "# HELP autou_similares_consultas_total Consultas ao índice de quase-duplicatas.",
+        "# TYPE autou_similares_consultas_total counter",
+        f'autou_similares_consultas_total{{resultado="hit"}} {e["hits"]}',
+        f'autou_similares_consultas_total{{resultado="miss"}} {e["misses"]}',
+        f'autou_similares_consultas_total{{resultado="curto"}} {e["sem_assinatura"]}',
+        "# HELP autou_similares_itens Assinaturas no índice de quase-duplicatas.",
+        "# TYPE autou_similares_itens gauge",
+        f"autou_similares_itens {e['itens']}",
+    ]
+
+def _metricas_jobs() -> List[str]:
+    """Jobs assíncronos por estado no /metrics."""
+    linhas = [
+        "# HELP autou_jobs Jobs assíncronos guardados, por estado.",
+        "# TYPE autou_jobs gauge",
+    ]
+    for estado, n in sorted(jobs.fila.armazem.contar().items()):
+        linhas.append(f'autou_jobs{{estado="{estado}"}} {n}')
+    return linhas
+
+def _metricas_partida() -> List[str]:
+    """Perfil de partida (ver PARTIDA) no /metrics."""
+    linhas = [
+        "# HELP autou_partida_segundos Partida: import do app e aquecimento (duração); pronto e 1ª classificação (desde o início do processo).",
+        "# TYPE autou_partida_segundos gauge",
+    ]
+    for etapa, valor in PARTIDA.items():
+        if valor is not None:
+            linhas.append(f'autou_partida_segundos{{etapa="{etapa}"}} {valor}')
+    return linhas
+
+metricas.registrar_coletor(_metricas_cache)
+metricas.registrar_coletor(_metricas_similares)
+metricas.registrar_coletor(_metricas_jobs)
+metricas.registrar_coletor(_metricas_partida)
+
 # ====== ENDPOINTS ======
 @app.get("/health")
 def health():
@@ -58,75 +612,354 @@ def config():
         "cwd": os.getcwd(),
         "has_env_file": os.path.exists(".env"),
         "env_path_loaded": ENV_PATH,
+        "executor": executor.estado(),
+        "cache": cache.resultados.estado() if cache.ATIVO else None,
+        "similares": similares.indice.estado() if similares.ATIVO else None,
+        "modelo": estado_modelo(),
+        "jobs": jobs.fila.estado(),
+        "aprendizado": aprendizado.estado(),
+        "partida": {"aquecer": AQUECER, **PARTIDA},
     }
 
-@app.post("/classify", response_model=RespostaClassificacao)
+@app.get("/metrics")
+def metrics():
+    """Métricas no formato texto do Prometheus (desligue com AUTOU_METRICAS=0)."""
+    if not metricas.ATIVO:
+        raise HTTPException(status_code=404, detail="Métricas desabilitadas (AUTOU_METRICAS=0).")
+    return PlainTextResponse(metricas.exportar(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _exigir_admin(x_admin_token: Optional[str]):
+    """Header X-Admin-Token igual a AUTOU_ADMIN_TOKEN; sem token configurado, 403."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoint administrativo desabilitado (defina AUTOU_ADMIN_TOKEN).")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Token administrativo inválido.")
+
+@app.post("/admin/modelo/recarregar")
+async def admin_recarregar_modelo(x_admin_token: Optional[str] = Header(None)):
+    """
+    Recarrega o model.pkl sem reiniciar o servidor (ex.: depois de um novo treino).
+    Exige o header X-Admin-Token igual a AUTOU_ADMIN_TOKEN; sem token configurado,
+    o endpoint fica desabilitado.
+    """
+    _exigir_admin(x_admin_token)
+
+    ok = await _recarregar_modelo()
+    if not ok:
+        raise HTTPException(status_code=500, detail="Falha ao carregar o modelo; o anterior continua em uso.")
+    return {"recarregado": True, "modelo": estado_modelo()}
+
+@app.get("/respostas")
+def respostas():
+    """Textos das respostas padrão por id (para clientes no modo compacto)."""
+    return MODELOS_RESPOSTA
+
+@app.post("/classify", response_model=RespostaClassificacao, response_model_exclude_none=True)
 async def classify(
     request: Request,
     arquivo: Optional[UploadFile] = File(None),
     texto: Optional[str] = Form(None),
+    compacto: bool = Query(False, description="resposta padrão só pelo id (resposta_id); textos em GET /respostas"),
 ):
     """
     Aceita:
       - multipart/form-data: campos 'texto' e/ou 'arquivo'
       - application/json:    body {"texto": "..."}
     """
+    t0 = time.perf_counter()
+    metricas.tipo_entrada.set(_tipo_entrada(arquivo))
+    payload = await _classificar_requisicao(request, arquivo, texto)
+    metricas.observar("requisicao", time.perf_counter() - t0, "/classify", metricas.tipo_entrada.get(), payload["origem"])
+    if PARTIDA["primeira_classificacao"] is None:
+        PARTIDA["primeira_classificacao"] = _idade_processo()
+    return _json(RespostaClassificacao, _compactar(payload) if compacto else payload)
+
+async def _corpo_json(request: Request) -> dict:
+    """Body JSON como dict ({} se não for JSON — ex.: multipart vazio)."""
+    try:
+        data = await request.json()
+    except Exception:
+        # não é JSON; segue fluxo normal
+        return {}
+    return data if isinstance(data, dict) else {}
+
+async def _classificar_requisicao(
+    request: Request, arquivo: Optional[UploadFile], texto: Optional[str]
+) -> dict:
     # Se não veio via form/multipart, tente JSON { "texto": "..." }
     if texto is None and arquivo is None:
-        try:
-            data = await request.json()
-            if isinstance(data, dict):
-                texto = (data.get("texto") or "").strip()
-        except Exception:
-            # não é JSON; segue fluxo normal
-            pass
+        texto = ((await _corpo_json(request)).get("texto") or "").strip()
 
     # 1) Extrair conteúdo (prioriza arquivo, se enviado)
-    conteudo = (texto or "").strip()
+    if arquivo is not None:
+        chave = await _ler_upload(arquivo)
+        return await _classificar_entrada(arquivo.filename, arquivo.file, chave, "")
+    return await _classificar_entrada(None, None, None, (texto or "").strip())
+
+async def _classificar_entrada(
+    nome: Optional[str], fonte: Optional[BinaryIO], chave: Optional[str], conteudo: str
+) -> dict:
+    """
+    Cache → extração → classificação de um upload já validado (`fonte`) ou
+    de um texto. Usado pelo /classify e pelos jobs assíncronos.
+    """
+    impressao = impressao_modelo()
+
+    if fonte is not None:
+        hit = _cache_obter(chave, impressao)
+        if hit is not None:
+            return hit
+        if _infer_ext(nome) == ".pdf":
+            payload = await _classificar_pdf(fonte)
+            _cache_guardar(chave, impressao, payload)
+            return payload
+        conteudo = await _extrair_conteudo(nome, fonte)
+    elif conteudo and cache.ATIVO:
+        chave = cache.chave_texto(conteudo)
+        hit = _cache_obter(chave, impressao)
+        if hit is not None:
+            return hit
+
+    if not conteudo:
+        return PAYLOAD_VAZIO
 
+    # 2) Quase-duplicata já classificada (AUTOU_SIMILARES)?
+    pool = executor.pool_para_texto(conteudo)
+    sig = None
+    if similares.ATIVO:
+        sig = await pool.rodar(similares.assinatura, conteudo)
+        payload = _similar_obter(sig, impressao, conteudo)
+        if payload is not None:
+            _cache_guardar(chave, impressao, payload)
+            return payload
+
+    # 3) Classificar e sugerir resposta (Modelo Local → Heurística)
+    payload = _payload(await pool.rodar(classificar_e_sugerir, conteudo))
+    _similar_guardar(sig, impressao, payload)
+    _cache_guardar(chave, impressao, payload)
+
+    return payload
+
+# ====== JOBS ASSÍNCRONOS ======
+def _copiar_upload(fonte: BinaryIO) -> BinaryIO:
+    """O arquivo do upload some ao fim da requisição: o job trabalha numa cópia temporária."""
+    copia = tempfile.TemporaryFile()
+    fonte.seek(0)
+    shutil.copyfileobj(fonte, copia, CHUNK_UPLOAD)
+    copia.seek(0)
+    return copia
+
+async def _validar_callback(url: Optional[str]) -> Optional[str]:
+    url = (url or "").strip()
+    if not url:
+        return None
+    try:
+        return await executor.leve.rodar(jobs.validar_callback, url)  # resolve o DNS
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/jobs", response_model=RespostaJob, response_model_exclude_none=True, status_code=202)
+async def criar_job(
+    request: Request,
+    response: Response,
+    arquivo: Optional[UploadFile] = File(None),
+    texto: Optional[str] = Form(None),
+    callback_url: Optional[str] = Form(None),
+):
+    """
+    Mesmas entradas do /classify, mas responde na hora (202) com o id do job;
+    a classificação roda em segundo plano. Acompanhe em GET /jobs/{id}.
+
+    Aceita:
+      - multipart/form-data: 'texto' e/ou 'arquivo', e 'callback_url' opcional
+      - application/json:    {"texto": "...", "callback_url": "https://..."}
+
+    Com callback_url, o job terminado (mesmo JSON do GET) é enviado por POST.
+    """
+    if texto is None and arquivo is None:
+        corpo = await _corpo_json(request)
+        texto = (corpo.get("texto") or "").strip()
+        callback_url = callback_url or corpo.get("callback_url")
+    callback_url = await _validar_callback(callback_url if isinstance(callback_url, str) else None)
+
+    tipo = _tipo_entrada(arquivo)
+    metricas.tipo_entrada.set(tipo)  # a tarefa do job herda este contexto
     if arquivo is not None:
-        data = await arquivo.read()
-        if not data:
-            raise HTTPException(status_code=400, detail="Arquivo vazio.")
-        if len(data) > MAX_BYTES:
-            raise HTTPException(status_code=413, detail="Arquivo muito grande (máx. 5MB).")
+        chave = await _ler_upload(arquivo)
+        fonte = await executor.leve.rodar(_copiar_upload, arquivo.file)
+        nome, conteudo = arquivo.filename, ""
+    else:
+        chave, fonte, nome, conteudo = None, None, None, (texto or "").strip()
 
-        ext = _infer_ext(arquivo.filename)
+    async def trabalho() -> dict:
+        t0 = time.perf_counter()
+        if fonte is not None:
+            fonte.seek(0)  # pode ser nova tentativa (pool estava cheio)
+        payload = await _classificar_entrada(nome, fonte, chave, conteudo)
+        metricas.observar("requisicao", time.perf_counter() - t0, "/jobs", tipo, payload["origem"])
+        return payload
 
-        if ext in (".txt", ""):
-            conteudo = data.decode("utf-8", errors="ignore")
+    try:
+        job = jobs.fila.enviar(trabalho, tipo, callback_url, limpar=fonte.close if fonte is not None else None)
+    except Saturado:
+        if fonte is not None:
+            fonte.close()
+        raise
+    response.headers["Location"] = f"/jobs/{job['id']}"
+    return RespostaJob(**job)
 
-        elif ext == ".pdf":
-            try:
-                conteudo = extract_text_from_pdf(data)
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Falha ao ler PDF: {e}")
+@app.get("/jobs/{job_id}", response_model=RespostaJob, response_model_exclude_none=True)
+def obter_job(job_id: str):
+    """Estado do job; com estado 'concluido', o resultado é o mesmo do /classify."""
+    job = jobs.fila.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado (ou expirado).")
+    return RespostaJob(**job)
+
+@app.post("/feedback")
+async def feedback(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """
+    Correção de um revisor: {"texto": "...", "categoria": "Produtivo" | "Improdutivo"}.
+    Vai para data/feedback.csv (entra no próximo treino completo e, com
+    AUTOU_ONLINE, no modelo online em segundo plano).
 
-        elif ext == ".eml":
-            if not HAS_EML:
-                raise HTTPException(status_code=400, detail="Leitor de EML não disponível.")
+    Vira dado de treino, então exige o header X-Admin-Token (como o
+    /admin/modelo/recarregar); o feedback.csv para em AUTOU_FEEDBACK_MAX_MB (507).
+    """
+    if not aprendizado.FEEDBACK_ATIVO:
+        raise HTTPException(status_code=404, detail="Feedback desabilitado (AUTOU_FEEDBACK=0).")
+    _exigir_admin(x_admin_token)
+    corpo = await _corpo_json(request)
+    texto = (corpo.get("texto") or "").strip() if isinstance(corpo.get("texto"), str) else ""
+    categoria = corpo.get("categoria")
+    if not texto:
+        raise HTTPException(status_code=400, detail="Campo 'texto' obrigatório.")
+    if len(texto.encode("utf-8", "surrogatepass")) > MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Texto muito grande (máx. 5MB).")
+    if categoria not in aprendizado.CATEGORIAS:
+        raise HTTPException(status_code=400, detail=f"Campo 'categoria' deve ser: {', '.join(aprendizado.CATEGORIAS)}.")
+    try:
+        await executor.leve.rodar(aprendizado.registrar_feedback, texto, categoria, None,
+                                  aprendizado.MAX_BYTES_FEEDBACK)
+    except aprendizado.FeedbackCheio as e:
+        raise HTTPException(status_code=507, detail=f"Feedback não registrado: {e}")
+    metricas.contar("feedback", categoria)
+    return {"registrado": True}
+
+@app.post("/classify/batch", response_model=RespostaLote)
+async def classify_batch(
+    request: Request,
+    arquivos: Optional[List[UploadFile]] = File(None),
+    compacto: bool = Query(False, description="resposta padrão só pelo id (resposta_id); textos em GET /respostas"),
+):
+    """
+    Classifica vários emails numa única requisição.
+
+    Aceita:
+      - application/json:    ["texto 1", "texto 2", ...] ou {"textos": [...]}
+      - multipart/form-data: vários campos 'arquivo(s)' (.txt, .pdf, .eml)
+
+    Todos os textos válidos passam por UMA chamada vetorizada do modelo.
+    Os itens voltam na ordem da entrada; erros de um item (arquivo vazio,
+    PDF corrompido…) ficam só naquele item, no campo 'erro'. Respostas
+    grandes saem com gzip/brotli se o cliente mandar Accept-Encoding.
+    Com AUTOU_SIMILARES=1, cada item traz 'cluster' (grupo de quase-duplicatas).
+    """
+    t0 = time.perf_counter()
+    metricas.tipo_entrada.set("lote")
+    nomes: List[Optional[str]] = []
+    conteudos: List[Optional[str]] = []
+    erros: List[Optional[str]] = []
+    chaves: List[Optional[str]] = []
+    resultados = {}  # índice -> payload (cache ou modelo)
+    impressao = impressao_modelo()
+
+    if arquivos:
+        if len(arquivos) > MAX_ITENS_LOTE:
+            raise HTTPException(status_code=413, detail=f"Lote muito grande (máx. {MAX_ITENS_LOTE} itens).")
+        for arq in arquivos:
+            nomes.append(arq.filename)
+            try:
+                chave = await _ler_upload(arq)
+            except HTTPException as e:
+                chaves.append(None)
+                conteudos.append(None)
+                erros.append(str(e.detail))
+                continue
+            chaves.append(chave)
+            hit = _cache_obter(chave, impressao)
+            if hit is not None:
+                resultados[len(conteudos)] = hit
+                conteudos.append(None)
+                erros.append(None)
+                continue
             try:
-                conteudo = extract_text_from_eml(data)
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Falha ao ler EML: {e}")
+                conteudos.append((await _extrair_conteudo(arq.filename, arq.file)).strip())
+                erros.append(None)
+            except HTTPException as e:
+                conteudos.append(None)
+                erros.append(str(e.detail))
+    else:
+        try:
+            data = await request.json()
+        except Exception:
+            raise HTTPException(status_code=400, detail="Envie um array JSON de textos ou arquivos via multipart.")
+        if isinstance(data, dict):
+            data = data.get("textos")
+        if not isinstance(data, list):
+            raise HTTPException(status_code=400, detail="Campo 'textos' deve ser uma lista.")
+        if len(data) > MAX_ITENS_LOTE:
+            raise HTTPException(status_code=413, detail=f"Lote muito grande (máx. {MAX_ITENS_LOTE} itens).")
+        for item in data:
+            nomes.append(None)
+            if isinstance(item, str):
+                conteudo = item.strip()
+                chave = cache.chave_texto(conteudo) if conteudo and cache.ATIVO else None
+                chaves.append(chave)
+                hit = _cache_obter(chave, impressao)
+                if hit is not None:
+                    resultados[len(conteudos)] = hit
+                    conteudo = None
+                conteudos.append(conteudo)
+                erros.append(None)
+            else:
+                chaves.append(None)
+                conteudos.append(None)
+                erros.append("Item deve ser uma string.")
 
-        else:
-            raise HTTPException(status_code=400, detail="Tipo de arquivo não suportado. Use .txt, .pdf ou .eml.")
+    # Classifica de uma vez só os itens com conteúdo (fora do cache); com
+    # AUTOU_SIMILARES, quase-duplicatas reaproveitam o veredito do grupo
+    idx_texto = [i for i, c in enumerate(conteudos) if c]
+    sigs, seguidores = {}, {}
+    if similares.ATIVO and idx_texto:
+        sigs = dict(zip(idx_texto, await executor.pesado.rodar(
+            similares.assinaturas, [conteudos[i] for i in idx_texto])))
+        idx_texto, seguidores = _similares_lote(idx_texto, conteudos, sigs, impressao, resultados)
+    while idx_texto:
+        lote = [conteudos[i] for i in idx_texto]
+        novos = await executor.pesado.rodar(classificar_lote, lote)
+        for i, resultado in zip(idx_texto, novos):
+            resultados[i] = _payload(resultado)
+            _similar_guardar(sigs.get(i), impressao, resultados[i])
+            _cache_guardar(chaves[i], impressao, resultados[i])
+        # seguidores: veredito do representante; sem o campo que a resposta pede → modelo
+        idx_texto = []
+        for i, rep in seguidores.items():
+            payload = similares.adaptar(resultados[rep], conteudos[i])
+            if payload is None:
+                idx_texto.append(i)
+            else:
+                resultados[i] = dict(payload)
+                _cache_guardar(chaves[i], impressao, resultados[i])
+        seguidores = {}
 
-    if not conteudo:
-        return RespostaClassificacao(
-            categoria="Improdutivo",
-            confianca=0.5,
-            resposta_sugerida="Mensagem vazia ou ilegível. Por favor, reenviar com mais detalhes.",
-            origem="heuristica",
-        )
-
-    # 2) Classificar e sugerir resposta (Modelo Local → Heurística)
-    categoria, confianca, resposta, origem = classificar_e_sugerir(conteudo)
-
-    return RespostaClassificacao(
-        categoria=categoria,
-        confianca=float(confianca),
-        resposta_sugerida=resposta,
-        origem=origem,
-    )
+    itens = [
+        _item_lote(i, nome, erro=erro) if erro is not None
+        else _item_lote(i, nome, resultados.get(i, PAYLOAD_VAZIO), compacto=compacto)
+        for i, (nome, erro) in enumerate(zip(nomes, erros))
+    ]
+
+    metricas.observar("requisicao", time.perf_counter() - t0, "/classify/batch", "lote", "lote")
+    return _json(RespostaLote, {"total": len(itens), "erros": sum(1 for e in erros if e is not None), "itens": itens})
+
+PARTIDA["import_app"] = round(time.perf_counter() - _INICIO_IMPORT, 3)
@@ -0,0 +1,5 @@
+# ---------------------------------------------------------------------
+# Scripts de benchmark/verificação do backend.
+# Rodar a partir da raiz do repo, ex.:
+#   python -m backend.bench.pontuar
+# ---------------------------------------------------------------------
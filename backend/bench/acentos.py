@@ -0,0 +1,112 @@
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from backend.bench.corpus import carregar_amostras, gerar_texto
+from backend.services.classifier import _rm_acentos, _rm_acentos_lento
+
+# ---------------------------------------------------------------------
+# `_rm_acentos` (tabela + str.translate) x definição de referência
+# (NFD + unicodedata.category por caractere):
+#   - paridade em strings aleatórias: ASCII, Latin-1, Latin Extended-A/B,
+#     marcas combinantes soltas/empilhadas, grego, cirílico, CJK, Hangul,
+#     emoji, Mc com classe combinante (U+1D165…), caracteres de controle
+#   - tempo por tamanho: texto só ASCII, português acentuado e misto
+#
+#   python -m backend.bench.acentos [--casos 200000] [--json]
+# Termina com erro se alguma saída divergir.
+# ---------------------------------------------------------------------
+
+_FAIXAS = [
+    (0x00, 0x7F), (0x80, 0xFF), (0x100, 0x17F), (0x180, 0x24F), (0x300, 0x36F), (0x370, 0x3FF),
+    (0x400, 0x4FF), (0x1DC0, 0x1DFF), (0x1E00, 0x1EFF), (0x20D0, 0x20FF), (0x3040, 0x30FF),
+    (0xAC00, 0xAC40), (0x1D165, 0x1D16D), (0x1F600, 0x1F64F), (0xFB00, 0xFB4F),
+]
+_PORTUGUES = "ãõáéíóúâêôçàÃÕÁÉÍÓÚÂÊÔÇÀ"
+
+
+def _aleatoria(rnd: random.Random) -> str:
+    partes = []
+    for _ in range(rnd.randint(0, 12)):
+        ini, fim = rnd.choice(_FAIXAS)
+        partes.append(chr(rnd.randint(ini, fim)))
+        if rnd.random() < 0.3:
+            partes.append(rnd.choice("ação ȩ́ x"))
+    return "".join(partes)
+
+
+def paridade(casos: int, seed: int = 42) -> Dict[str, int]:
+    rnd = random.Random(seed)
+    textos = [t for t, _ in carregar_amostras()]
+    textos += [_aleatoria(rnd) for _ in range(casos)]
+    textos += ["".join(chr(c) for c in range(ini, fim + 1)) for ini, fim in _FAIXAS]
+    divergentes = [t for t in textos if _rm_acentos(t) != _rm_acentos_lento(t)]
+    for t in divergentes[:5]:
+        print(f"divergente: {t!r}", file=sys.stderr)
+    return {"casos": len(textos), "divergentes": len(divergentes)}
+
+
+def _portugues(tamanho: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    texto = list(gerar_texto(tamanho, seed))
+    for i in range(0, len(texto), 7):  # ~1 acento a cada 7 caracteres
+        if texto[i].isalpha():
+            texto[i] = rnd.choice(_PORTUGUES)
+    return "".join(texto)
+
+
+def _medir(fn: Callable[[str], str], texto: str, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn(texto)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def tempos(tamanhos: List[int]) -> List[Dict]:
+    linhas = []
+    for tamanho in tamanhos:
+        repeticoes = max(3, 2_000_000 // max(tamanho, 1))
+        casos = {
+            "ascii": _rm_acentos_lento(gerar_texto(tamanho, 1)),
+            "portugues": _portugues(tamanho, 2),
+            "misto": _portugues(tamanho, 3)[: max(0, tamanho - 24)] + " straße Ωμέγα 東京 🙂 ﬁm",
+        }
+        for nome, texto in casos.items():
+            antes = _medir(_rm_acentos_lento, texto, repeticoes)
+            depois = _medir(_rm_acentos, texto, repeticoes)
+            linhas.append({"caso": nome, "tamanho": tamanho, "referencia_s": antes, "rapido_s": depois,
+                           "aceleracao": round(antes / depois, 1) if depois else None})
+    return linhas
+
+
+def main():
+    ap = argparse.ArgumentParser(description="_rm_acentos: paridade e tempo x referência unicodedata.")
+    ap.add_argument("--casos", type=int, default=200_000, help="strings aleatórias na checagem de paridade")
+    ap.add_argument("--tamanhos", default="100,10000,1000000", help="tamanhos (caracteres) medidos")
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    resultado = {
+        "paridade": paridade(args.casos),
+        "tempos": tempos([int(n) for n in args.tamanhos.split(",")]),
+    }
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        p = resultado["paridade"]
+        print(f"paridade: {p['casos']} strings, {p['divergentes']} divergentes")
+        print(f"{'caso':<11}{'tamanho':>10}{'referência':>13}{'rápido':>12}{'aceleração':>12}")
+        for l in resultado["tempos"]:
+            print(f"{l['caso']:<11}{l['tamanho']:>10}{l['referencia_s'] * 1e6:>11.1f}µs"
+                  f"{l['rapido_s'] * 1e6:>10.1f}µs{l['aceleracao']:>11}x")
+    if resultado["paridade"]["divergentes"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
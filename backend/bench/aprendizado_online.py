@@ -0,0 +1,90 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from backend.bench.corpus import carregar_amostras, gerar_texto
+from backend.services import aprendizado
+
+# ---------------------------------------------------------------------
+# Custo de uma atualização do modelo online x tamanho do corpus.
+#
+# Para cada N (correções já aprendidas), monta um feedback.csv com N
+# linhas já consumidas + um mini-lote novo e mede `aprendizado.atualizar()`
+# (ler só o novo, partial_fit, publicar). Ao lado, o tempo de um treino
+# completo TF-IDF + LogisticRegression nas mesmas N linhas, que é o que o
+# train_classifier faria a cada correção.
+#
+#   python -m backend.bench.aprendizado_online [--tamanhos 1000,10000,100000] [--lote 64] [--json]
+# Tudo numa pasta temporária (não mexe em backend/data).
+# ---------------------------------------------------------------------
+
+
+def _corpus(n: int) -> Tuple[List[str], List[str]]:
+    base = carregar_amostras()
+    textos = [f"{base[i % len(base)][0]} {gerar_texto(200, seed=i)}" for i in range(n)]
+    rotulos = [base[i % len(base)][1] for i in range(n)]
+    return textos, rotulos
+
+
+def _treino_completo(textos: List[str], rotulos: List[str]) -> float:
+    from backend.train_classifier import montar_pipeline
+
+    t0 = time.perf_counter()
+    montar_pipeline().fit(textos, rotulos)
+    return time.perf_counter() - t0
+
+
+def medir(n: int, lote: int, repeticoes: int, pasta: Path, completo: bool) -> Dict:
+    aprendizado.CAMINHO_FEEDBACK = pasta / f"feedback_{n}.csv"
+    aprendizado.CAMINHO_MODELO_ONLINE = pasta / f"online_{n}.pkl"
+    aprendizado.CAMINHO_ESTADO = aprendizado.CAMINHO_MODELO_ONLINE.with_suffix(".json")
+
+    textos, rotulos = _corpus(n + lote * repeticoes)
+    for t, r in zip(textos[:n], rotulos[:n]):
+        aprendizado.registrar_feedback(t, r)
+    aprendizado.inicializar(textos[:n], rotulos[:n], offset=aprendizado.CAMINHO_FEEDBACK.stat().st_size, epocas=1)
+
+    tempos = []
+    for k in range(repeticoes):
+        ini = n + k * lote
+        for t, r in zip(textos[ini:ini + lote], rotulos[ini:ini + lote]):
+            aprendizado.registrar_feedback(t, r)
+        t0 = time.perf_counter()
+        info = aprendizado.atualizar(max_itens=lote)
+        tempos.append(time.perf_counter() - t0)
+        assert info is not None and info["ultimo_lote"] == lote, info
+    tempos.sort()
+    resultado = {"corpus": n, "lote": lote, "atualizacao_mediana_s": round(tempos[len(tempos) // 2], 4),
+                 "atualizacao_max_s": round(tempos[-1], 4)}
+    if completo:
+        resultado["treino_completo_s"] = round(_treino_completo(textos[:n], rotulos[:n]), 3)
+    return resultado
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Atualização incremental x tamanho do corpus.")
+    ap.add_argument("--tamanhos", default="1000,10000,100000")
+    ap.add_argument("--lote", type=int, default=64, help="correções novas por atualização")
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--sem-completo", action="store_true", help="não mede o treino completo")
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        linhas = [medir(int(n), args.lote, args.repeticoes, Path(tmp), not args.sem_completo)
+                  for n in args.tamanhos.split(",")]
+    if args.json:
+        print(json.dumps(linhas, indent=2))
+        return
+    print(f"{'corpus':>10}{'lote':>6}{'atualização p50':>18}{'máx':>10}{'treino completo':>18}")
+    for l in linhas:
+        completo = f"{l['treino_completo_s']:>16.2f}s" if "treino_completo_s" in l else f"{'-':>17}"
+        print(f"{l['corpus']:>10}{l['lote']:>6}{l['atualizacao_mediana_s'] * 1000:>16.1f}ms"
+              f"{l['atualizacao_max_s'] * 1000:>8.1f}ms {completo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.bench.corpus import (
+    carregar_amostras, gerar_eml, gerar_html_marketing, gerar_pdf_tamanho, gerar_texto,
+)
+from backend.bench.medicao import percentil
+from backend.bench.rss_workers import _get, _porta_livre
+
+# ---------------------------------------------------------------------
+# Teste de carga do /classify com concorrência sustentada, tudo local.
+#
+# Sobe `uvicorn backend.app:app` (1 worker por padrão) numa porta livre de
+# 127.0.0.1 e, para cada mix de requisições, roda a rampa em degraus: em
+# cada degrau N clientes (asyncio + httpx) mandam requisições em laço
+# fechado — a próxima só depois da resposta — durante --duracao segundos
+# (os primeiros --aquecimento segundos não entram na conta).
+#
+# Por degrau: vazão (respostas 2xx/s), p50/p95/p99 no geral e por tipo
+# (texto JSON, PDF, EML), erros e 503 (backpressure). O servidor mede o
+# atraso do próprio event loop (AUTOU_VIGIAR_LOOP → /metrics); o degrau
+# em que o loop atrasou mais que --limiar-bloqueio é marcado BLOQUEIO.
+# O "joelho" é o último degrau antes de a vazão parar de crescer (< 10%)
+# — ou, com --slo-p99, a maior concorrência que ainda cumpre o p99.
+#
+# Payloads: textos do samples.csv (curtos e concatenados), PDFs e EMLs
+# sintéticos (texto, HTML de newsletter, PDF anexado) do bench/corpus.py.
+#
+#   python -m backend.bench.carga                                   # mixes texto, pdf e misto
+#   python -m backend.bench.carga --mix texto=100 --degraus 1,4,16,64 --duracao 10
+#   python -m backend.bench.carga --env AUTOU_EXECUTOR=process --mix pdf=100
+#   python -m backend.bench.carga --url http://127.0.0.1:8000 --json
+# O gerador roda na mesma máquina: numa máquina de poucos núcleos ele
+# disputa CPU com o servidor (os números são um limite inferior).
+# ---------------------------------------------------------------------
+
+RAIZ = Path(__file__).parent.parent.parent
+MIXES_PADRAO = ["texto=100", "pdf=100", "texto=70,pdf=20,eml=10"]
+_BUCKET_LOOP = re.compile(r'^autou_event_loop_atraso_segundos_bucket\{le="([^"]+)"\} (\S+)$', re.M)
+
+
+# ==========================
+# Payloads
+# ==========================
+def montar_payloads(seed: int = 42) -> Dict[str, List[dict]]:
+    """Requisições prontas por tipo: kwargs do httpx (json= ou files=)."""
+    textos = [t for t, _ in carregar_amostras()]
+    textos += [gerar_texto(n, seed + i) for i, n in enumerate((500, 2000, 8000))]
+    pdfs = [gerar_pdf_tamanho(n, seed + i) for i, n in enumerate((20_000, 80_000, 300_000))]
+    emls = [
+        gerar_eml(gerar_texto(1500, seed)),
+        gerar_eml("Novidades da semana", corpo_html=gerar_html_marketing(150_000, seed)),
+        gerar_eml(gerar_texto(800, seed + 1), anexos=[("fatura.pdf", gerar_pdf_tamanho(60_000, seed))]),
+    ]
+    return {
+        "texto": [{"json": {"texto": t}} for t in textos],
+        "pdf": [{"files": {"arquivo": (f"doc{i}.pdf", p, "application/pdf")}} for i, p in enumerate(pdfs)],
+        "eml": [{"files": {"arquivo": (f"msg{i}.eml", e, "message/rfc822")}} for i, e in enumerate(emls)],
+    }
+
+
+def ler_mix(texto: str) -> Dict[str, float]:
+    """"texto=70,pdf=20,eml=10" → pesos por tipo."""
+    mix = {}
+    for parte in texto.split(","):
+        tipo, _, peso = parte.partition("=")
+        if tipo.strip() not in ("texto", "pdf", "eml"):
+            raise ValueError(f"tipo desconhecido no mix: {tipo!r} (use texto, pdf, eml)")
+        mix[tipo.strip()] = float(peso or 1)
+    return mix
+
+
+# ==========================
+# Servidor local
+# ==========================
+@contextlib.contextmanager
+def servidor_local(workers: int, env_extra: Dict[str, str], timeout: float = 120.0) -> Iterator[str]:
+    porta = _porta_livre()
+    env = dict(os.environ, PYTHONPATH=str(RAIZ), **env_extra)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--host", "127.0.0.1", "--port", str(porta),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=RAIZ, env=env,
+    )
+    url = f"http://127.0.0.1:{porta}"
+    try:
+        limite = time.monotonic() + timeout
+        while not _get(f"{url}/health"):  # o lifespan aquece o modelo antes de aceitar conexões
+            if time.monotonic() > limite or proc.poll() is not None:
+                raise RuntimeError("uvicorn não ficou pronto")
+            time.sleep(0.3)
+        yield url
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# ==========================
+# Atraso do event loop (lido do /metrics do servidor)
+# ==========================
+async def _buckets_loop(cliente) -> Optional[Dict[float, float]]:
+    try:
+        r = await cliente.get("/metrics")
+    except Exception:
+        return None
+    achados = {float(le): float(v) for le, v in _BUCKET_LOOP.findall(r.text)}
+    return achados or None
+
+
+def _resumo_loop(antes: Optional[Dict[float, float]], depois: Optional[Dict[float, float]],
+                 limiar: float) -> Optional[dict]:
+    """Diferença dos histogramas cumulativos: medições no degrau, fração acima do limiar e maior faixa."""
+    if not antes or not depois:
+        return None
+    delta = {le: depois[le] - antes.get(le, 0.0) for le in depois}
+    total = delta.get(float("inf"), 0.0)
+    if total <= 0:
+        return None
+    limites = sorted(delta)
+    ate_limiar = max((delta[le] for le in limites if le <= limiar), default=0.0)
+    maior = next(le for le in limites if delta[le] >= total)  # menor faixa que contém todas
+    return {"medicoes": int(total), "acima_limiar": round((total - ate_limiar) / total, 4), "max_ate_s": maior}
+
+
+# ==========================
+# Geração de carga
+# ==========================
+@dataclass
+class Degrau:
+    concorrencia: int
+    amostras: List[Tuple[str, int, float]] = field(default_factory=list)  # (tipo, status, segundos)
+    timeouts: int = 0
+    janela: float = 0.0
+
+
+async def _cliente(cliente, payloads, tipos, pesos, rnd: random.Random, inicio_medida: float,
+                   fim: float, degrau: Degrau, timeout: float):
+    import httpx
+
+    while True:
+        t0 = time.perf_counter()
+        if t0 >= fim:
+            return
+        tipo = rnd.choices(tipos, pesos)[0]
+        req = rnd.choice(payloads[tipo])
+        try:
+            r = await cliente.post("/classify", timeout=timeout, **req)
+            status = r.status_code
+        except httpx.TimeoutException:
+            if t0 >= inicio_medida:
+                degrau.timeouts += 1
+            continue
+        if t0 >= inicio_medida:
+            degrau.amostras.append((tipo, status, time.perf_counter() - t0))
+
+
+async def rodar_degrau(url: str, payloads, mix: Dict[str, float], concorrencia: int, duracao: float,
+                       aquecimento: float, timeout: float, seed: int, limiar: float) -> dict:
+    import httpx
+
+    degrau = Degrau(concorrencia)
+    tipos, pesos = list(mix), list(mix.values())
+    limites = httpx.Limits(max_connections=concorrencia + 1, max_keepalive_connections=concorrencia + 1)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=timeout) as cliente:
+        agora = time.perf_counter()
+        inicio_medida, fim = agora + aquecimento, agora + aquecimento + duracao
+        clientes = [
+            asyncio.create_task(_cliente(cliente, payloads, tipos, pesos, random.Random(seed + i),
+                                         inicio_medida, fim, degrau, timeout))
+            for i in range(concorrencia)
+        ]
+        await asyncio.sleep(max(0.0, inicio_medida - time.perf_counter()))
+        antes = await _buckets_loop(cliente)
+        await asyncio.gather(*clientes)
+        degrau.janela = time.perf_counter() - inicio_medida
+        depois = await _buckets_loop(cliente)
+    return resumir(degrau, _resumo_loop(antes, depois, limiar), limiar)
+
+
+def _latencias(amostras: List[Tuple[str, int, float]]) -> dict:
+    ok = [s for _, status, s in amostras if 200 <= status < 300]
+    return {
+        "n": len(ok),
+        "p50_ms": round(percentil(ok, 50) * 1000, 1),
+        "p95_ms": round(percentil(ok, 95) * 1000, 1),
+        "p99_ms": round(percentil(ok, 99) * 1000, 1),
+    }
+
+
+def resumir(degrau: Degrau, loop: Optional[dict], limiar: float) -> dict:
+    amostras = degrau.amostras
+    ok = sum(1 for _, status, _ in amostras if 200 <= status < 300)
+    return {
+        "concorrencia": degrau.concorrencia,
+        "rps": round(ok / degrau.janela, 1) if degrau.janela > 0 else 0.0,
+        **_latencias(amostras),
+        "por_tipo": {t: _latencias([a for a in amostras if a[0] == t]) for t in sorted({a[0] for a in amostras})},
+        "saturado_503": sum(1 for _, status, _ in amostras if status == 503),
+        "erros": sum(1 for _, status, _ in amostras if status >= 400 and status != 503),
+        "timeouts": degrau.timeouts,
+        "loop": loop,
+        "bloqueio": bool(loop and loop["acima_limiar"] > 0),
+    }
+
+
+def joelho(degraus: List[dict], slo_p99_ms: Optional[float]) -> Optional[int]:
+    """Concorrência do joelho da curva (ver cabeçalho)."""
+    if slo_p99_ms is not None:
+        dentro = [d["concorrencia"] for d in degraus if d["n"] and d["p99_ms"] <= slo_p99_ms]
+        return max(dentro) if dentro else None
+    for anterior, atual in zip(degraus, degraus[1:]):
+        if atual["rps"] < anterior["rps"] * 1.10:
+            return anterior["concorrencia"]
+    return degraus[-1]["concorrencia"] if degraus else None
+
+
+async def rodar_mix(url: str, payloads, mix: Dict[str, float], args) -> List[dict]:
+    linhas = []
+    for n in args.degraus:
+        linha = await rodar_degrau(url, payloads, mix, n, args.duracao, args.aquecimento,
+                                   args.timeout, args.seed, args.limiar_bloqueio)
+        linhas.append(linha)
+        print(f"  {n:>4} clientes: {linha['rps']:>7.1f} req/s  p99 {linha['p99_ms']:>8.1f} ms"
+              + ("  BLOQUEIO" if linha["bloqueio"] else ""), file=sys.stderr)
+    return linhas
+
+
+def imprimir(resultados: List[dict], limiar: float):
+    for r in resultados:
+        print(f"\nmix {r['mix']}  →  joelho: {r['joelho']} clientes")
+        tipos = sorted({t for d in r["degraus"] for t in d["por_tipo"]})
+        cab = "".join(f"{'p99 ' + t:>12}" for t in tipos)
+        print(f"{'clientes':>8}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{cab}{'503':>6}{'erros':>6}"
+              f"{'loop>' + str(int(limiar * 1000)) + 'ms':>11}")
+        for d in r["degraus"]:
+            por_tipo = "".join(f"{d['por_tipo'].get(t, {}).get('p99_ms', 0):>10.1f}ms" for t in tipos)
+            loop = f"{d['loop']['acima_limiar']:>10.1%}" if d["loop"] else f"{'-':>10}"
+            print(f"{d['concorrencia']:>8}{d['rps']:>9.1f}{d['p50_ms']:>7.1f}ms{d['p95_ms']:>7.1f}ms"
+                  f"{d['p99_ms']:>7.1f}ms{por_tipo}{d['saturado_503']:>6}{d['erros'] + d['timeouts']:>6}"
+                  f"{loop}{' ⚠ BLOQUEIO' if d['bloqueio'] else ''}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Carga sustentada no /classify (uvicorn local + httpx).")
+    ap.add_argument("--mix", action="append", help="pesos por tipo, ex.: texto=70,pdf=20,eml=10 (repetível)")
+    ap.add_argument("--degraus", default="1,2,4,8,16,32", help="rampa: clientes simultâneos em cada degrau")
+    ap.add_argument("--duracao", type=float, default=5.0, help="segundos medidos por degrau")
+    ap.add_argument("--aquecimento", type=float, default=1.0, help="segundos descartados no início de cada degrau")
+    ap.add_argument("--timeout", type=float, default=30.0, help="timeout de cada requisição (s)")
+    ap.add_argument("--slo-p99", type=float, help="joelho = maior concorrência com p99 <= este valor (ms)")
+    ap.add_argument("--limiar-bloqueio", type=float, default=0.1,
+                    help="atraso do event loop (s) que marca BLOQUEIO (use um limite de bucket: 0.05, 0.1, 0.25…)")
+    ap.add_argument("--url", help="usa um servidor já rodando (ex.: http://127.0.0.1:8000) em vez de subir um")
+    ap.add_argument("--workers", type=int, default=1, help="workers do uvicorn local")
+    ap.add_argument("--env", action="append", default=[], help="variável do servidor local, ex.: AUTOU_EXECUTOR=process")
+    ap.add_argument("--com-cache", action="store_true", help="mantém o cache de resultados (padrão: AUTOU_CACHE=0)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+    args.degraus = [int(n) for n in args.degraus.split(",")]
+    mixes = args.mix or MIXES_PADRAO
+
+    payloads = montar_payloads(args.seed)
+    env = {"AUTOU_CACHE": "1" if args.com_cache else "0"}
+    env.update(dict(e.split("=", 1) for e in args.env))
+    contexto = contextlib.nullcontext(args.url) if args.url else servidor_local(args.workers, env)
+
+    resultados = []
+    with contexto as url:
+        for texto_mix in mixes:
+            print(f"mix {texto_mix}", file=sys.stderr)
+            degraus = asyncio.run(rodar_mix(url, payloads, ler_mix(texto_mix), args))
+            resultados.append({"mix": texto_mix, "joelho": joelho(degraus, args.slo_p99), "degraus": degraus})
+
+    if args.json:
+        print(json.dumps({"servidor": args.url or {"workers": args.workers, "env": env},
+                          "resultados": resultados}, indent=2, ensure_ascii=False))
+        return
+    imprimir(resultados, args.limiar_bloqueio)
+
+
+if __name__ == "__main__":
+    main()
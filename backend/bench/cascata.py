@@ -0,0 +1,137 @@
+import argparse
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.services import classifier
+from backend.services.classifier import _decidir, _pontuar
+
+# ---------------------------------------------------------------------
+# Cascata heurística → modelo (AUTOU_CASCATA) no samples.csv:
+#   - fração de textos que pula o modelo
+#   - acurácia x fluxo atual (sempre o modelo), rótulos que mudam e quanto
+#     muda a confiança nos textos decididos só pela heurística
+#   - tempo por email de classificar_e_sugerir com e sem a cascata
+#
+# As probabilidades são fora da amostra (validação cruzada do pipeline do
+# train_classifier), porque o samples.csv é o próprio conjunto de treino;
+# --modelo-servido usa o model.pkl atual (acurácia otimista).
+#
+#   python -m backend.bench.cascata [--dados outro.csv] [--margens 1,2,3,4] [--json]
+# ---------------------------------------------------------------------
+
+DADOS = Path(__file__).parent.parent / "data" / "samples.csv"
+
+
+def _ler(caminho: Path) -> Tuple[List[str], List[str]]:
+    with open(caminho, encoding="utf-8", newline="") as f:
+        linhas = [((l.get("text") or "").strip(), (l.get("label") or "").strip()) for l in csv.DictReader(f)]
+    linhas = [(t, lb) for t, lb in linhas if t and lb]
+    return [t for t, _ in linhas], [lb for _, lb in linhas]
+
+
+def _probas_fora_da_amostra(textos: List[str], rotulos: List[str], dobras: int) -> List[float]:
+    from sklearn.model_selection import StratifiedKFold, cross_val_predict
+
+    from backend.train_classifier import montar_pipeline
+
+    cv = StratifiedKFold(n_splits=dobras, shuffle=True, random_state=42)
+    probs = cross_val_predict(montar_pipeline(), textos, rotulos, cv=cv, method="predict_proba")
+    classes = sorted(set(rotulos))  # ordem do classes_ do LogisticRegression
+    return probs[:, classes.index("Produtivo")].tolist()
+
+
+def _probas_servido(textos: List[str]) -> List[float]:
+    modelo = classifier.carregar_modelo()
+    if modelo is None:
+        raise SystemExit("model.pkl não encontrado: rode python -m backend.train_classifier")
+    return classifier._probas_produtivo(modelo, textos)
+
+
+def simular(rotulos: List[str], probas: List[float], pontos: List[Tuple[int, int]],
+            margem: Optional[int]) -> Dict:
+    """Cascata com `margem` (None = sempre o modelo; 0 = só o caso exato sp >= si)."""
+    acertos = pulados = mudou = 0
+    delta_conf: List[float] = []
+    for rotulo, proba, (sp, si) in zip(rotulos, probas, pontos):
+        base = _decidir(proba, sp, si)
+        final = base
+        if margem is not None:
+            classifier.CASCATA_IMPROD = margem
+            decidido = classifier._pela_cascata(sp, si)
+            if decidido is not None:
+                final = decidido
+                pulados += 1
+                delta_conf.append(abs(decidido[1] - base[1]))
+        acertos += final[0] == rotulo
+        mudou += final[0] != base[0]
+    n = len(rotulos)
+    return {
+        "modo": "sempre modelo" if margem is None else ("cascata" if margem == 0 else f"cascata + improd>={margem}"),
+        "pula_modelo": round(pulados / n, 4),
+        "acuracia": round(acertos / n, 4),
+        "rotulos_alterados": mudou,
+        "delta_confianca_medio": round(float(np.mean(delta_conf)), 4) if delta_conf else 0.0,
+    }
+
+
+def medir_tempo(textos: List[str], cascata: bool, repeticoes: int) -> float:
+    """Tempo médio por email de classificar_e_sugerir (modelo servido), em ms."""
+    classifier.CASCATA, classifier.CASCATA_IMPROD = cascata, 0
+    classifier.carregar_modelo()
+    for t in textos:  # aquecimento
+        classifier.classificar_e_sugerir(t)
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        for t in textos:
+            classifier.classificar_e_sugerir(t)
+    return (time.perf_counter() - t0) / (repeticoes * len(textos)) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fração que pula o modelo e efeito na acurácia da cascata.")
+    ap.add_argument("--dados", type=Path, default=DADOS)
+    ap.add_argument("--margens", default="1,2,3,4", help="valores de AUTOU_CASCATA_IMPROD a simular")
+    ap.add_argument("--dobras", type=int, default=5)
+    ap.add_argument("--modelo-servido", action="store_true", help="usa o model.pkl em vez da validação cruzada")
+    ap.add_argument("--repeticoes", type=int, default=20)
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    textos, rotulos = _ler(args.dados)
+    probas = _probas_servido(textos) if args.modelo_servido else _probas_fora_da_amostra(textos, rotulos, args.dobras)
+    pontos = [_pontuar(t) for t in textos]
+
+    margens = [None, 0] + [int(m) for m in args.margens.split(",") if m]
+    linhas = [simular(rotulos, probas, pontos, m) for m in margens]
+    tempos = {
+        "sempre_modelo_ms": round(medir_tempo(textos, False, args.repeticoes), 4),
+        "cascata_ms": round(medir_tempo(textos, True, args.repeticoes), 4),
+    }
+    resultado = {
+        "dados": str(args.dados),
+        "n": len(textos),
+        "probabilidades": "model.pkl" if args.modelo_servido else f"validação cruzada ({args.dobras} dobras)",
+        "sem_palavras_chave": sum(1 for sp, si in pontos if sp == si == 0),
+        "modos": linhas,
+        "tempo_por_email": tempos,
+    }
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"{resultado['n']} emails de {args.dados.name} | probabilidades: {resultado['probabilidades']}")
+    print(f"{'modo':<24}{'pula modelo':>12}{'acurácia':>10}{'rótulos alterados':>19}{'Δ confiança':>13}")
+    for l in linhas:
+        print(f"{l['modo']:<24}{l['pula_modelo']:>11.1%}{l['acuracia']:>10.3f}"
+              f"{l['rotulos_alterados']:>19}{l['delta_confianca_medio']:>13.3f}")
+    print(f"\nclassificar_e_sugerir por email: sempre modelo {tempos['sempre_modelo_ms']:.3f} ms | "
+          f"cascata {tempos['cascata_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import csv
+import random
+from email.message import EmailMessage
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# ---------------------------------------------------------------------
+# Corpora sintéticos para benchmark, gerados a partir do samples.csv:
+#   - textos de uma linha até vários MB
+#   - PDFs (gerador mínimo, sem dependências — PyPDF2 extrai o texto)
+#   - EMLs (texto, HTML e anexos)
+#   - threads de email (respostas citadas, encaminhamentos, reenvios) e
+#     notificações automáticas que só mudam o nº do chamado
+# Tudo determinístico (seed fixa) para os números serem comparáveis.
+# ---------------------------------------------------------------------
+
+DADOS = Path(__file__).parent.parent / "data" / "samples.csv"
+
+
+def carregar_amostras() -> List[Tuple[str, str]]:
+    """(texto, label) do samples.csv."""
+    with open(DADOS, encoding="utf-8") as f:
+        linhas = [((l.get("text") or "").strip(), (l.get("label") or "").strip()) for l in csv.DictReader(f)]
+    return [(t, lb) for t, lb in linhas if t and lb]
+
+
+def gerar_texto(tamanho: int, seed: int = 42) -> str:
+    """Concatena amostras aleatórias até ~`tamanho` caracteres."""
+    rnd = random.Random(seed)
+    textos = [t for t, _ in carregar_amostras()]
+    partes, total = [], 0
+    while total < tamanho:
+        t = rnd.choice(textos)
+        partes.append(t)
+        total += len(t) + 1
+    return "\n".join(partes)[:tamanho]
+
+
+def _escapar_pdf(linha: str) -> bytes:
+    b = linha.encode("cp1252", errors="replace")
+    return b.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def gerar_pdf(paginas: List[str], linhas_por_pagina: int = 50) -> bytes:
+    """PDF mínimo (Helvetica, WinAnsi) com uma página por item de `paginas`."""
+    objetos: List[bytes] = []
+
+    def novo(conteudo: bytes) -> int:
+        objetos.append(conteudo)
+        return len(objetos)
+
+    catalogo = novo(b"")  # preenchido depois
+    raiz_paginas = novo(b"")
+    fonte = novo(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    ids_paginas = []
+    for texto in paginas:
+        linhas = texto.splitlines()[:linhas_por_pagina] or [""]
+        fluxo = b"BT /F1 10 Tf 14 TL 40 800 Td " + b" ".join(
+            b"(" + _escapar_pdf(l) + b") Tj T*" for l in linhas
+        ) + b" ET"
+        conteudo = novo(b"<< /Length %d >>\nstream\n" % len(fluxo) + fluxo + b"\nendstream")
+        ids_paginas.append(novo(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (raiz_paginas, fonte, conteudo)
+        ))
+
+    objetos[catalogo - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % raiz_paginas
+    kids = b" ".join(b"%d 0 R" % i for i in ids_paginas)
+    objetos[raiz_paginas - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(ids_paginas))
+
+    saida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objetos, start=1):
+        offsets.append(len(saida))
+        saida += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for off in offsets:
+        saida += b"%010d 00000 n \n" % off
+    saida += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, catalogo, xref)
+    return bytes(saida)
+
+
+def gerar_pdf_tamanho(tamanho: int, seed: int = 42) -> bytes:
+    """PDF de ~`tamanho` bytes, com páginas de texto do samples.csv."""
+    pagina = gerar_texto(3000, seed)
+    n = max(1, tamanho // (len(pagina) + 300))
+    return gerar_pdf([gerar_texto(3000, seed + i) for i in range(n)])
+
+
+def gerar_html_marketing(tamanho: int, seed: int = 42) -> str:
+    """
+    HTML de ~`tamanho` caracteres no estilo de newsletter/notificação:
+    tabelas aninhadas, estilos inline, <style>, <script>, comentários
+    condicionais do Outlook e entidades, com os textos do samples.csv.
+    """
+    rnd = random.Random(seed)
+    textos = [t for t, _ in carregar_amostras()]
+    cabeca = (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Novidades da semana</title>"
+        "<style>" + ".c{color:#333;font-family:Arial} td{padding:0} " * 40 + "</style>"
+        "<script>window.dataLayer=[];function t(e){dataLayer.push(e)}</script></head><body>"
+    )
+    blocos = [cabeca]
+    total = len(cabeca)
+    while total < tamanho:
+        t = rnd.choice(textos).replace("&", "&amp;")
+        bloco = (
+            "<table role='presentation' width='100%' cellpadding='0' cellspacing='0' style='border:0'><tr>"
+            "<td align='center' style='padding:12px 24px;background:#f4f4f4'>"
+            "<!--[if mso]><table><tr><td width='600'><![endif]-->"
+            "<table width='600' style='max-width:600px'><tr><td class='c' style='font-size:14px;line-height:20px'>"
+            f"<span style='color:#111'>{t}</span>&nbsp;&mdash;&nbsp;<a href='https://example.com/r?u={rnd.randint(1, 10 ** 9)}'"
+            " style='color:#06c;text-decoration:none'>Saiba mais &raquo;</a>"
+            "<img src='https://example.com/p.gif' width='1' height='1' alt=''>"
+            "</td></tr></table><!--[if mso]></td></tr></table><![endif]--></td></tr></table>"
+        )
+        blocos.append(bloco)
+        total += len(bloco)
+    blocos.append("<script>t({evento:'abriu'})</script></body></html>")
+    return "".join(blocos)
+
+
+def gerar_eml(texto: str, html: bool = False, anexos: Optional[List[Tuple[str, bytes]]] = None,
+              corpo_html: Optional[str] = None) -> bytes:
+    """Email .eml com corpo texto (ou HTML; `corpo_html` = HTML pronto) e anexos opcionais (nome, bytes)."""
+    msg = EmailMessage()
+    msg["From"] = "cliente@example.com"
+    msg["To"] = "suporte@example.com"
+    msg["Subject"] = texto.splitlines()[0][:60] if texto else "(sem assunto)"
+    if corpo_html is not None:
+        msg.set_content(corpo_html, subtype="html")
+    elif html:
+        corpo = "".join(f"<p>{l}</p>" for l in texto.splitlines())
+        msg.set_content(f"<html><body><div>{corpo}</div></body></html>", subtype="html")
+    else:
+        msg.set_content(texto)
+    for nome, dados in anexos or []:
+        maintype, subtype = ("application", "pdf") if nome.endswith(".pdf") else ("application", "octet-stream")
+        msg.add_attachment(dados, maintype=maintype, subtype=subtype, filename=nome)
+    return msg.as_bytes()
+
+
+def gerar_eml_tamanho(tamanho: int, seed: int = 42) -> bytes:
+    """EML de ~`tamanho` bytes: corpo curto + anexo PDF preenchendo o resto."""
+    texto = gerar_texto(500, seed)
+    anexo = gerar_pdf_tamanho(int(tamanho * 0.72), seed) if tamanho > 4096 else None  # base64 ≈ +37%
+    return gerar_eml(texto, anexos=[("anexo.pdf", anexo)] if anexo else None)
+
+
+NOTIFICACOES = [
+    "Notificação automática: o chamado {n} foi atualizado para o status Em andamento. "
+    "Acompanhe pelo portal de suporte ou responda este email para incluir informações.",
+    "Sua fatura nº {n} está disponível. O boleto vence em {d} de março; em caso de dúvida "
+    "sobre valores, abra um chamado informando o número da fatura.",
+    "Ticket #{n} encerrado. Se o problema persistir, responda esta mensagem em até 7 dias "
+    "para reabrir o atendimento com a mesma prioridade.",
+    "Lembrete: a manutenção programada do sistema {n} acontece neste sábado das 22h às 2h. "
+    "Nenhuma ação é necessária. Obrigado pela compreensão.",
+]
+_NOMES = ["Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe"]
+
+
+def _citar(texto: str, rnd: random.Random) -> str:
+    """Histórico citado no estilo de um cliente de email aleatório."""
+    nome = rnd.choice(_NOMES)
+    estilo = rnd.randrange(3)
+    if estilo == 0:
+        citado = "\n".join("> " + l for l in texto.splitlines())
+        return f"Em seg., {rnd.randint(1, 28)} de mar. de 2025 às 10:{rnd.randint(10, 59)}, {nome} <{nome.lower()}@example.com> escreveu:\n{citado}"
+    if estilo == 1:
+        return f"-----Mensagem original-----\nDe: {nome}\nEnviado: segunda-feira\nPara: suporte\nAssunto: Re: pedido\n\n{texto}"
+    return f"On Mon, Mar {rnd.randint(1, 28)}, 2025 at 9:{rnd.randint(10, 59)} AM {nome} wrote:\n" + \
+        "\n".join("> " + l for l in texto.splitlines())
+
+
+def gerar_threads(n: int, familias: int = 40, seed: int = 42) -> List[Tuple[str, str]]:
+    """
+    `n` emails (texto, família) em ordem de chegada. Família = o conteúdo
+    novo do email: corpo de 2–4 amostras do samples.csv ("fNN") ou modelo
+    de notificação ("nN"). Tipos: original (saudação e assinatura sorteadas a
+    cada envio, então reenvios não são idênticos), resposta (corpo de uma
+    família citando o de outra), encaminhamento puro e notificação com
+    número aleatório.
+    """
+    rnd = random.Random(seed)
+    textos = [t for t, _ in carregar_amostras()]
+    corpos = ["\n".join(rnd.sample(textos, rnd.randint(2, 4))) for _ in range(familias)]
+
+    def corpo(f: int) -> str:
+        nome = rnd.choice(_NOMES)
+        return f"{rnd.choice(['Olá,', 'Bom dia,', 'Prezados,', 'Oi pessoal,'])}\n{corpos[f]}\n\n{rnd.choice(['Att,', 'Abraços,', 'Obrigado,'])}\n{nome}"
+
+    saida = []
+    for _ in range(n):
+        tipo = rnd.choices(["original", "resposta", "encaminhamento", "notificacao"], weights=[35, 30, 10, 25])[0]
+        f = rnd.randrange(familias)
+        if tipo == "notificacao":
+            m = rnd.randrange(len(NOTIFICACOES))
+            saida.append((NOTIFICACOES[m].format(n=rnd.randint(100, 999999), d=rnd.randint(1, 28)), f"n{m}"))
+        elif tipo == "original":
+            saida.append((corpo(f), f"f{f:02d}"))
+        elif tipo == "resposta":
+            saida.append((corpo(f) + "\n\n" + _citar(corpo(rnd.randrange(familias)), rnd), f"f{f:02d}"))
+        else:
+            saida.append(("---------- Forwarded message ---------\nFrom: cliente@example.com\nDate: Mon\n\n" + corpo(f), f"f{f:02d}"))
+    return saida
@@ -0,0 +1,142 @@
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List
+
+from backend.bench.corpus import gerar_eml, gerar_html_marketing, gerar_pdf_tamanho, gerar_texto
+from backend.bench.medicao import medir
+from backend.services import eml_reader
+
+# ---------------------------------------------------------------------
+# HTML → texto dos EMLs: parser em streaming (eml_reader._html_to_text)
+# x BeautifulSoup(html.parser).get_text (caminho antigo).
+#   - paridade: HTML de newsletter + fragmentos aleatórios de tags
+#   - tempo: só o HTML e o extract_text_from_eml inteiro, por tamanho
+#   - anexos: EML com N PDFs, extração em sequência x em processos
+#
+#   pip install -r backend/requirements-bench.txt   # beautifulsoup4
+#   python -m backend.bench.html_eml [--tamanhos 20000,200000,2000000] [--json]
+# ---------------------------------------------------------------------
+
+_PECAS = [
+    "<div>", "</div>", "<p>", "</p>", "<br>", "<br/>", "<td>", "</td>", "<table>", "</table>",
+    "<span style='x'>", "</span>", "<script>var a='<p>x</p>';</script>", "<style>.a{color:red}</style>",
+    "<!-- c -->", "<!--[if mso]><b>x</b><![endif]-->", "<template><b>t</b></template>", "&nbsp;",
+    "&amp;", "&#233;", "&eacute;", "&lt;b&gt;", " texto ", "\n", "  olá ", "Promoção!", "<img src=x>",
+    "<a href='y'>link</a>", "<title>T</title>", "<!DOCTYPE html>", "<b>", "</b>", "<![CDATA[cd]]>",
+    "&#x41;", "<?php x ?>", "</p >", "<P>", "</SCRIPT>", "<Script>z</script>",
+]
+
+
+def _bs4(html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, "html.parser").get_text(separator=" ", strip=True)
+
+
+def paridade(n: int = 5000, seed: int = 42) -> Dict:
+    """
+    Divergências contra o BeautifulSoup (sem limite de caracteres).
+    Diferença conhecida e fora do sorteio: entidade sem ';' no FIM do HTML
+    ("...&copy") — o bs4 deixa literal, aqui vira "©" como no navegador.
+    """
+    rnd = random.Random(seed)
+    casos = [gerar_html_marketing(20000, seed + i) for i in range(20)]
+    casos += ["".join(rnd.choice(_PECAS) for _ in range(rnd.randint(1, 40))) for _ in range(n)]
+    divergentes = [h for h in casos if _bs4(h) != eml_reader._html_to_text(h)]
+    return {"casos": len(casos), "divergencias": len(divergentes),
+            "exemplo": divergentes[0][:200] if divergentes else None}
+
+
+def _tempo(fn: Callable[[], object], tempo_max: float) -> float:
+    return medir(fn, repeticoes=20, tempo_max=tempo_max)["p50_ms"]
+
+
+def tempos(tamanhos: List[int], tempo_max: float, limite: int) -> List[Dict]:
+    linhas = []
+    for tamanho in tamanhos:
+        html = gerar_html_marketing(tamanho)
+        eml = gerar_eml("Novidades da semana", corpo_html=html)
+        linhas.append({
+            "html_chars": len(html),
+            "texto_chars": len(eml_reader._html_to_text(html)),
+            "bs4_ms": _tempo(lambda: _bs4(html), tempo_max),
+            "streaming_ms": _tempo(lambda: eml_reader._html_to_text(html), tempo_max),
+            "streaming_limite_ms": _tempo(lambda: eml_reader._html_to_text(html, limite), tempo_max),
+            "eml_bs4_ms": _tempo(lambda: _eml_antigo(eml), tempo_max),
+            "eml_ms": _tempo(lambda: eml_reader.extract_text_from_eml(eml), tempo_max),
+        })
+    return linhas
+
+
+def _eml_antigo(eml: bytes) -> str:
+    """extract_text_from_eml de antes: walk até a 1ª parte de texto + BeautifulSoup."""
+    from email import policy
+    from email.parser import BytesParser
+
+    msg = BytesParser(policy=policy.default).parsebytes(eml)
+    for part in msg.walk():
+        ctype = part.get_content_type()
+        if ctype == "text/plain":
+            return part.get_content().strip()
+        if ctype == "text/html":
+            return _bs4(part.get_content()).strip()
+    return ""
+
+
+def anexos(n: int, processos: int) -> Dict:
+    """EML com `n` PDFs (~300 KB cada) + um .txt: anexos extraídos em sequência x num pool de processos."""
+    lista = [(f"fatura_{i}.pdf", gerar_pdf_tamanho(300_000, seed=i)) for i in range(n)]
+    lista.append(("leia-me.txt", gerar_texto(2000).encode()))
+    eml = gerar_eml("Segue em anexo as faturas", anexos=lista)
+
+    t0 = time.perf_counter()
+    sequencial = eml_reader.extract_text_from_eml(eml, anexos=True)
+    t_seq = time.perf_counter() - t0
+    with ProcessPoolExecutor(processos) as pool:
+        pool.submit(len, "").result()  # sobe os processos fora da medição
+        t0 = time.perf_counter()
+        paralelo = eml_reader.extract_text_from_eml(eml, anexos=True, mapa=pool.map)
+        t_par = time.perf_counter() - t0
+    assert paralelo == sequencial
+    return {"anexos": len(lista), "processos": processos, "chars": len(sequencial),
+            "sequencial_ms": round(t_seq * 1000, 1), "paralelo_ms": round(t_par * 1000, 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HTML → texto dos EMLs: streaming x BeautifulSoup.")
+    ap.add_argument("--tamanhos", default="20000,200000,2000000", help="tamanhos do HTML (caracteres)")
+    ap.add_argument("--tempo-max", type=float, default=5.0, help="segundos por medição")
+    ap.add_argument("--limite", type=int, default=10000, help="max_chars da coluna 'c/ limite'")
+    ap.add_argument("--anexos", type=int, default=4, help="PDFs anexados no teste de anexos")
+    ap.add_argument("--processos", type=int, default=4)
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    resultado = {
+        "paridade": paridade(),
+        "tempos": tempos([int(t) for t in args.tamanhos.split(",")], args.tempo_max, args.limite),
+        "anexos": anexos(args.anexos, args.processos),
+    }
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    p = resultado["paridade"]
+    print(f"paridade com o BeautifulSoup: {p['divergencias']} divergências em {p['casos']} HTMLs")
+    print(f"\n{'HTML':>10}{'texto':>9}{'bs4':>10}{'streaming':>11}{'c/ limite':>11}{'EML bs4':>10}{'EML':>9}{'ganho EML':>11}")
+    for l in resultado["tempos"]:
+        print(f"{l['html_chars']:>10}{l['texto_chars']:>9}{l['bs4_ms']:>8.1f}ms{l['streaming_ms']:>9.1f}ms"
+              f"{l['streaming_limite_ms']:>9.1f}ms{l['eml_bs4_ms']:>8.1f}ms{l['eml_ms']:>7.1f}ms"
+              f"{l['eml_bs4_ms'] / max(l['eml_ms'], 1e-9):>10.1f}x")
+    a = resultado["anexos"]
+    print(f"\nanexos ({a['anexos']}, {a['chars']} chars): sequencial {a['sequencial_ms']:.0f} ms | "
+          f"{a['processos']} processos {a['paralelo_ms']:.0f} ms")
+    if p["divergencias"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import resource
+import sys
+import time
+from typing import Callable, Dict, List
+
+# ---------------------------------------------------------------------
+# Helpers de medição compartilhados pelos benchmarks.
+# ---------------------------------------------------------------------
+
+
+def percentil(amostras: List[float], p: float) -> float:
+    """Percentil por interpolação linear (p em 0–100)."""
+    if not amostras:
+        return 0.0
+    ordenadas = sorted(amostras)
+    k = (len(ordenadas) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(ordenadas) - 1)
+    return ordenadas[i] + (ordenadas[j] - ordenadas[i]) * (k - i)
+
+
+def rss_pico_mb() -> float:
+    """Pico de RSS do processo até agora (ru_maxrss: KB no Linux, bytes no macOS)."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def medir(fn: Callable[[], object], repeticoes: int = 50, tempo_max: float = 5.0, aquecimento: int = 1) -> Dict:
+    """
+    Roda `fn` até `repeticoes` vezes (ou até `tempo_max` segundos) e resume:
+    latências p50/p95/p99 em ms, requisições/s e pico de RSS do processo.
+    """
+    for _ in range(aquecimento):
+        fn()
+
+    latencias: List[float] = []
+    inicio = time.perf_counter()
+    while len(latencias) < repeticoes:
+        t0 = time.perf_counter()
+        fn()
+        latencias.append(time.perf_counter() - t0)
+        if time.perf_counter() - inicio > tempo_max:
+            break
+    total = time.perf_counter() - inicio
+
+    return {
+        "n": len(latencias),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+        "rps": round(len(latencias) / total, 2) if total > 0 else 0.0,
+        "rss_pico_mb": round(rss_pico_mb(), 1),
+    }
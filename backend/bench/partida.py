@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.bench.corpus import gerar_pdf_tamanho
+from backend.bench.rss_workers import _porta_livre
+
+# ---------------------------------------------------------------------
+# Perfil de partida (cold start) do servidor:
+#   - import do backend.app módulo a módulo (python -X importtime): total,
+#     os módulos mais caros, custo por pacote e quais dependências pesadas
+#     (PyPDF2, sklearn, NumPy…) já vieram junto
+#   - para cada AUTOU_AQUECER (1 = antes de aceitar conexões, fundo,
+#     0 = sob demanda): do spawn do uvicorn até o /health responder e até
+#     o 1º /classify com sucesso, latência desse 1º /classify e do 1º PDF,
+#     e os marcos que o próprio servidor registrou (/config → partida)
+#
+#   python -m backend.bench.partida [--modos 1,fundo,0] [--json]
+# ---------------------------------------------------------------------
+
+RAIZ = Path(__file__).parent.parent.parent
+PESADOS = ("PyPDF2", "sklearn", "scipy", "joblib", "numpy", "nltk", "bs4", "sqlite3", "orjson")
+_LINHA_IMPORT = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+TEXTO = "Bom dia, qual o status do protocolo 123?"
+
+
+def perfil_import(modulo: str = "backend.app", top: int = 15) -> Dict:
+    """Tempo de import (processo novo, -X importtime) e dependências pesadas carregadas."""
+    codigo = f"import sys, json; import {modulo}; print(json.dumps([m for m in {PESADOS!r} if m in sys.modules]))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=RAIZ,
+                          env=dict(os.environ, PYTHONPATH=str(RAIZ)), capture_output=True, text=True, check=True)
+    linhas = []
+    for linha in proc.stderr.splitlines():
+        m = _LINHA_IMPORT.match(linha)
+        if m:
+            proprio, acumulado, recuo, nome = int(m[1]), int(m[2]), len(m[3]), m[4]
+            linhas.append((nome, proprio, acumulado, recuo))
+    # a subárvore do módulo: da linha de nível 1 anterior (exclusive) até a dele
+    # (importtime lista cada módulo ao terminar; o site/interpretador vem antes)
+    fim = next(i for i, l in enumerate(linhas) if l[0] == modulo)
+    inicio = max((i + 1 for i, l in enumerate(linhas[:fim]) if l[3] == 1), default=0)
+    alvo = linhas[inicio:fim + 1]
+    total = alvo[-1][2]
+    por_pacote: Dict[str, int] = defaultdict(int)
+    for nome, proprio, _, _ in alvo:
+        por_pacote[nome.split(".")[0]] += proprio
+    return {
+        "modulo": modulo,
+        "total_ms": round(total / 1000, 1),
+        "pesados_carregados": json.loads(proc.stdout.strip().splitlines()[-1]),
+        "modulos": [{"modulo": n, "acumulado_ms": round(a / 1000, 1), "proprio_ms": round(p / 1000, 1)}
+                    for n, p, a, _ in sorted(alvo, key=lambda l: -l[2])[:top]],
+        "pacotes": {p: round(us / 1000, 1) for p, us in sorted(por_pacote.items(), key=lambda kv: -kv[1])[:top]},
+    }
+
+
+def _post(url: str, timeout: float = 30.0, **kwargs) -> Optional[int]:
+    """POST sem dependências (urllib); devolve o status ou None se não conectou."""
+    if "arquivo" in kwargs:
+        fronteira = "autoubench"
+        nome, dados = kwargs["arquivo"]
+        corpo = (f"--{fronteira}\r\nContent-Disposition: form-data; name=\"arquivo\"; filename=\"{nome}\"\r\n"
+                 f"Content-Type: application/octet-stream\r\n\r\n").encode() + dados + f"\r\n--{fronteira}--\r\n".encode()
+        tipo = f"multipart/form-data; boundary={fronteira}"
+    else:
+        corpo, tipo = json.dumps(kwargs["json"]).encode(), "application/json"
+    req = urllib.request.Request(url, data=corpo, headers={"Content-Type": tipo})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def _config(url: str) -> Dict:
+    with urllib.request.urlopen(f"{url}/config", timeout=5) as r:
+        return json.loads(r.read())
+
+
+def partida_servidor(aquecer: str, env_extra: Dict[str, str], timeout: float = 120.0, intervalo: float = 0.01) -> Dict:
+    """Spawn do uvicorn → /health ok → 1º /classify 200 → 1º PDF, com AUTOU_AQUECER=`aquecer`."""
+    porta = _porta_livre()
+    url = f"http://127.0.0.1:{porta}"
+    env = dict(os.environ, PYTHONPATH=str(RAIZ), AUTOU_CACHE="0", AUTOU_AQUECER=aquecer, **env_extra)
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--host", "127.0.0.1", "--port", str(porta),
+         "--log-level", "warning"],
+        cwd=RAIZ, env=env,
+    )
+    try:
+        health = None
+        while True:  # o 1º /classify que conectar mede a latência de quem chega no cold start
+            if time.perf_counter() - t0 > timeout or proc.poll() is not None:
+                raise RuntimeError(f"uvicorn não respondeu (AUTOU_AQUECER={aquecer})")
+            if health is None:
+                try:
+                    with urllib.request.urlopen(f"{url}/health", timeout=1):
+                        health = time.perf_counter() - t0
+                except OSError:
+                    time.sleep(intervalo)
+                    continue
+            ti = time.perf_counter()
+            status = _post(f"{url}/classify", json={"texto": TEXTO})
+            if status == 200:
+                fim = time.perf_counter()
+                break
+            time.sleep(intervalo)
+        tp = time.perf_counter()
+        status_pdf = _post(f"{url}/classify", arquivo=("doc.pdf", gerar_pdf_tamanho(20_000)))
+        pdf_ms = (time.perf_counter() - tp) * 1000
+        partida = _config(url).get("partida", {})
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return {
+        "aquecer": aquecer,
+        "health_s": round(health, 3),
+        "primeira_classificacao_s": round(fim - t0, 3),
+        "primeira_classificacao_ms": round((fim - ti) * 1000, 1),
+        "primeiro_pdf_ms": round(pdf_ms, 1) if status_pdf == 200 else None,
+        "servidor": partida,
+    }
+
+
+def medir_partida(modos: List[str], env_extra: Optional[Dict[str, str]] = None) -> Dict:
+    return {
+        "import": perfil_import(),
+        "servidor": [partida_servidor(m, env_extra or {}) for m in modos],
+    }
+
+
+def imprimir(resultado: Dict):
+    imp = resultado["import"]
+    print(f"import {imp['modulo']}: {imp['total_ms']:.0f} ms | pesados já carregados: "
+          f"{', '.join(imp['pesados_carregados']) or 'nenhum'}")
+    print(f"\n{'módulo':<44}{'acumulado':>11}{'próprio':>10}")
+    for m in imp["modulos"]:
+        print(f"{m['modulo']:<44}{m['acumulado_ms']:>9.1f}ms{m['proprio_ms']:>8.1f}ms")
+    print("\npor pacote (tempo próprio): " + ", ".join(f"{p} {ms:.0f}ms" for p, ms in imp["pacotes"].items()))
+    print(f"\n{'AUTOU_AQUECER':>13}{'/health':>10}{'1º classify':>13}{'latência':>10}{'1º PDF':>10}"
+          f"{'import app':>12}{'aquecimento':>13}")
+    for s in resultado["servidor"]:
+        srv = s["servidor"]
+        aquec = f"{srv['aquecimento']:.2f}s" if srv.get("aquecimento") is not None else "-"
+        pdf = f"{s['primeiro_pdf_ms']:.0f}ms" if s["primeiro_pdf_ms"] is not None else "falhou"
+        print(f"{s['aquecer']:>13}{s['health_s']:>9.2f}s{s['primeira_classificacao_s']:>12.2f}s"
+              f"{s['primeira_classificacao_ms']:>8.0f}ms{pdf:>10}{srv.get('import_app') or 0:>11.2f}s{aquec:>13}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Perfil de partida: import por módulo e tempo até o 1º /classify.")
+    ap.add_argument("--modos", default="1,fundo,0", help="valores de AUTOU_AQUECER a comparar")
+    ap.add_argument("--env", action="append", default=[], help="variável extra do servidor, ex.: AUTOU_EXECUTOR=process")
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    resultado = medir_partida(args.modos.split(","), dict(e.split("=", 1) for e in args.env))
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+    imprimir(resultado)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import csv
+import random
+import re
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from backend.services.classifier import (
+    ACTION_BOOST, IMPROD_KEYWORDS, PROD_KEYWORDS, REQUEST_PAT, _pontuar, _rm_acentos,
+)
+
+# ---------------------------------------------------------------------
+# Paridade + tempo do `_pontuar` (varredor compilado) contra o laço
+# original de re.search por padrão.
+#   python -m backend.bench.pontuar [--repeticoes 20]
+# Termina com erro se alguma contagem divergir.
+# ---------------------------------------------------------------------
+
+DADOS = Path(__file__).parent.parent / "data" / "samples.csv"
+
+
+def _pontuar_ingenuo(texto: str) -> Tuple[int, int]:
+    """Implementação de referência (laço antigo, um re.search por padrão)."""
+    t = _rm_acentos(texto.lower())
+    prod = sum(1 for p in PROD_KEYWORDS if re.search(p, t))
+    impr = sum(1 for p in IMPROD_KEYWORDS if re.search(p, t))
+    if ACTION_BOOST.search(t):
+        prod += 3
+    if REQUEST_PAT.search(t):
+        prod += 2
+    return prod, impr
+
+
+def montar_corpus(seed: int = 42) -> List[str]:
+    """samples.csv + variações sintéticas (junções, pontuação, números, textos longos)."""
+    with open(DADOS, encoding="utf-8") as f:
+        base = [(l.get("text") or "").strip() for l in csv.DictReader(f)]
+    base = [t for t in base if t]
+
+    rnd = random.Random(seed)
+    extras = [
+        "Nota fiscal", "notafiscal", "nota-fiscal", "NF-e 123", "nfe", "nfs",
+        "protocolo123", "protocolo 123", "protocolo_123", "chamado\n\t456",
+        "por favor", "por  favor", "Por Favor!", "bom dia", "boa  tarde",
+        "feliz ano novo", "muito obrigadooo", "abraços", "👍🙏", "ok.", "atendimento",
+    ]
+    corpus = list(base) + extras
+    for _ in range(500):
+        partes = rnd.sample(base + extras, k=rnd.randint(2, 6))
+        sep = rnd.choice([" ", "\n", ", ", "-", "", "_"])
+        corpus.append(sep.join(partes))
+    # textos longos (tipo PDF extraído)
+    corpus.append("\n".join(rnd.choice(base) for _ in range(5000)))
+    return corpus
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Paridade e tempo do _pontuar.")
+    ap.add_argument("--repeticoes", type=int, default=20)
+    args = ap.parse_args()
+
+    corpus = montar_corpus()
+
+    divergencias = [t for t in corpus if _pontuar(t) != _pontuar_ingenuo(t)]
+    print(f"Paridade: {len(corpus) - len(divergencias)}/{len(corpus)} textos idênticos")
+
+    for nome, fn in (("re.search (referência)", _pontuar_ingenuo), ("varredor compilado", _pontuar)):
+        ini = time.perf_counter()
+        for _ in range(args.repeticoes):
+            for t in corpus:
+                fn(t)
+        dt = time.perf_counter() - ini
+        print(f"{nome:<24} {dt * 1000 / args.repeticoes:9.2f} ms por passada no corpus")
+
+    if divergencias:
+        for t in divergencias[:5]:
+            print(f"  diverge: {t[:80]!r} -> {_pontuar(t)} != {_pontuar_ingenuo(t)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import json
+import re
+import time
+from typing import Callable, Dict, List
+
+from backend.bench.corpus import carregar_amostras, gerar_texto
+from backend.services import nlp_preprocess
+
+# ---------------------------------------------------------------------
+# Pré-processamento (nlp_preprocess) em tokens/s:
+#   referencia  implementação antiga: 3 re.sub + split + RSLP em todo token
+#   fundido     regex única, RSLP sem cache
+#   cache       limpar_texto (regex única + cache de radicais), cache frio
+#               na 1ª rodada e quente nas seguintes
+#   lote        limpar_textos na lista inteira
+# Antes de medir, confere que todas as variantes dão a mesma saída.
+#
+#   python -m backend.bench.preprocessamento [--textos 2000] [--rodadas 3] [--json]
+# Precisa dos dados do NLTK (python -m nltk.downloader stopwords rslp).
+# ---------------------------------------------------------------------
+
+
+def referencia(texto: str) -> str:
+    """limpar_texto como era antes (mantido aqui só para comparação)."""
+    stopwords, stemmer = nlp_preprocess._recursos()
+    texto = (texto or "").lower()
+    texto = re.sub(r"http\S+|www\S+", " ", texto)
+    texto = re.sub(r"[^a-záéíóúâêîôûàèìòùãõç0-9\s]", " ", texto)
+    texto = re.sub(r"\s+", " ", texto).strip()
+    return " ".join([stemmer.stem(t) for t in texto.split() if t not in stopwords])
+
+
+def fundido(texto: str) -> str:
+    radical = nlp_preprocess._radical_sem_cache
+    return " ".join([r for r in map(radical, nlp_preprocess.tokenizar(texto)) if r is not None])
+
+
+def montar_corpus(n: int) -> List[str]:
+    """Amostras reais + textos sintéticos de vários tamanhos (com links no meio)."""
+    base = [t for t, _ in carregar_amostras()]
+    textos = []
+    for i in range(n):
+        if i % 4 == 0:
+            textos.append(gerar_texto(4096, seed=i) + " veja https://exemplo.com/p?i=%d www.x.com.br" % i)
+        else:
+            textos.append(base[i % len(base)] + " " + gerar_texto(256 * (1 + i % 8), seed=i))
+    return textos
+
+
+def _medir(fn: Callable[[List[str]], List[str]], textos: List[str], tokens: int, rodadas: int) -> Dict[str, float]:
+    tempos = []
+    for _ in range(rodadas):
+        t0 = time.perf_counter()
+        fn(textos)
+        tempos.append(time.perf_counter() - t0)
+    return {
+        "primeira_s": round(tempos[0], 4),
+        "melhor_s": round(min(tempos), 4),
+        "tokens_por_s": round(tokens / min(tempos)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Throughput do pré-processamento (tokens/s).")
+    ap.add_argument("--textos", type=int, default=2000)
+    ap.add_argument("--rodadas", type=int, default=3)
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    textos = montar_corpus(args.textos)
+    try:
+        nlp_preprocess._recursos()  # carga do NLTK fora da medição
+    except RuntimeError as e:
+        raise SystemExit(f"{e}\nEste bench precisa dos dados do NLTK: rode `python -m nltk.downloader stopwords rslp`.")
+    tokens = sum(len(nlp_preprocess.tokenizar(t)) for t in textos)
+
+    esperado = [referencia(t) for t in textos]
+    divergentes = sum(
+        1 for t, e in zip(textos, esperado) if not (fundido(t) == nlp_preprocess.limpar_texto(t) == e)
+    ) + sum(1 for a, e in zip(nlp_preprocess.limpar_textos(textos), esperado) if a != e)
+
+    resultado = {
+        "textos": len(textos),
+        "tokens": tokens,
+        "divergentes": divergentes,
+        "referencia": _medir(lambda ts: [referencia(t) for t in ts], textos, tokens, args.rodadas),
+        "fundido": _medir(lambda ts: [fundido(t) for t in ts], textos, tokens, args.rodadas),
+    }
+    # "cache" começa frio (a conferência acima já o encheu) e aquece nas rodadas seguintes
+    getattr(nlp_preprocess._radical, "cache_clear", lambda: None)()
+    resultado["cache"] = _medir(lambda ts: [nlp_preprocess.limpar_texto(t) for t in ts], textos, tokens,
+                                args.rodadas)
+    resultado["lote"] = _medir(nlp_preprocess.limpar_textos, textos, tokens, args.rodadas)
+    resultado["cache_info"] = nlp_preprocess.info_cache()
+
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+        return
+    print(f"{resultado['textos']} textos, {tokens} tokens, {divergentes} saídas divergentes da referência")
+    print(f"{'variante':<12}{'1ª rodada':>12}{'melhor':>10}{'tokens/s':>14}{'x ref.':>8}")
+    ref = resultado["referencia"]["tokens_por_s"]
+    for nome in ("referencia", "fundido", "cache", "lote"):
+        r = resultado[nome]
+        print(f"{nome:<12}{r['primeira_s'] * 1000:>10.0f}ms{r['melhor_s'] * 1000:>8.0f}ms"
+              f"{r['tokens_por_s']:>14,}{r['tokens_por_s'] / ref:>7.1f}x")
+    if divergentes:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import json
+import timeit
+from collections import Counter
+from typing import Dict
+
+from backend.bench.corpus import carregar_amostras, gerar_texto
+from backend.services import classifier, responders
+
+# ---------------------------------------------------------------------
+# Respostas sugeridas por intenção (services/responders.py):
+#   - quanto custa por requisição: detectar a intenção a partir dos
+#     achados do varredor e renderizar o modelo (memoizado x sem LRU),
+#     contra a resposta fixa de antes
+#   - quais modelos saem para o samples.csv
+#
+#   python -m backend.bench.respostas [--json]
+# ---------------------------------------------------------------------
+
+
+def _ns(fn, numero: int) -> float:
+    """Melhor de 5 rodadas, em ns por chamada."""
+    return min(timeit.repeat(fn, number=numero, repeat=5)) / numero * 1e9
+
+
+def custos(numero: int) -> Dict[str, float]:
+    texto = "Bom dia, qual o status do protocolo 48213? Obrigado!"
+    t = classifier._rm_acentos(texto.lower())
+    achados = classifier._VARREDOR.varrer(t)
+    candidatos, parametros = classifier._intencao(achados, t)
+    id_ = responders.escolher("Produtivo", candidatos, parametros)
+    sem_lru = responders.renderizar.__wrapped__
+    longo = gerar_texto(2000)
+    return {
+        "fixa_ns": _ns(responders.resposta_produtiva, numero),
+        "intencao_ns": _ns(lambda: classifier._intencao(achados, t), numero),
+        "responder_ns": _ns(lambda: responders.responder("Produtivo", candidatos, parametros), numero),
+        "renderizar_sem_lru_ns": _ns(lambda: sem_lru(id_, parametros), numero),
+        "analisar_2k_us": _ns(lambda: classifier._analisar(longo), numero // 100) / 1000,
+    }
+
+
+def distribuicao() -> Dict[str, int]:
+    """Modelo escolhido para cada email do samples.csv."""
+    ids = Counter()
+    for texto, _ in carregar_amostras():
+        sp, si, (candidatos, parametros) = classifier._analisar(texto)
+        categoria = "Produtivo" if sp >= si else "Improdutivo"
+        ids[responders.escolher(categoria, candidatos, parametros)] += 1
+    return dict(ids.most_common())
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Custo e distribuição das respostas por intenção.")
+    ap.add_argument("--numero", type=int, default=200_000, help="chamadas por rodada de medição")
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    resultado = {"custos": custos(args.numero), "modelos_samples": distribuicao()}
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+    c = resultado["custos"]
+    print(f"resposta fixa (antes):          {c['fixa_ns']:8.0f} ns")
+    print(f"detectar intenção (achados):    {c['intencao_ns']:8.0f} ns")
+    print(f"responder (LRU):                {c['responder_ns']:8.0f} ns")
+    print(f"renderizar sem LRU:             {c['renderizar_sem_lru_ns']:8.0f} ns")
+    print(f"_analisar, texto de 2k chars:   {c['analisar_2k_us']:8.1f} µs")
+    print("\nmodelos no samples.csv:")
+    for id_, n in resultado["modelos_samples"].items():
+        print(f"  {id_:<28}{n:>6}")
+
+
+if __name__ == "__main__":
+    main()
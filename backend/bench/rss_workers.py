@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# ---------------------------------------------------------------------
+# Memória por worker com `uvicorn --workers N` (N = 1, 4, 16).
+#
+# Sobe o servidor de verdade, espera todos os workers carregarem o modelo,
+# manda algumas classificações e lê /proc/<pid>/smaps_rollup de cada um:
+#   RSS  páginas residentes (conta de novo as compartilhadas em cada worker)
+#   PSS  páginas compartilhadas divididas entre quem as usa
+#   USS  páginas só daquele worker (Private_Clean + Private_Dirty)
+# "Incremental" = quanto o PSS total cresce por worker adicionado.
+#
+# Compara pickle (sklearn), leve sem mmap e leve com mmap. Com --termos N
+# usa um modelo leve sintético com N termos (onde o tamanho do modelo
+# domina a memória) e compara só leve sem/com mmap.
+#
+#   python -m backend.bench.rss_workers [--workers 1,4,16] [--termos 2000000] [--json]
+# Só Linux (/proc).
+# ---------------------------------------------------------------------
+
+RAIZ = Path(__file__).parent.parent.parent
+MODELO_LEVE = RAIZ / "backend" / "data" / "model_leve"
+TEXTO = "Bom dia, poderiam verificar o status do protocolo 123? Segue o comprovante em anexo."
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _memoria(pid: int) -> Optional[Dict[str, int]]:
+    """Rss/Pss/USS em kB (smaps_rollup; smaps somado em kernels antigos)."""
+    campos = {"Rss": 0, "Pss": 0, "Private_Clean": 0, "Private_Dirty": 0}
+    for arquivo in ("smaps_rollup", "smaps"):
+        try:
+            with open(f"/proc/{pid}/{arquivo}") as f:
+                for linha in f:
+                    nome, _, resto = linha.partition(":")
+                    if nome in campos:
+                        campos[nome] += int(resto.split()[0])
+            break
+        except FileNotFoundError:
+            continue
+        except OSError:
+            return None
+    return {"rss": campos["Rss"], "pss": campos["Pss"], "uss": campos["Private_Clean"] + campos["Private_Dirty"]}
+
+
+def _workers(pai: int, n: int) -> List[int]:
+    """Filhos do supervisor do uvicorn que são workers (ignora o resource_tracker)."""
+    if n == 1:
+        return [pai]  # com 1 worker o uvicorn atende no próprio processo
+    pids = []
+    for d in os.listdir("/proc"):
+        if not d.isdigit():
+            continue
+        try:
+            with open(f"/proc/{d}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{d}/cmdline", "rb") as f:
+                cmd = f.read()
+        except OSError:
+            continue
+        if ppid == pai and b"spawn_main" in cmd:
+            pids.append(int(d))
+    return pids
+
+
+def _get(url: str, timeout: float = 1.0) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as r:
+            return r.status == 200
+    except OSError:
+        return False
+
+
+def _classificar(porta: int, vezes: int):
+    corpo = json.dumps({"texto": TEXTO}).encode()
+    for _ in range(vezes):
+        req = urllib.request.Request(f"http://127.0.0.1:{porta}/classify", data=corpo,
+                                     headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(req, timeout=30).read()
+
+
+def medir(workers: int, env_extra: Dict[str, str], timeout: float = 180.0) -> Dict:
+    porta = _porta_livre()
+    env = dict(os.environ, AUTOU_CACHE="0", AUTOU_METRICAS="0", PYTHONPATH=str(RAIZ), **env_extra)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--host", "127.0.0.1", "--port", str(porta),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=RAIZ, env=env,
+    )
+    try:
+        limite = time.monotonic() + timeout
+        # Pronto = todos os workers vivos, /health ok e memória estável (startup/aquecimento terminados)
+        anterior, estavel = None, 0
+        while estavel < 3:
+            if time.monotonic() > limite or proc.poll() is not None:
+                raise RuntimeError(f"uvicorn com {workers} workers não ficou pronto")
+            time.sleep(0.5)
+            pids = _workers(proc.pid, workers)
+            if len(pids) < workers or not _get(f"http://127.0.0.1:{porta}/health"):
+                continue
+            total = sum((_memoria(p) or {"rss": 0})["rss"] for p in pids)
+            estavel = estavel + 1 if total == anterior else 0
+            anterior = total
+
+        _classificar(porta, 20 * workers)  # o kernel espalha as conexões entre os workers
+        medidas = [m for m in (_memoria(p) for p in _workers(proc.pid, workers)) if m]
+    finally:
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    mb = lambda kb: round(kb / 1024, 1)
+    return {
+        "workers": len(medidas),
+        "rss_total_mb": mb(sum(m["rss"] for m in medidas)),
+        "pss_total_mb": mb(sum(m["pss"] for m in medidas)),
+        "uss_medio_mb": mb(sum(m["uss"] for m in medidas) / max(1, len(medidas))),
+    }
+
+
+def modelo_sintetico(destino: Path, termos: int) -> Path:
+    """Modelo leve com `termos` termos (config/classes do modelo real, pesos aleatórios)."""
+    from backend.services.modelo_leve import gravar
+
+    meta = json.loads((MODELO_LEVE / "meta.json").read_text(encoding="utf-8"))
+    rnd = np.random.default_rng(42)
+    palavras = [f"termo{i:08d}" for i in range(termos // 2)]
+    vocab = palavras + [f"{a} {b}" for a, b in zip(palavras, reversed(palavras))]
+    gravar(destino, vocab[:termos], idf=rnd.uniform(1, 6, len(vocab[:termos])),
+           coef=rnd.normal(0, 0.5, len(vocab[:termos])), intercepto=meta["intercepto"],
+           classes=meta["classes"], config=meta["config"])
+    return destino
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Memória por worker do uvicorn: pickle x leve x leve+mmap.")
+    ap.add_argument("--workers", default="1,4,16", help="lista de N (padrão: 1,4,16)")
+    ap.add_argument("--termos", type=int, default=0, help="usa modelo leve sintético com N termos")
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+    ns = [int(n) for n in args.workers.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.termos:
+            base = str(modelo_sintetico(Path(tmp) / "model_leve", args.termos))
+            cenarios = {
+                "leve": {"AUTOU_MODELO_RUNTIME": "leve", "AUTOU_MODELO_MMAP": "0", "AUTOU_MODELO_LEVE": base},
+                "leve+mmap": {"AUTOU_MODELO_RUNTIME": "leve", "AUTOU_MODELO_MMAP": "1", "AUTOU_MODELO_LEVE": base},
+            }
+        else:
+            cenarios = {
+                "pickle": {"AUTOU_MODELO_RUNTIME": "pickle"},
+                "leve": {"AUTOU_MODELO_RUNTIME": "leve", "AUTOU_MODELO_MMAP": "0"},
+                "leve+mmap": {"AUTOU_MODELO_RUNTIME": "leve", "AUTOU_MODELO_MMAP": "1"},
+            }
+
+        resultado: Dict[str, Dict] = {}
+        for nome, env in cenarios.items():
+            resultado[nome] = {}
+            for n in ns:
+                resultado[nome][n] = medir(n, env)
+                print(f"{nome} x{n}: {resultado[nome][n]}", file=sys.stderr)
+            base_n, base_r = ns[0], resultado[nome][ns[0]]
+            for n in ns[1:]:
+                r = resultado[nome][n]
+                r["incremental_pss_mb"] = round((r["pss_total_mb"] - base_r["pss_total_mb"]) / (n - base_n), 1)
+
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+        return
+    print(f"{'cenário':<12}{'workers':>8}{'RSS total':>12}{'PSS total':>12}{'USS/worker':>12}{'incremental':>13}")
+    for nome, por_n in resultado.items():
+        for n, r in por_n.items():
+            inc = f"{r['incremental_pss_mb']:>10.1f}MB" if "incremental_pss_mb" in r else f"{'-':>12}"
+            print(f"{nome:<12}{n:>8}{r['rss_total_mb']:>10.1f}MB{r['pss_total_mb']:>10.1f}MB"
+                  f"{r['uss_medio_mb']:>10.1f}MB {inc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from backend.bench.corpus import carregar_amostras, gerar_texto
+
+# ---------------------------------------------------------------------
+# Runtime leve (NumPy) x pickle (joblib + sklearn):
+#   - paridade do predict_proba (diferença máxima absoluta)
+#   - cold start: import do classifier + carga + 1ª classificação,
+#     num processo Python novo (como um worker do uvicorn subindo)
+#   - RSS do processo depois disso
+#
+#   python -m backend.train_classifier --exportar-leve --sem-treino
+#   python -m backend.bench.runtime_modelo [--rodadas 5] [--json]
+# ---------------------------------------------------------------------
+
+RAIZ = Path(__file__).parent.parent.parent
+
+# Roda no processo filho; imprime uma linha JSON
+_FILHO = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+from backend.services import classifier
+t_import = time.perf_counter() - t0
+classifier.carregar_modelo()
+t_carga = time.perf_counter() - t0 - t_import
+classifier.classificar_e_sugerir("Bom dia, qual o status do protocolo 123?")
+total = time.perf_counter() - t0
+try:  # VmHWM zera no exec; ru_maxrss herda o pico do processo pai no Linux
+    rss_mb = next(int(l.split()[1]) for l in open("/proc/self/status") if l.startswith("VmHWM")) / 1024
+except OSError:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+print(json.dumps({
+    "runtime": classifier.estado_modelo()["runtime"],
+    "import_s": t_import, "carga_s": t_carga, "total_s": total,
+    "rss_mb": rss_mb,
+    "sklearn_importado": "sklearn" in sys.modules,
+}))
+"""
+
+
+def cold_start(runtime: str, rodadas: int) -> dict:
+    env = dict(os.environ, AUTOU_MODELO_RUNTIME=runtime, AUTOU_METRICAS="0", PYTHONPATH=str(RAIZ))
+    medidas = []
+    for _ in range(rodadas):
+        saida = subprocess.run([sys.executable, "-c", _FILHO], env=env, cwd=RAIZ,
+                               capture_output=True, text=True, check=True)
+        medidas.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    resumo = {k: round(statistics.median(m[k] for m in medidas), 4)
+              for k in ("import_s", "carga_s", "total_s", "rss_mb")}
+    resumo["runtime"] = medidas[0]["runtime"]
+    resumo["sklearn_importado"] = medidas[0]["sklearn_importado"]
+    return resumo
+
+
+def paridade() -> dict:
+    import joblib
+    from backend.services.classifier import CAMINHO_MODELO, CAMINHO_MODELO_LEVE
+    from backend.services.modelo_leve import carregar
+
+    textos = [t for t, _ in carregar_amostras()]
+    textos += [gerar_texto(n, seed) for seed in range(20) for n in (80, 1024, 100 * 1024)]
+    a = joblib.load(CAMINHO_MODELO).predict_proba(textos)
+    b = carregar(CAMINHO_MODELO_LEVE).predict_proba(textos)
+    return {"textos": len(textos), "diff_max": float(np.abs(a - b).max())}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Runtime leve x pickle: paridade, cold start e RSS.")
+    ap.add_argument("--rodadas", type=int, default=5, help="processos novos por runtime (mediana)")
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    resultado = {
+        "paridade": paridade(),
+        "pickle": cold_start("pickle", args.rodadas),
+        "leve": cold_start("leve", args.rodadas),
+    }
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+        return
+    p = resultado["paridade"]
+    print(f"paridade predict_proba: {p['textos']} textos, diferença máx. {p['diff_max']:.2e}")
+    print(f"{'runtime':<10}{'import':>10}{'carga':>10}{'1ª classif.':>13}{'RSS':>10}  sklearn")
+    for nome in ("pickle", "leve"):
+        r = resultado[nome]
+        print(f"{nome:<10}{r['import_s'] * 1000:>8.0f}ms{r['carga_s'] * 1000:>8.0f}ms"
+              f"{r['total_s'] * 1000:>11.0f}ms{r['rss_mb']:>8.1f}MB  {'sim' if r['sklearn_importado'] else 'não'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import gzip
+import json
+import sys
+from typing import Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from backend import app as servidor
+from backend.bench.corpus import carregar_amostras
+from backend.bench.medicao import medir
+from backend.models.schemas import ItemLote, RespostaClassificacao, RespostaLote
+from backend.services.classifier import classificar_lote
+
+# ---------------------------------------------------------------------
+# Serialização das respostas do /classify e /classify/batch:
+#   - CPU por resposta: caminho antigo (objetos pydantic + response_model
+#     do FastAPI + json da stdlib) x dict validado + stdlib (sem orjson)
+#     x orjson direto (AUTOU_JSON_RAPIDO)
+#   - bytes na rede: JSON normal x compacto (resposta_id), cru x gzip x
+#     brotli (se o pacote brotli estiver instalado)
+#   - paridade: os três caminhos geram os mesmos bytes; ponta a ponta via
+#     TestClient (Content-Encoding, modo compacto, GET /respostas)
+#
+#   python -m backend.bench.serializacao [--tamanhos 1,100,1000] [--json]
+# ---------------------------------------------------------------------
+
+
+def _sincrono(coro):
+    """serialize_response não espera nada quando is_coroutine=True: roda a corrotina sem event loop."""
+    try:
+        coro.send(None)
+    except StopIteration as fim:
+        return fim.value
+    raise RuntimeError("corrotina suspensa")
+
+
+def _rota(caminho: str):
+    return next(r for r in servidor.app.routes if getattr(r, "path", None) == caminho)
+
+
+def _antigo(rota, objeto, excluir=None) -> bytes:
+    """
+    O que o FastAPI fazia com o objeto pydantic devolvido pelo endpoint
+    (`excluir`: campos que o schema ganhou depois, ausentes na saída antiga).
+    """
+    conteudo = _sincrono(serialize_response(
+        field=rota.secure_cloned_response_field, response_content=objeto,
+        exclude=excluir, exclude_none=rota.response_model_exclude_none,
+    ))
+    return JSONResponse(conteudo).body
+
+
+def _novo(modelo, corpo: dict, rapido: bool) -> bytes:
+    anterior, servidor.JSON_RAPIDO = servidor.JSON_RAPIDO, rapido
+    try:
+        return servidor._json(modelo, corpo).body
+    finally:
+        servidor.JSON_RAPIDO = anterior
+
+
+def _payloads() -> List[dict]:
+    textos = [t for t, _ in carregar_amostras()]
+    return [servidor._payload(r) for r in classificar_lote(textos)]
+
+
+def _lote(payloads: List[dict], n: int, compacto: bool = False) -> dict:
+    itens = [servidor._item_lote(i, None, payloads[i % len(payloads)], compacto=compacto) for i in range(n)]
+    return {"total": n, "erros": 0, "itens": itens}
+
+
+def _casos(payloads: List[dict], tamanhos: List[int]) -> List[Dict]:
+    """Por resposta: objeto do caminho antigo, dict do novo (normal e compacto), modelo e rota."""
+    casos = [{
+        "caso": "/classify",
+        "antigo": lambda: RespostaClassificacao(**payloads[0]),
+        "corpo": payloads[0],
+        "compacto": servidor._compactar(payloads[0]),
+        "modelo": RespostaClassificacao,
+        "rota": _rota("/classify"),
+        "excluir": None,
+    }]
+    for n in tamanhos:
+        corpo = _lote(payloads, n)
+        casos.append({
+            "caso": f"lote {n}",
+            "antigo": lambda corpo=corpo: RespostaLote(total=corpo["total"], erros=0, itens=[
+                ItemLote(**{k: v for k, v in item.items() if v is not None}) for item in corpo["itens"]
+            ]),
+            "corpo": corpo,
+            "compacto": _lote(payloads, n, compacto=True),
+            "modelo": RespostaLote,
+            "rota": _rota("/classify/batch"),
+            # cluster só sai no lote com AUTOU_SIMILARES (services/similares.py)
+            "excluir": {"itens": {"__all__": {"resposta_id"} if servidor.similares.ATIVO
+                                  else {"resposta_id", "cluster"}}},
+        })
+    return casos
+
+
+def _tempo(fn: Callable[[], object], tempo_max: float) -> float:
+    return medir(fn, repeticoes=200, tempo_max=tempo_max)["p50_ms"]
+
+
+def cpu_e_bytes(payloads: List[dict], tamanhos: List[int], tempo_max: float) -> List[Dict]:
+    linhas = []
+    for c in _casos(payloads, tamanhos):
+        antigo = _antigo(c["rota"], c["antigo"](), c["excluir"])
+        stdlib = _novo(c["modelo"], c["corpo"], rapido=False)
+        linha = {"caso": c["caso"], "paridade": antigo == stdlib}
+        if servidor.HAS_ORJSON:
+            linha["paridade"] = linha["paridade"] and antigo == _novo(c["modelo"], c["corpo"], rapido=True)
+
+        # o caminho antigo montava os objetos pydantic dentro do endpoint: entra na conta
+        linha["antigo_ms"] = _tempo(lambda: _antigo(c["rota"], c["antigo"](), c["excluir"]), tempo_max)
+        linha["stdlib_ms"] = _tempo(lambda: _novo(c["modelo"], c["corpo"], False), tempo_max)
+        if servidor.HAS_ORJSON:
+            linha["orjson_ms"] = _tempo(lambda: _novo(c["modelo"], c["corpo"], True), tempo_max)
+
+        compacto = _novo(c["modelo"], c["compacto"], servidor.HAS_ORJSON)
+        linha["bytes"] = len(antigo)
+        linha["bytes_compacto"] = len(compacto)
+        for nivel in (1, servidor.GZIP_NIVEL, 9):
+            linha[f"gzip{nivel}"] = len(gzip.compress(antigo, compresslevel=nivel))
+            linha[f"gzip{nivel}_ms"] = _tempo(lambda: gzip.compress(antigo, compresslevel=nivel), tempo_max)
+        linha["gzip_compacto"] = len(gzip.compress(compacto, compresslevel=servidor.GZIP_NIVEL))
+        if servidor.HAS_BROTLI:
+            linha["br"] = len(servidor._comprimir(antigo, "br"))
+            linha["br_ms"] = _tempo(lambda: servidor._comprimir(antigo, "br"), tempo_max)
+            linha["br_compacto"] = len(servidor._comprimir(compacto, "br"))
+        linhas.append(linha)
+    return linhas
+
+
+def ponta_a_ponta(n: int = 200) -> Dict:
+    """Via TestClient: compressão negociada, modo compacto e GET /respostas."""
+    from fastapi.testclient import TestClient
+
+    textos = [t for t, _ in carregar_amostras()]
+    lote = [textos[i % len(textos)] for i in range(n)]
+    with TestClient(servidor.app) as cliente:
+        cru = cliente.post("/classify/batch", json=lote, headers={"Accept-Encoding": "identity"})
+        comprimido = cliente.post("/classify/batch", json=lote, headers={"Accept-Encoding": "gzip, br"})
+        compacto = cliente.post("/classify/batch?compacto=1", json=lote, headers={"Accept-Encoding": "identity"})
+        modelos = cliente.get("/respostas").json()
+        unico = cliente.post("/classify?compacto=1", json={"texto": textos[0]}).json()
+    itens = compacto.json()["itens"]
+    ok = (
+        comprimido.json() == cru.json()
+        and comprimido.headers.get("content-encoding") in ("gzip", "br")
+        and "accept-encoding" in comprimido.headers.get("vary", "").lower()
+        # respostas com campos (ex.: nº do protocolo) continuam por extenso no modo compacto
+        and all((modelos[i["resposta_id"]] if "resposta_id" in i else i["resposta_sugerida"]) == j["resposta_sugerida"]
+                for i, j in zip(itens, cru.json()["itens"]))
+        and (unico["resposta_id"] in modelos if "resposta_id" in unico
+             else unico["resposta_sugerida"] not in modelos.values())
+    )
+    return {
+        "itens": n,
+        "ok": ok,
+        "content_encoding": comprimido.headers.get("content-encoding"),
+        "bytes": len(cru.content),
+        "bytes_compacto": len(compacto.content),
+        "bytes_na_rede": int(comprimido.headers.get("content-length", 0)),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serialização e bytes das respostas: pydantic x orjson, gzip x brotli.")
+    ap.add_argument("--tamanhos", default="1,100,1000", help="itens por resposta de lote")
+    ap.add_argument("--tempo-max", type=float, default=3.0, help="segundos por medição")
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    payloads = _payloads()
+    resultado = {
+        "orjson": servidor.HAS_ORJSON,
+        "brotli": servidor.HAS_BROTLI,
+        "casos": cpu_e_bytes(payloads, [int(n) for n in args.tamanhos.split(",")], args.tempo_max),
+        "ponta_a_ponta": ponta_a_ponta(),
+    }
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    else:
+        print(f"orjson: {'sim' if resultado['orjson'] else 'não'} | brotli: {'sim' if resultado['brotli'] else 'não'}")
+        print(f"\n{'resposta':>10}{'antigo':>10}{'stdlib':>10}{'orjson':>10}{'ganho':>7}{'paridade':>10}")
+        for l in resultado["casos"]:
+            rapido = l.get("orjson_ms", l["stdlib_ms"])
+            print(f"{l['caso']:>10}{l['antigo_ms']:>8.3f}ms{l['stdlib_ms']:>8.3f}ms"
+                  f"{l.get('orjson_ms', float('nan')):>8.3f}ms{l['antigo_ms'] / max(rapido, 1e-9):>6.1f}x"
+                  f"{'ok' if l['paridade'] else 'DIFERENTE':>10}")
+        g = servidor.GZIP_NIVEL
+        print(f"\n{'resposta':>10}{'JSON':>10}{'compacto':>10}{'gzip1':>9}{f'gzip{g}':>9}{'gzip9':>9}"
+              f"{'br':>9}{f'compacto+gzip{g}':>17}{'ms gzip' + str(g):>10}{'ms br':>8}")
+        for l in resultado["casos"]:
+            print(f"{l['caso']:>10}{l['bytes']:>10}{l['bytes_compacto']:>10}{l['gzip1']:>9}{l[f'gzip{g}']:>9}"
+                  f"{l['gzip9']:>9}{l.get('br', '-'):>9}{l['gzip_compacto']:>17}{l[f'gzip{g}_ms']:>10.3f}"
+                  f"{l.get('br_ms', float('nan')):>8.3f}")
+        e = resultado["ponta_a_ponta"]
+        print(f"\nponta a ponta ({e['itens']} itens): {'ok' if e['ok'] else 'FALHOU'} — {e['bytes']} B JSON, "
+              f"{e['bytes_compacto']} B compacto, {e['bytes_na_rede']} B com {e['content_encoding']}")
+    # quebra de paridade reprova o bench (CI): código de saída 1
+    falhas = [l["caso"] for l in resultado["casos"] if not l["paridade"]]
+    if not resultado["ponta_a_ponta"]["ok"]:
+        falhas.append("ponta a ponta")
+    if falhas:
+        print(f"paridade quebrada: {', '.join(falhas)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
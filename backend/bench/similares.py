@@ -0,0 +1,129 @@
+import argparse
+import json
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from backend.bench.corpus import gerar_texto, gerar_threads
+from backend.bench.medicao import medir, percentil
+from backend.services import similares
+from backend.services.classifier import classificar_e_sugerir, impressao_modelo
+
+# ---------------------------------------------------------------------
+# Índice de quase-duplicatas (services/similares.py, AUTOU_SIMILARES) num
+# corpus sintético de threads (respostas citadas, encaminhamentos,
+# reenvios, notificações que só mudam o nº do chamado):
+#   - custo da assinatura MinHash por tamanho de texto e da consulta
+#     ao índice cheio (p50/p99)
+#   - por limiar: taxa de acerto (vereditos reaproveitados), recall
+#     (entre os emails cuja família já tinha passado), pureza (o vizinho é
+#     da mesma família) e concordância com classificar o texto inteiro
+#     (categoria e resposta sugerida)
+#   - tempo por email: sempre classificar x índice + classificar os misses
+#   - memória limitada: com --itens pequeno, evictions e queda do acerto
+#
+#   python -m backend.bench.similares [--emails 5000] [--limiares 0.7,0.85,0.95] [--itens 20000] [--json]
+# ---------------------------------------------------------------------
+
+
+def custos(tempo_max: float) -> Dict[str, float]:
+    """Assinatura por tamanho de texto (p50, ms)."""
+    return {
+        f"assinatura_{n}_ms": medir(lambda t=gerar_texto(n): similares.assinatura(t), repeticoes=500,
+                                     tempo_max=tempo_max)["p50_ms"]
+        for n in (200, 2000, 20000)
+    }
+
+
+def _referencia(corpus: List[Tuple[str, str]]) -> Tuple[List[tuple], float]:
+    """Veredito de classificar cada email inteiro (o que o servidor faz sem o índice) e o tempo total."""
+    classificar_e_sugerir(corpus[0][0])  # carrega o modelo fora da conta
+    t0 = time.perf_counter()
+    ref = [classificar_e_sugerir(t) for t, _ in corpus]
+    return ref, time.perf_counter() - t0
+
+
+def simular(corpus: List[Tuple[str, str]], ref: List[tuple], limiar: float, max_itens: int) -> Dict:
+    """Passa o corpus pelo índice na ordem de chegada, como o /classify (miss → classifica e indexa)."""
+    indice = similares.IndiceSimilares(limiar, max_itens, similares.BANDAS)
+    impressao = impressao_modelo()
+    vistas = set()
+    consultas: List[float] = []
+    c = Counter()
+    t0 = time.perf_counter()
+    for (texto, familia), (categoria, confianca, resposta, origem) in zip(corpus, ref):
+        sig = similares.assinatura(texto)
+        tc = time.perf_counter()
+        achado = indice.buscar(sig, impressao)
+        consultas.append(time.perf_counter() - tc)
+        valor = similares.adaptar(achado[1], texto) if achado is not None else None
+        if sig is None:
+            c["curtos"] += 1
+        elif familia in vistas:
+            c["repetidos"] += 1
+        if valor is None:
+            valor = dict(zip(("categoria", "confianca", "resposta_sugerida", "origem"),
+                             classificar_e_sugerir(texto)))
+            valor["familia"] = familia
+            indice.guardar(sig, impressao, valor)
+        else:
+            c["hits"] += 1
+            c["hits_repetidos"] += familia in vistas
+            c["mesma_familia"] += valor["familia"] == familia
+            c["mesma_categoria"] += valor["categoria"] == categoria
+            c["mesma_resposta"] += valor["resposta_sugerida"] == resposta
+        if sig is not None:
+            vistas.add(familia)
+    total = time.perf_counter() - t0
+    hits = c["hits"] or 1
+    return {
+        "limiar": limiar,
+        "taxa_acerto": round(c["hits"] / len(corpus), 4),
+        "recall": round(c["hits_repetidos"] / (c["repetidos"] or 1), 4),
+        "pureza": round(c["mesma_familia"] / hits, 4),
+        "concorda_categoria": round(c["mesma_categoria"] / hits, 4),
+        "concorda_resposta": round(c["mesma_resposta"] / hits, 4),
+        "curtos": c["curtos"],
+        "consulta_p50_us": round(percentil(consultas, 50) * 1e6, 1),
+        "consulta_p99_us": round(percentil(consultas, 99) * 1e6, 1),
+        "ms_por_email": round(total / len(corpus) * 1000, 4),
+        "itens": len(indice._itens),
+        "evictions": indice.evictions,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Índice de quase-duplicatas: custo, acerto e concordância em threads sintéticas.")
+    ap.add_argument("--emails", type=int, default=5000, help="emails no corpus sintético")
+    ap.add_argument("--familias", type=int, default=40, help="conteúdos distintos (corpos) no corpus")
+    ap.add_argument("--limiares", default="0.7,0.85,0.95", help="similaridades mínimas a comparar")
+    ap.add_argument("--itens", type=int, default=20000, help="máx. assinaturas no índice (LRU)")
+    ap.add_argument("--tempo-max", type=float, default=2.0, help="segundos por medição de custo")
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    corpus = gerar_threads(args.emails, args.familias)
+    ref, tempo_ref = _referencia(corpus)
+    resultado = {
+        "emails": len(corpus),
+        "custos": custos(args.tempo_max),
+        "sem_indice_ms_por_email": round(tempo_ref / len(corpus) * 1000, 4),
+        "limiares": [simular(corpus, ref, float(l), args.itens) for l in args.limiares.split(",")],
+    }
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+    c = resultado["custos"]
+    print(f"{resultado['emails']} emails | assinatura p50: 200 chars {c['assinatura_200_ms']:.3f} ms, "
+          f"2k {c['assinatura_2000_ms']:.3f} ms, 20k {c['assinatura_20000_ms']:.3f} ms")
+    print(f"sem índice: {resultado['sem_indice_ms_por_email']:.3f} ms/email\n")
+    print(f"{'limiar':>7}{'acerto':>8}{'recall':>8}{'pureza':>8}{'categoria':>11}{'resposta':>10}"
+          f"{'busca p50':>11}{'p99':>9}{'ms/email':>10}{'itens':>7}{'evict':>7}")
+    for l in resultado["limiares"]:
+        print(f"{l['limiar']:>7.2f}{l['taxa_acerto']:>8.1%}{l['recall']:>8.1%}{l['pureza']:>8.1%}"
+              f"{l['concorda_categoria']:>11.1%}{l['concorda_resposta']:>10.1%}{l['consulta_p50_us']:>9.1f}µs"
+              f"{l['consulta_p99_us']:>7.1f}µs{l['ms_por_email']:>10.3f}{l['itens']:>7}{l['evictions']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Cache de resultados desligado: o benchmark mede o pipeline, não o acerto do cache
+os.environ.setdefault("AUTOU_CACHE", "0")
+
+from backend.bench.corpus import gerar_eml_tamanho, gerar_pdf_tamanho, gerar_texto
+from backend.bench.medicao import medir
+from backend.services.classifier import _com_modelo_local, _pontuar, classificar_e_sugerir
+from backend.services.eml_reader import extract_text_from_eml
+from backend.services.pdf_reader import extract_text_from_pdf
+
+# ---------------------------------------------------------------------
+# Suíte de benchmark do pipeline de classificação.
+#
+# Mede cada estágio isolado (extração PDF/EML, _pontuar, _com_modelo_local,
+# classificar_e_sugerir) e o caminho completo via TestClient do FastAPI,
+# com corpora sintéticos do samples.csv (de uma linha até 5 MB).
+# Saída: JSON com p50/p95/p99, req/s e pico de RSS por caso, mais o perfil
+# de partida (import do backend.app e tempo até o 1º /classify num uvicorn
+# novo — ver bench/partida.py; --sem-partida pula).
+#
+#   python -m backend.bench.suite                      # completo
+#   python -m backend.bench.suite --rapido             # subset p/ CI
+#   python -m backend.bench.suite --gravar-baseline    # salva a referência
+#   python -m backend.bench.suite --rapido --ci        # CI: sem baseline = falha
+#
+# Se existir baseline (padrão: backend/bench/baseline.json), compara e
+# termina com código 1 quando algum caso piora além da tolerância.
+# A baseline é específica da máquina (por isso não vem no repositório):
+# grave-a no mesmo hardware do CI. Sem ela, nada é comparado — aviso no
+# stderr e, com --ci, código 1.
+# ---------------------------------------------------------------------
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+KB, MB = 1024, 1024 * 1024
+TAMANHOS_TEXTO = {"linha": 80, "1kb": KB, "100kb": 100 * KB, "1mb": MB, "5mb": 5 * MB - 64 * KB}
+TAMANHOS_ARQUIVO = {"10kb": 10 * KB, "1mb": MB, "5mb": 5 * MB - 64 * KB}
+RAPIDO_TEXTO = ("linha", "1kb", "100kb")
+RAPIDO_ARQUIVO = ("10kb", "1mb")
+
+Caso = Tuple[str, Callable[[], object]]
+
+
+def casos_estagios(rapido: bool) -> List[Caso]:
+    casos: List[Caso] = []
+    for nome, tam in TAMANHOS_TEXTO.items():
+        if rapido and nome not in RAPIDO_TEXTO:
+            continue
+        texto = gerar_texto(tam)
+        casos += [
+            (f"_pontuar/{nome}", lambda t=texto: _pontuar(t)),
+            (f"_com_modelo_local/{nome}", lambda t=texto: _com_modelo_local(t)),
+            (f"classificar_e_sugerir/{nome}", lambda t=texto: classificar_e_sugerir(t)),
+        ]
+    for nome, tam in TAMANHOS_ARQUIVO.items():
+        if rapido and nome not in RAPIDO_ARQUIVO:
+            continue
+        pdf, eml = gerar_pdf_tamanho(tam), gerar_eml_tamanho(tam)
+        casos += [
+            (f"extract_text_from_pdf/{nome}", lambda b=pdf: extract_text_from_pdf(b)),
+            (f"extract_text_from_eml/{nome}", lambda b=eml: extract_text_from_eml(b)),
+        ]
+    return casos
+
+
+def casos_ponta_a_ponta(cliente, rapido: bool) -> List[Caso]:
+    def post_ok(**kwargs):
+        r = cliente.post("/classify", **kwargs)
+        if r.status_code != 200:
+            raise RuntimeError(f"/classify respondeu {r.status_code}: {r.text[:200]}")
+        return r
+
+    casos: List[Caso] = []
+    for nome, tam in TAMANHOS_TEXTO.items():
+        if (rapido and nome not in RAPIDO_TEXTO) or tam > MB:
+            continue  # JSON acima de 1 MB passa do limite do /classify
+        texto = gerar_texto(tam)
+        casos.append((f"e2e.texto/{nome}", lambda t=texto: post_ok(json={"texto": t})))
+    for nome, tam in TAMANHOS_ARQUIVO.items():
+        if rapido and nome not in RAPIDO_ARQUIVO:
+            continue
+        pdf, eml = gerar_pdf_tamanho(tam), gerar_eml_tamanho(tam)
+        casos += [
+            (f"e2e.pdf/{nome}", lambda b=pdf: post_ok(files={"arquivo": ("a.pdf", b, "application/pdf")})),
+            (f"e2e.eml/{nome}", lambda b=eml: post_ok(files={"arquivo": ("a.eml", b, "message/rfc822")})),
+        ]
+    lote = [gerar_texto(KB, seed) for seed in range(100)]
+    casos.append(("e2e.batch/100x1kb", lambda: cliente.post("/classify/batch", json=lote)))
+    return casos
+
+
+def comparar(atual: Dict, baseline: Dict, tolerancia: float) -> List[str]:
+    """Lista legível das regressões (latência p95, req/s, RSS, partida) acima da tolerância."""
+    regressoes = []
+    partida, ref_partida = atual.get("partida"), baseline.get("partida")
+    if partida and ref_partida:
+        for nome, chave in (("import backend.app", "import_ms"), ("1º /classify", "primeira_classificacao_s")):
+            if ref_partida[chave] > 0 and partida[chave] > ref_partida[chave] * (1 + tolerancia):
+                regressoes.append(f"partida: {nome} {ref_partida[chave]} -> {partida[chave]}")
+    for nome, ref in baseline.get("casos", {}).items():
+        novo = atual["casos"].get(nome)
+        if novo is None:
+            continue
+        if ref["p95_ms"] > 0 and novo["p95_ms"] > ref["p95_ms"] * (1 + tolerancia):
+            regressoes.append(f"{nome}: p95 {ref['p95_ms']}ms -> {novo['p95_ms']}ms")
+        if ref["rps"] > 0 and novo["rps"] < ref["rps"] * (1 - tolerancia):
+            regressoes.append(f"{nome}: req/s {ref['rps']} -> {novo['rps']}")
+        if ref["rss_pico_mb"] > 0 and novo["rss_pico_mb"] > ref["rss_pico_mb"] * (1 + tolerancia):
+            regressoes.append(f"{nome}: RSS {ref['rss_pico_mb']}MB -> {novo['rss_pico_mb']}MB")
+    return regressoes
+
+
+def medir_partida() -> Dict:
+    """Resumo do bench/partida com AUTOU_AQUECER padrão."""
+    from backend.bench.partida import partida_servidor, perfil_import
+
+    imp = perfil_import()
+    srv = partida_servidor("1", {})
+    partida = {
+        "import_ms": imp["total_ms"],
+        "pesados_no_import": imp["pesados_carregados"],
+        "primeira_classificacao_s": srv["primeira_classificacao_s"],
+        "aquecimento_s": srv["servidor"].get("aquecimento"),
+    }
+    print(f"{'partida':<36} import {partida['import_ms']:.0f}ms  1º /classify em "
+          f"{partida['primeira_classificacao_s']:.2f}s", file=sys.stderr)
+    return partida
+
+
+def rodar(rapido: bool, filtro: str, repeticoes: int, tempo_max: float) -> Dict:
+    from fastapi.testclient import TestClient
+    from backend.app import app
+
+    resultado = {
+        "meta": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "executor": os.getenv("AUTOU_EXECUTOR", "thread"),
+            "rapido": rapido,
+            "quando": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "casos": {},
+    }
+
+    with TestClient(app) as cliente:
+        for nome, fn in casos_estagios(rapido) + casos_ponta_a_ponta(cliente, rapido):
+            if filtro and filtro not in nome:
+                continue
+            resultado["casos"][nome] = medir(fn, repeticoes=repeticoes, tempo_max=tempo_max)
+            r = resultado["casos"][nome]
+            print(f"{nome:<36} p50 {r['p50_ms']:>10.2f}ms  p95 {r['p95_ms']:>10.2f}ms  "
+                  f"p99 {r['p99_ms']:>10.2f}ms  {r['rps']:>9.1f} req/s  RSS {r['rss_pico_mb']:>7.1f}MB",
+                  file=sys.stderr)
+    return resultado
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de latência/throughput do pipeline /classify.")
+    ap.add_argument("--rapido", action="store_true", help="subset menor (CI)")
+    ap.add_argument("--filtro", default="", help="só casos cujo nome contém o texto")
+    ap.add_argument("--repeticoes", type=int, default=None)
+    ap.add_argument("--tempo-max", type=float, default=None, help="segundos por caso")
+    ap.add_argument("--saida", help="grava o JSON neste arquivo (padrão: stdout)")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--tolerancia", type=float, default=0.25, help="piora aceitável (0.25 = 25%%)")
+    ap.add_argument("--gravar-baseline", action="store_true")
+    ap.add_argument("--ci", action="store_true", help="falha (código 1) se a baseline não existir")
+    ap.add_argument("--sem-partida", action="store_true", help="não mede a partida de um uvicorn novo")
+    args = ap.parse_args()
+
+    repeticoes = args.repeticoes or (10 if args.rapido else 50)
+    tempo_max = args.tempo_max or (1.0 if args.rapido else 5.0)
+    resultado = rodar(args.rapido, args.filtro, repeticoes, tempo_max)
+    if not args.sem_partida:
+        resultado["partida"] = medir_partida()
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(saida, encoding="utf-8")
+    else:
+        print(saida)
+
+    baseline = Path(args.baseline)
+    if args.gravar_baseline:
+        baseline.write_text(saida, encoding="utf-8")
+        print(f"Baseline gravada em {baseline}", file=sys.stderr)
+        return
+    if not baseline.exists():
+        print(f"\n⚠️  Baseline {baseline} não encontrada: nada foi comparado. "
+              "Grave uma com --gravar-baseline nesta máquina.", file=sys.stderr)
+        if args.ci:
+            raise SystemExit(1)
+        return
+    regressoes = comparar(resultado, json.loads(baseline.read_text(encoding="utf-8")), args.tolerancia)
+    if regressoes:
+        print("\n❌ REGRESSÕES em relação à baseline:", file=sys.stderr)
+        for r in regressoes:
+            print(f"  - {r}", file=sys.stderr)
+        raise SystemExit(1)
+    print("\n✅ Sem regressões em relação à baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import json
+import tracemalloc
+from tempfile import SpooledTemporaryFile
+
+from fastapi import HTTPException
+from starlette.datastructures import UploadFile
+
+from backend.app import MAX_BYTES, _extrair_conteudo, _ler_upload
+from backend.bench.corpus import gerar_eml_tamanho, gerar_pdf_tamanho, gerar_texto
+from backend.services.eml_reader import extract_text_from_eml
+from backend.services.pdf_reader import extract_text_from_pdf
+
+# ---------------------------------------------------------------------
+# Pico de memória por requisição ao tratar anexos de ~5 MB:
+#   legado    → `data = await arquivo.read()` + parsers sobre `bytes`
+#               (o caminho antigo do /classify)
+#   streaming → `_ler_upload` (blocos + rejeição antecipada) + parsers
+#               lendo do arquivo temporário do upload
+# Mede com tracemalloc só o tratamento no handler; o parse do multipart
+# pelo Starlette é o mesmo nos dois casos.
+#   python -m backend.bench.upload_memoria [--json]
+# ---------------------------------------------------------------------
+
+SPOOL_MAX = 1024 * 1024  # mesmo limite do Starlette para rolar para disco
+
+
+def _upload(nome: str, dados: bytes, informar_tamanho: bool = True) -> UploadFile:
+    f = SpooledTemporaryFile(max_size=SPOOL_MAX)
+    f.write(dados)
+    f.seek(0)
+    return UploadFile(f, size=len(dados) if informar_tamanho else None, filename=nome)
+
+
+async def _legado(arquivo: UploadFile) -> int:
+    data = await arquivo.read()
+    if len(data) > MAX_BYTES:
+        raise HTTPException(status_code=413)
+    if arquivo.filename.endswith(".pdf"):
+        return len(extract_text_from_pdf(data))
+    if arquivo.filename.endswith(".eml"):
+        return len(extract_text_from_eml(data))
+    return len(data.decode("utf-8", errors="ignore"))
+
+
+async def _streaming(arquivo: UploadFile) -> int:
+    await _ler_upload(arquivo)
+    return len(await _extrair_conteudo(arquivo.filename, arquivo.file))
+
+
+def _pico(fn, arquivo: UploadFile) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        asyncio.run(fn(arquivo))
+    except HTTPException:
+        pass
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pico de memória de uploads de ~5 MB.")
+    ap.add_argument("--json", action="store_true", help="saída em JSON")
+    args = ap.parse_args()
+
+    tamanho = MAX_BYTES - 64 * 1024
+    casos = {
+        "txt_5mb": ("a.txt", gerar_texto(tamanho).encode("utf-8")[:tamanho], True),
+        "pdf_5mb": ("a.pdf", gerar_pdf_tamanho(tamanho), True),
+        "eml_5mb": ("a.eml", gerar_eml_tamanho(tamanho), True),
+        "txt_6mb_rejeitado": ("a.txt", b"x" * (6 * 1024 * 1024), True),
+        "txt_6mb_rejeitado_sem_tamanho": ("a.txt", b"x" * (6 * 1024 * 1024), False),
+    }
+
+    resultado = {}
+    for caso, (nome, dados, informar) in casos.items():
+        resultado[caso] = {
+            "bytes": len(dados),
+            "pico_legado": _pico(_legado, _upload(nome, dados, informar)),
+            "pico_streaming": _pico(_streaming, _upload(nome, dados, informar)),
+        }
+
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+        return
+    print(f"{'caso':<32}{'upload':>10}{'legado':>12}{'streaming':>12}")
+    for caso, r in resultado.items():
+        print(f"{caso:<32}{r['bytes'] / 2**20:>8.1f}MB"
+              f"{r['pico_legado'] / 2**20:>10.1f}MB{r['pico_streaming'] / 2**20:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
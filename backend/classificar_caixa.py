@@ -0,0 +1,277 @@
+import argparse
+import csv
+import json
+import mailbox
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+from .services.classifier import aquecer_modelo, classificar_lote
+from .services.eml_reader import extract_text_from_eml
+from .services.pdf_reader import extract_text_from_pdf
+
+# ==========================
+# 📬 Classificação de caixas de email inteiras (linha de comando)
+# ==========================
+# Lê mensagens de um mbox, de um Maildir ou de uma pasta com .eml/.pdf/.txt,
+# distribui extração + classificação num pool de processos (lotes de
+# mensagens, uma chamada vetorizada do modelo por lote) e grava cada
+# resultado assim que fica pronto, em JSONL ou CSV.
+#
+#   python -m backend.classificar_caixa caixa.mbox -o resultado.jsonl
+#   python -m backend.classificar_caixa ~/Maildir -o resultado.csv --processos 8
+#   python -m backend.classificar_caixa pasta/ -o resultado.jsonl --retomar
+#
+# Memória limitada: no máximo `--janela` lotes em voo (lidos e ainda não
+# gravados). --retomar pula as mensagens que já estão no arquivo de saída
+# (o próprio arquivo é o checkpoint; uma linha cortada no fim é descartada).
+
+EXTENSOES = (".eml", ".pdf", ".txt")
+MAX_BYTES = 5 * 1024 * 1024  # mesmo limite do /classify
+CAMPOS = ["id", "tipo", "categoria", "confianca", "origem", "resposta_sugerida", "erro"]
+
+# (id, tipo, conteúdo): bytes da mensagem (mbox/Maildir) ou caminho do arquivo
+Item = Tuple[str, str, Union[bytes, Path]]
+
+
+# ==========================
+# Fontes
+# ==========================
+def _itens_caixa(caixa: mailbox.Mailbox, por_indice: bool) -> Iterator[Item]:
+    """mbox: id = "#<posição>" (estável em mbox só com append); Maildir: id = nome da mensagem."""
+    try:
+        for i, chave in enumerate(caixa.iterkeys()):
+            yield (f"#{i}" if por_indice else str(chave)), ".eml", caixa.get_bytes(chave)
+    finally:
+        caixa.close()
+
+
+def _itens_pasta(raiz: Path) -> Iterator[Item]:
+    for dirpath, dirnames, arquivos in os.walk(raiz):
+        dirnames.sort()
+        for nome in sorted(arquivos):
+            ext = os.path.splitext(nome)[1].lower()
+            if ext in EXTENSOES:
+                caminho = Path(dirpath) / nome
+                yield caminho.relative_to(raiz).as_posix(), ext, caminho
+
+
+def abrir_fonte(caminho: Path) -> Iterator[Item]:
+    """Detecta o formato: Maildir (cur/new/tmp), pasta de arquivos, arquivo solto ou mbox."""
+    if caminho.is_dir():
+        if all((caminho / sub).is_dir() for sub in ("cur", "new", "tmp")):
+            return _itens_caixa(mailbox.Maildir(caminho, factory=None, create=False), por_indice=False)
+        return _itens_pasta(caminho)
+    ext = caminho.suffix.lower()
+    if ext in EXTENSOES:
+        return iter([(caminho.name, ext, caminho)])
+    return _itens_caixa(mailbox.mbox(caminho, factory=None, create=False), por_indice=True)
+
+
+# ==========================
+# Trabalho de cada processo
+# ==========================
+def _extrair(tipo: str, conteudo: Union[bytes, Path]) -> str:
+    if isinstance(conteudo, Path):
+        if conteudo.stat().st_size > MAX_BYTES:
+            raise ValueError("Arquivo muito grande (máx. 5MB).")
+        with open(conteudo, "rb") as f:
+            return _extrair_de(tipo, f)
+    return _extrair_de(tipo, conteudo)
+
+
+def _extrair_de(tipo: str, fonte: Union[bytes, IO[bytes]]) -> str:
+    if tipo == ".pdf":
+        return extract_text_from_pdf(fonte)
+    if tipo == ".eml":
+        return extract_text_from_eml(fonte)
+    dados = fonte if isinstance(fonte, bytes) else fonte.read()
+    return dados.decode("utf-8", errors="ignore")
+
+
+def processar_lote(itens: List[Item]) -> List[Dict]:
+    """Extrai o texto de cada item e classifica o lote com uma chamada só do modelo."""
+    saida: List[Dict] = []
+    ok: List[Tuple[Dict, str]] = []
+    for id_, tipo, conteudo in itens:
+        linha = {"id": id_, "tipo": tipo}
+        try:
+            ok.append((linha, _extrair(tipo, conteudo).strip()))
+        except Exception as e:
+            linha["erro"] = f"Falha ao ler {tipo}: {e}"
+        saida.append(linha)
+
+    try:
+        resultados = classificar_lote([texto for _, texto in ok]) if ok else []
+    except Exception as e:
+        # falha do modelo não derruba a execução: o lote sai marcado com erro
+        traceback.print_exc()
+        for linha, _ in ok:
+            linha["erro"] = f"Falha ao classificar: {e}"
+        return saida
+    for (linha, _), (categoria, confianca, resposta, origem) in zip(ok, resultados):
+        linha.update(categoria=categoria, confianca=round(float(confianca), 4),
+                     origem=origem, resposta_sugerida=resposta)
+    return saida
+
+
+# ==========================
+# Saída incremental + checkpoint
+# ==========================
+class Saida:
+    """Grava JSONL ou CSV linha a linha; com `retomar`, devolve os ids já gravados."""
+
+    def __init__(self, caminho: Path, formato: str, retomar: bool):
+        self.formato = formato
+        self.feitos: Set[str] = set()
+        existe = retomar and caminho.exists() and caminho.stat().st_size > 0
+        if existe:
+            self._truncar_linha_cortada(caminho)
+            self.feitos = self._ids_gravados(caminho)
+        self._f: IO[str] = open(caminho, "a" if existe else "w", encoding="utf-8", newline="")
+        self._csv = csv.DictWriter(self._f, fieldnames=CAMPOS, extrasaction="ignore") if formato == "csv" else None
+        if self._csv is not None and not existe:
+            self._csv.writeheader()
+
+    @staticmethod
+    def _truncar_linha_cortada(caminho: Path):
+        """Execução interrompida no meio de uma escrita: descarta o pedaço final sem '\\n'."""
+        with open(caminho, "rb+") as f:
+            fim = f.seek(0, os.SEEK_END)
+            pos = fim
+            while pos > 0:  # procura o último '\n' lendo blocos do fim para o começo
+                inicio = max(0, pos - 65536)
+                f.seek(inicio)
+                bloco = f.read(pos - inicio)
+                if pos == fim and bloco.endswith(b"\n"):
+                    return
+                i = bloco.rfind(b"\n")
+                if i >= 0:
+                    f.truncate(inicio + i + 1)
+                    return
+                pos = inicio
+            f.truncate(0)
+
+    def _ids_gravados(self, caminho: Path) -> Set[str]:
+        with open(caminho, encoding="utf-8", newline="") as f:
+            if self.formato == "csv":
+                return {linha["id"] for linha in csv.DictReader(f) if linha.get("id")}
+            ids = set()
+            for linha in f:
+                try:
+                    ids.add(json.loads(linha)["id"])
+                except (ValueError, KeyError):
+                    continue
+            return ids
+
+    def gravar(self, linhas: Iterable[Dict]):
+        for linha in linhas:
+            if self._csv is not None:
+                self._csv.writerow(linha)
+            else:
+                self._f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+        self._f.flush()
+
+    def fechar(self):
+        self._f.close()
+
+
+# ==========================
+# Orquestração
+# ==========================
+def _em_lotes(itens: Iterable[Item], tamanho: int) -> Iterator[List[Item]]:
+    lote: List[Item] = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def classificar_caixa(fonte: Path, saida: Saida, processos: int, lote: int, janela: int,
+                      progresso: float = 5.0) -> Dict[str, float]:
+    """Processa a fonte inteira; devolve contadores (total, erros, pulados, msg/s)."""
+    cont = {"processadas": 0, "erros": 0, "puladas": 0}
+    inicio = ultimo_aviso = time.perf_counter()
+
+    def pendentes_da_fonte() -> Iterator[Item]:
+        for item in abrir_fonte(fonte):
+            if item[0] in saida.feitos:
+                cont["puladas"] += 1
+                continue
+            if isinstance(item[2], bytes) and len(item[2]) > MAX_BYTES:
+                cont["processadas"] += 1
+                cont["erros"] += 1
+                saida.gravar([{"id": item[0], "tipo": item[1], "erro": "Mensagem muito grande (máx. 5MB)."}])
+                continue
+            yield item
+
+    def registrar(linhas: List[Dict]):
+        nonlocal ultimo_aviso
+        saida.gravar(linhas)
+        cont["processadas"] += len(linhas)
+        cont["erros"] += sum(1 for l in linhas if l.get("erro"))
+        agora = time.perf_counter()
+        if progresso and agora - ultimo_aviso >= progresso:
+            ultimo_aviso = agora
+            print(f"… {cont['processadas']} mensagens ({cont['processadas'] / (agora - inicio):.1f} msg/s)",
+                  file=sys.stderr)
+
+    if processos <= 0:
+        aquecer_modelo()
+        for itens in _em_lotes(pendentes_da_fonte(), lote):
+            registrar(processar_lote(itens))
+    else:
+        # spawn: mesmo motivo do executor do servidor; cada processo carrega o modelo uma vez
+        with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=aquecer_modelo) as pool:
+            em_voo = set()
+            for itens in _em_lotes(pendentes_da_fonte(), lote):
+                if len(em_voo) >= janela:
+                    prontos, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        registrar(futuro.result())
+                em_voo.add(pool.submit(processar_lote, itens))
+            for futuro in wait(em_voo).done:
+                registrar(futuro.result())
+
+    duracao = time.perf_counter() - inicio
+    cont["segundos"] = round(duracao, 2)
+    cont["msg_por_s"] = round(cont["processadas"] / duracao, 1) if duracao > 0 else 0.0
+    return cont
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Classifica um mbox, Maildir ou pasta de .eml/.pdf/.txt.")
+    ap.add_argument("fonte", type=Path, help="arquivo mbox, pasta Maildir ou pasta com arquivos")
+    ap.add_argument("-o", "--saida", type=Path, required=True, help="arquivo .jsonl ou .csv")
+    ap.add_argument("--formato", choices=("jsonl", "csv"), help="padrão: pela extensão da saída")
+    ap.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="0 = sem pool (mesmo processo)")
+    ap.add_argument("--lote", type=int, default=32, help="mensagens por tarefa do pool")
+    ap.add_argument("--janela", type=int, default=0, help="máx. lotes em voo (padrão: 2x processos)")
+    ap.add_argument("--retomar", action="store_true", help="pula mensagens já gravadas na saída")
+    args = ap.parse_args()
+
+    if not args.fonte.exists():
+        ap.error(f"fonte não encontrada: {args.fonte}")
+    formato = args.formato or ("csv" if args.saida.suffix.lower() == ".csv" else "jsonl")
+    janela = args.janela or 2 * max(1, args.processos)
+
+    saida = Saida(args.saida, formato, args.retomar)
+    try:
+        cont = classificar_caixa(args.fonte, saida, args.processos, max(1, args.lote), janela)
+    finally:
+        saida.fechar()
+    print(f"✅ {cont['processadas']} mensagens em {cont['segundos']}s ({cont['msg_por_s']} msg/s), "
+          f"{cont['erros']} com erro, {cont['puladas']} já feitas → {args.saida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
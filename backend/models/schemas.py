@@ -1,7 +1,40 @@
+from typing import List, Optional
 from pydantic import BaseModel
 
 class RespostaClassificacao(BaseModel):
     categoria: str        # Produtivo | Improdutivo
     confianca: float
-    resposta_sugerida: str
-    origem: str           # "modelo" | "heuristica"
\ No newline at end of file
+    resposta_sugerida: Optional[str] = None  # ausente no modo compacto (?compacto=1)
+    resposta_id: Optional[str] = None        # só no modo compacto: id da resposta padrão (GET /respostas)
+    origem: str           # "modelo" | "cascata" (modelo pulado) | "heuristica" (fallback)
+    paginas_lidas: Optional[int] = None  # só para PDF: páginas efetivamente lidas
+    cluster: Optional[str] = None        # grupo de quase-duplicatas (AUTOU_SIMILARES=1)
+
+class ItemLote(BaseModel):
+    indice: int                          # posição do item na entrada
+    arquivo: Optional[str] = None        # nome do arquivo (multipart)
+    categoria: Optional[str] = None      # ausente quando houve erro no item
+    confianca: Optional[float] = None
+    resposta_sugerida: Optional[str] = None
+    resposta_id: Optional[str] = None    # só no modo compacto
+    origem: Optional[str] = None
+    paginas_lidas: Optional[int] = None
+    erro: Optional[str] = None           # erro só deste item (não derruba o lote)
+    cluster: Optional[str] = None        # grupo de quase-duplicatas (só com AUTOU_SIMILARES=1)
+
+class RespostaLote(BaseModel):
+    total: int
+    erros: int
+    itens: List[ItemLote]
+
+class RespostaJob(BaseModel):
+    id: str
+    estado: str                          # pendente | processando | concluido | erro
+    tipo: str                            # texto | .txt | .pdf | .eml | outro
+    criado_em: float                     # timestamps Unix
+    iniciado_em: Optional[float] = None
+    concluido_em: Optional[float] = None
+    resultado: Optional[RespostaClassificacao] = None  # quando concluido
+    erro: Optional[str] = None                         # quando erro
+    callback_url: Optional[str] = None
+    callback_estado: Optional[str] = None  # pendente | enviado | falhou: ...
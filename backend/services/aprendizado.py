@@ -0,0 +1,270 @@
+import csv
+import io
+import json
+import os
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import fcntl  # trava entre processos (workers do uvicorn); não existe no Windows
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+# ---------------------------------------------------------------------
+# Aprendizado incremental a partir das correções dos revisores.
+#
+#   POST /feedback → uma linha (text,label) anexada em data/feedback.csv
+#   atualizar()    → lê só as linhas novas (offset guardado), faz
+#                    partial_fit num mini-lote e publica o modelo
+#
+# O modelo online é HashingVectorizer + SGDClassifier(log_loss): o
+# vetorizador não tem vocabulário para reajustar, então o custo de cada
+# atualização depende só do tamanho do mini-lote (e do nº fixo de
+# features), não do tamanho do corpus acumulado.
+#
+# Publicação: o Pipeline vai para data/model_online.pkl (arquivo temporário
+# + rename atômico, como o train_classifier). Para servir esse modelo,
+# AUTOU_MODELO=backend/data/model_online.pkl; o processo que aprendeu
+# recarrega na hora e os demais workers pegam pela vigia do modelo
+# (AUTOU_MODELO_VIGIAR). Só um processo aprende por vez (flock).
+#
+# Configuração (.env):
+#   AUTOU_FEEDBACK            1 | 0  habilita o POST /feedback       (padrão: 1)
+#                             (exige X-Admin-Token = AUTOU_ADMIN_TOKEN: o
+#                             feedback vira dado de treino)
+#   AUTOU_FEEDBACK_MAX_MB     tamanho máx. do feedback.csv pela API  (padrão: 50)
+#   AUTOU_ONLINE              segundos entre atualizações no servidor; 0 = desligado
+#   AUTOU_ONLINE_LOTE         máx. exemplos por atualização          (padrão: 256)
+#   AUTOU_ONLINE_FEATURES     nº de features do hashing (2^N)        (padrão: 18)
+#   AUTOU_ONLINE_MODELO       onde publicar            (padrão: data/model_online.pkl)
+# ---------------------------------------------------------------------
+
+DADOS = Path(__file__).parent.parent / "data"
+CAMINHO_FEEDBACK = DADOS / "feedback.csv"
+CAMINHO_MODELO_ONLINE = Path(os.getenv("AUTOU_ONLINE_MODELO") or DADOS / "model_online.pkl")
+# offset já aprendido do feedback.csv + contadores (ao lado do modelo)
+CAMINHO_ESTADO = CAMINHO_MODELO_ONLINE.with_suffix(".json")
+
+FEEDBACK_ATIVO = os.getenv("AUTOU_FEEDBACK", "1").strip() not in ("0", "false", "")
+MAX_BYTES_FEEDBACK = int(float(os.getenv("AUTOU_FEEDBACK_MAX_MB", "50")) * 1024 * 1024)
+INTERVALO = float(os.getenv("AUTOU_ONLINE", "0"))
+LOTE = int(os.getenv("AUTOU_ONLINE_LOTE", "256"))
+BITS_FEATURES = int(os.getenv("AUTOU_ONLINE_FEATURES", "18"))
+
+CATEGORIAS = ("Improdutivo", "Produtivo")
+
+_locks = {}  # caminho -> threading.Lock (o flock não exclui threads do mesmo processo)
+_pipe = None  # modelo online em memória no processo que aprende
+_pipe_versao: Optional[float] = None  # `atualizado_em` do estado que gerou `_pipe`
+
+
+@contextmanager
+def _travado(caminho: Path, bloquear: bool = True) -> Iterator[bool]:
+    """Lock de thread + flock no arquivo `caminho`.lock. Rende False se não conseguiu (bloquear=False)."""
+    lock = _locks.setdefault(caminho, threading.Lock())
+    if not lock.acquire(blocking=bloquear):
+        yield False
+        return
+    try:
+        if fcntl is None:
+            yield True
+            return
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with open(caminho.with_name(caminho.name + ".lock"), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if bloquear else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    finally:
+        lock.release()
+
+
+# ---------------------------------------------------------------------
+# Feedback
+# ---------------------------------------------------------------------
+class FeedbackCheio(RuntimeError):
+    """O feedback.csv chegou ao tamanho máximo: a correção não foi registrada."""
+
+
+def registrar_feedback(texto: str, categoria: str, caminho: Optional[Path] = None, max_bytes: int = 0):
+    """
+    Anexa (text,label) no CSV — mesmo formato do samples.csv, registro inteiro
+    de uma vez. Com `max_bytes` > 0, levanta `FeedbackCheio` se o arquivo
+    passaria desse tamanho.
+    """
+    caminho = caminho or CAMINHO_FEEDBACK
+    if categoria not in CATEGORIAS:
+        raise ValueError(f"categoria deve ser uma de: {', '.join(CATEGORIAS)}")
+    buf = io.StringIO()
+    csv.writer(buf, quoting=csv.QUOTE_ALL, lineterminator="\n").writerow([texto, categoria])
+    with _travado(caminho):
+        tamanho = caminho.stat().st_size if caminho.exists() else 0
+        if max_bytes > 0 and tamanho + len(buf.getvalue().encode("utf-8", "surrogatepass")) > max_bytes:
+            raise FeedbackCheio(f"{caminho.name} chegou ao limite de {max_bytes / (1024 * 1024):g} MB.")
+        novo = tamanho == 0
+        with open(caminho, "a", encoding="utf-8", newline="") as f:
+            if novo:
+                f.write('"text","label"\n')
+            f.write(buf.getvalue())
+
+
+def ler_novos(offset: int, max_itens: int, caminho: Optional[Path] = None) -> Tuple[List[str], List[str], int]:
+    """
+    Registros a partir do byte `offset` (no máximo `max_itens`), e o offset
+    seguinte. Só consome registros completos: um registro termina num '\\n'
+    fora de aspas (o texto pode ter quebras de linha).
+    """
+    textos: List[str] = []
+    rotulos: List[str] = []
+    try:
+        f = open(caminho or CAMINHO_FEEDBACK, "rb")
+    except FileNotFoundError:
+        return textos, rotulos, offset
+    with f:
+        f.seek(offset)
+        registro: List[bytes] = []
+        aspas = 0
+        for linha in f:
+            if not linha.endswith(b"\n"):
+                break  # registro sendo escrito agora
+            registro.append(linha)
+            aspas += linha.count(b'"')
+            if aspas % 2:
+                continue
+            bruto = b"".join(registro)
+            registro, aspas = [], 0
+            offset += len(bruto)
+            campos = next(csv.reader(io.StringIO(bruto.decode("utf-8", errors="ignore"))), [])
+            if len(campos) >= 2 and campos[1].strip() in CATEGORIAS and campos[0].strip():
+                textos.append(campos[0].strip())
+                rotulos.append(campos[1].strip())
+                if len(textos) >= max_itens:
+                    break
+    return textos, rotulos, offset
+
+
+# ---------------------------------------------------------------------
+# Modelo online
+# ---------------------------------------------------------------------
+def montar_pipeline():
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline([
+        ("vetorizador", HashingVectorizer(ngram_range=(1, 2), n_features=2 ** BITS_FEATURES,
+                                          alternate_sign=False, norm="l2")),
+        ("classificador", SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)),
+    ])
+
+
+def _ajustar(pipe, textos: List[str], rotulos: List[str]):
+    """partial_fit só do classificador: o HashingVectorizer não aprende nada."""
+    vet, clf = pipe.steps[0][1], pipe.steps[-1][1]
+    clf.partial_fit(vet.transform(textos), rotulos, classes=list(CATEGORIAS))
+
+
+def _ler_estado() -> dict:
+    try:
+        return json.loads(CAMINHO_ESTADO.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"offset": 0, "exemplos": 0, "atualizacoes": 0}
+
+
+def _publicar(pipe, estado: dict):
+    """Modelo e estado com rename atômico (modelo primeiro: no pior caso reaprende um lote)."""
+    import joblib
+
+    CAMINHO_MODELO_ONLINE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CAMINHO_MODELO_ONLINE.with_suffix(".pkl.tmp")
+    joblib.dump(pipe, tmp)
+    os.replace(tmp, CAMINHO_MODELO_ONLINE)
+    tmp = CAMINHO_ESTADO.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(estado, indent=2), encoding="utf-8")
+    os.replace(tmp, CAMINHO_ESTADO)
+
+
+def inicializar(textos: List[str], rotulos: List[str], offset: int = 0, epocas: int = 5) -> dict:
+    """
+    Cria o modelo online do zero (ex.: com o samples.csv) em algumas épocas
+    de mini-lotes. `offset`: até onde o feedback.csv já entrou em `textos`
+    (o resto fica para o `atualizar`). Roda uma vez; depois só `atualizar`.
+    """
+    global _pipe, _pipe_versao
+    import random
+
+    pipe = montar_pipeline()
+    pares = list(zip(textos, rotulos))
+    rnd = random.Random(42)
+    for _ in range(epocas):
+        rnd.shuffle(pares)
+        for i in range(0, len(pares), LOTE):
+            lote = pares[i:i + LOTE]
+            _ajustar(pipe, [t for t, _ in lote], [r for _, r in lote])
+    estado = {"offset": offset, "exemplos": len(pares), "atualizacoes": 0, "atualizado_em": time.time()}
+    with _travado(CAMINHO_MODELO_ONLINE):
+        _publicar(pipe, estado)
+        _pipe, _pipe_versao = pipe, estado["atualizado_em"]
+    return estado
+
+
+def atualizar(max_itens: int = LOTE) -> Optional[dict]:
+    """
+    Um passo de aprendizado: lê até `max_itens` correções novas, faz
+    partial_fit e publica. Devolve o estado novo, ou None se não havia nada
+    novo, se o modelo online ainda não existe, ou se outro processo está
+    aprendendo agora.
+    """
+    global _pipe, _pipe_versao
+    with _travado(CAMINHO_MODELO_ONLINE, bloquear=False) as ok:
+        if not ok or not CAMINHO_MODELO_ONLINE.exists():
+            return None
+        estado = _ler_estado()
+        textos, rotulos, offset = ler_novos(estado["offset"], max_itens)
+        if offset == estado["offset"]:
+            return None
+        t0 = time.perf_counter()
+        try:
+            if _pipe is None or estado.get("atualizado_em") != _pipe_versao:
+                import joblib
+                _pipe = joblib.load(CAMINHO_MODELO_ONLINE)  # outro processo pode ter publicado antes
+            if textos:
+                _ajustar(_pipe, textos, rotulos)
+            estado = dict(estado, offset=offset, exemplos=estado["exemplos"] + len(textos),
+                          atualizacoes=estado["atualizacoes"] + 1, atualizado_em=time.time(),
+                          ultimo_lote=len(textos))
+            _publicar(_pipe, estado)
+            _pipe_versao = estado["atualizado_em"]
+        except Exception:
+            traceback.print_exc()
+            _pipe = None
+            return None
+        estado["segundos"] = round(time.perf_counter() - t0, 4)
+        return estado
+
+
+def estado() -> dict:
+    """Resumo para o /config."""
+    e = _ler_estado() if CAMINHO_MODELO_ONLINE.exists() else None
+    pendentes = None
+    try:
+        if e is not None:
+            pendentes = max(0, CAMINHO_FEEDBACK.stat().st_size - e["offset"])
+    except OSError:
+        pendentes = 0
+    return {
+        "feedback": FEEDBACK_ATIVO,
+        "intervalo": INTERVALO,
+        "modelo_online": str(CAMINHO_MODELO_ONLINE) if e is not None else None,
+        "estado": e,
+        "bytes_pendentes": pendentes,
+    }
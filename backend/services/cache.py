@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# ---------------------------------------------------------------------
+# Cache de resultados de classificação, endereçado por conteúdo.
+#
+# Triagem de email vê o mesmo conteúdo o tempo todo (threads encaminhadas,
+# o mesmo PDF anexado por vários remetentes, notificações automáticas).
+# A chave é o hash dos bytes do upload (ou do texto normalizado) somado à
+# impressão digital do modelo carregado e da configuração que muda o
+# veredito (cascata, registro de respostas, limites do PDF), então um
+# modelo ou configuração nova nunca reaproveita veredito antigo — nem o
+# que ficou no SQLite de antes do reinício.
+#
+# As entradas são copiadas ao guardar e ao devolver: quem recebe um hit
+# pode acrescentar campos (cluster, paginas_lidas) sem mexer no cache.
+#
+# Dois níveis:
+#   - memória: LRU com TTL e limite de itens e de bytes
+#   - SQLite (opcional): sobrevive a reinícios do servidor
+#
+# Configuração (.env):
+#   AUTOU_CACHE         1 | 0                    (padrão: 1)
+#   AUTOU_CACHE_ITENS   máx. itens em memória    (padrão: 10000)
+#   AUTOU_CACHE_MB      máx. memória estimada    (padrão: 32)
+#   AUTOU_CACHE_TTL     segundos; 0 = sem TTL    (padrão: 3600)
+#   AUTOU_CACHE_SQLITE  caminho do .sqlite; vazio = sem disco
+# ---------------------------------------------------------------------
+
+# Campos da resposta (categoria, confianca, resposta_sugerida, origem…)
+Resultado = Dict[str, Any]
+
+# Overhead aproximado de uma entrada (nó do OrderedDict + dict + float)
+_OVERHEAD_ENTRADA = 400
+
+
+def hasher_bytes(ext: str):
+    """Hash incremental do upload bruto (a extensão entra porque muda a extração)."""
+    h = hashlib.sha256(ext.encode())
+    h.update(b"\0")
+    return h
+
+
+def chave_bytes(ext: str, data: bytes) -> str:
+    h = hasher_bytes(ext)
+    h.update(data)
+    return h.hexdigest()
+
+
+def chave_texto(texto: str) -> str:
+    """Hash do texto já normalizado (mesmo strip que o classificador aplica)."""
+    return hashlib.sha256(b"texto\0" + texto.strip().encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class CacheResultados:
+    """LRU em memória + camada SQLite opcional, invalidada quando o modelo muda."""
+
+    def __init__(self, max_itens: int, max_bytes: int, ttl: float, caminho_sqlite: Optional[str] = None):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._itens: "OrderedDict[str, Tuple[float, int, Resultado]]" = OrderedDict()
+        self._bytes = 0
+        self._impressao: Optional[str] = None
+        self.hits = 0
+        self.hits_disco = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidacoes = 0
+
+        self._db = None  # sqlite3.Connection, só com caminho_sqlite
+        if caminho_sqlite:
+            try:
+                import sqlite3
+
+                self._db = sqlite3.connect(caminho_sqlite, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS resultados ("
+                    " chave TEXT PRIMARY KEY, impressao TEXT NOT NULL,"
+                    " expira REAL NOT NULL, valor TEXT NOT NULL)"
+                )
+                self._db.commit()
+            except Exception:
+                traceback.print_exc()
+                self._db = None
+
+    # ------------------------------------------------------------------
+    def _sincronizar_modelo(self, impressao: str):
+        """Modelo trocou → descarta tudo que foi calculado com o anterior."""
+        if impressao == self._impressao:
+            return
+        if self._impressao is not None:
+            self.invalidacoes += 1
+        self._impressao = impressao
+        self._itens.clear()
+        self._bytes = 0
+        if self._db is not None:
+            try:
+                self._db.execute("DELETE FROM resultados WHERE impressao != ?", (impressao,))
+                self._db.commit()
+            except Exception:
+                traceback.print_exc()
+
+    def _guardar_memoria(self, chave: str, valor: Resultado, expira: float):
+        tamanho = sys.getsizeof(chave) + sum(sys.getsizeof(v) for v in valor.values()) + _OVERHEAD_ENTRADA
+        antigo = self._itens.pop(chave, None)
+        if antigo is not None:
+            self._bytes -= antigo[1]
+        self._itens[chave] = (expira, tamanho, valor)
+        self._bytes += tamanho
+        while self._itens and (len(self._itens) > self.max_itens or self._bytes > self.max_bytes):
+            _, (_, t, _) = self._itens.popitem(last=False)
+            self._bytes -= t
+            self.evictions += 1
+
+    def _expira_em(self) -> float:
+        return time.time() + self.ttl if self.ttl > 0 else float("inf")
+
+    # ------------------------------------------------------------------
+    def obter(self, chave: str, impressao: str) -> Optional[Resultado]:
+        agora = time.time()
+        with self._lock:
+            self._sincronizar_modelo(impressao)
+
+            item = self._itens.get(chave)
+            if item is not None:
+                if item[0] > agora:
+                    self._itens.move_to_end(chave)
+                    self.hits += 1
+                    return dict(item[2])
+                self._itens.pop(chave)
+                self._bytes -= item[1]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT expira, valor FROM resultados WHERE chave = ? AND impressao = ?",
+                        (chave, impressao),
+                    ).fetchone()
+                except Exception:
+                    traceback.print_exc()
+                    row = None
+                if row is not None and row[0] > agora:
+                    valor = json.loads(row[1])
+                    self._guardar_memoria(chave, valor, row[0])
+                    self.hits += 1
+                    self.hits_disco += 1
+                    return dict(valor)
+
+            self.misses += 1
+            return None
+
+    def guardar(self, chave: str, impressao: str, valor: Resultado):
+        valor = dict(valor)
+        expira = self._expira_em()
+        with self._lock:
+            self._sincronizar_modelo(impressao)
+            self._guardar_memoria(chave, valor, expira)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO resultados (chave, impressao, expira, valor) VALUES (?, ?, ?, ?)",
+                        (chave, impressao, expira if expira != float("inf") else 1e18, json.dumps(valor)),
+                    )
+                    self._db.commit()
+                except Exception:
+                    traceback.print_exc()
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM resultados")
+                self._db.commit()
+
+    def estado(self) -> dict:
+        """Contadores para o /config."""
+        total = self.hits + self.misses
+        return {
+            "itens": len(self._itens),
+            "bytes_estimados": self._bytes,
+            "max_itens": self.max_itens,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "sqlite": self._db is not None,
+            "hits": self.hits,
+            "hits_disco": self.hits_disco,
+            "misses": self.misses,
+            "taxa_acerto": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidacoes": self.invalidacoes,
+        }
+
+
+ATIVO = os.getenv("AUTOU_CACHE", "1").strip() not in ("0", "false", "")
+
+resultados = CacheResultados(
+    max_itens=int(os.getenv("AUTOU_CACHE_ITENS", "10000")),
+    max_bytes=int(float(os.getenv("AUTOU_CACHE_MB", "32")) * 1024 * 1024),
+    ttl=float(os.getenv("AUTOU_CACHE_TTL", "3600")),
+    caminho_sqlite=(os.getenv("AUTOU_CACHE_SQLITE") or "").strip() or None,
+)
@@ -1,23 +1,112 @@
-from typing import Tuple, List
+from typing import BinaryIO, Dict, Iterable, Tuple, List, Optional, Pattern, Set, Union
+from functools import lru_cache
 from pathlib import Path
-import joblib, re, unicodedata, traceback
+import hashlib, os, re, threading, time, unicodedata, traceback
 
-from .responders import resposta_improdutiva, resposta_produtiva
+from . import metricas, responders
+from .pdf_reader import iter_paginas_pdf
+from .responders import SEM_INTENCAO, Intencao, Parametros, responder, resposta_improdutiva
 
 # Onde o modelo local (Pipeline TF-IDF + Classificador) é salvo
-CAMINHO_MODELO = Path(__file__).parent.parent / "data" / "model.pkl"
+# (AUTOU_MODELO troca o arquivo servido, ex.: o modelo online data/model_online.pkl)
+CAMINHO_MODELO = Path(os.getenv("AUTOU_MODELO") or Path(__file__).parent.parent / "data" / "model.pkl")
+# Mesmo modelo exportado p/ o runtime leve (pasta com .npy mapeáveis + meta.json)
+CAMINHO_MODELO_LEVE = Path(
+    os.getenv("AUTOU_MODELO_LEVE") or Path(__file__).parent.parent / "data" / "model_leve"
+)
+# Arrays do modelo leve mapeados em memória (compartilhados entre workers/processos)
+MODELO_MMAP = os.getenv("AUTOU_MODELO_MMAP", "1").strip() not in ("0", "false", "")
+
+# Runtime de inferência:
+#   leve   → NumPy puro (services/modelo_leve.py), sem sklearn/joblib no processo
+#   pickle → joblib.load do Pipeline do sklearn
+#   auto   → leve se o modelo exportado existir e tiver vindo do model.pkl
+#            atual (sha256 gravado na exportação); senão pickle
+RUNTIME = os.getenv("AUTOU_MODELO_RUNTIME", "auto").strip().lower()
+_auto_memo: Tuple[tuple, bool] = ((), False)  # (stat dos arquivos, decisão) — evita re-hash a cada chamada
 _modelo = None
+_modelo_impressao: Optional[str] = None   # impressão do arquivo que gerou `_modelo`
+_modelo_runtime: Optional[str] = None     # "leve" | "pickle"
+
+# Cascata (AUTOU_CASCATA=1): a pontuação heurística roda antes e o modelo só
+# é consultado quando o rótulo depende dele. Pela regra do `_decidir`,
+# sp >= si dá "Produtivo" qualquer que seja a probabilidade — aí o
+# predict_proba é pulado (origem "cascata"; mesmo rótulo, confiança pelas
+# heurísticas). AUTOU_CASCATA_IMPROD=N (> 0) também decide "Improdutivo" sem
+# o modelo quando si - sp >= N: aproximação, pode mudar rótulos
+# (python -m backend.bench.cascata mede o efeito no samples.csv).
+CASCATA = os.getenv("AUTOU_CASCATA", "0").strip() not in ("0", "false", "")
+CASCATA_IMPROD = int(os.getenv("AUTOU_CASCATA_IMPROD", "0"))
+
+# Cache negativo: depois de uma falha de carga, espera antes de tentar de novo
+# (5s, 10s, 20s… até 5 min) em vez de reler o arquivo a cada requisição.
+BACKOFF_INICIAL = 5.0
+BACKOFF_MAX = 300.0
+_falhas = 0
+_proxima_tentativa = 0.0
+_lock_carga = threading.RLock()
 
 # ---------------------------------------------------------------------
 # Helpers de pré-processamento e heurísticas
 # ---------------------------------------------------------------------
-def _rm_acentos(s: str) -> str:
-    """Remove acentos para simplificar match de regex."""
+def _rm_acentos_lento(s: str) -> str:
+    """Definição de referência: NFD e descarta as marcas combinantes (Mn)."""
     return "".join(
         c for c in unicodedata.normalize("NFD", s)
         if unicodedata.category(c) != "Mn"
     )
 
+
+def _montar_tabela_acentos() -> List[str]:
+    """
+    Tabela p/ str.translate, indexada pelo código do caractere (lista: bem
+    mais rápida que dict no translate). Latin-1 + Latin Extended-A → ASCII
+    sem acento; marcas combinantes U+0300–U+036F → removidas. Só é trocado o
+    caractere cujo NFD é "base ASCII + marcas Mn" (aí trocar caractere a
+    caractere dá o mesmo que normalizar o texto inteiro); o resto fica como
+    está. Acima de U+036F o translate mantém o caractere (IndexError).
+    """
+    tabela = [chr(cp) for cp in range(0x370)]
+    for cp in list(range(0x80, 0x180)) + list(range(0x300, 0x370)):
+        c = chr(cp)
+        nfd = unicodedata.normalize("NFD", c)
+        if all(unicodedata.category(x) == "Mn" or unicodedata.combining(x) == 0 for x in nfd):
+            dobrado = _rm_acentos_lento(c)
+            if dobrado.isascii():
+                tabela[cp] = dobrado
+    return tabela
+
+
+_TABELA_ACENTOS = _montar_tabela_acentos()
+_NAO_ASCII = re.compile(r"[^\x00-\x7f]+")
+
+
+_rm_acentos_curto = lru_cache(maxsize=4096)(_rm_acentos_lento)
+
+
+def _rm_acentos_trecho(m) -> str:
+    trecho = m.group()
+    return _rm_acentos_curto(trecho) if len(trecho) <= 32 else _rm_acentos_lento(trecho)
+
+
+def _rm_acentos(s: str) -> str:
+    """
+    Remove acentos para simplificar match de regex.
+    Mesmo resultado de `_rm_acentos_lento`, sem chamar unicodedata por caractere:
+      1. texto ASCII → devolvido como está;
+      2. str.translate com a tabela acima; se sobrou só ASCII, pronto;
+      3. senão (ß, æ, grego, emoji…): só os trechos que continuaram não-ASCII
+         passam pela definição de referência (com cache p/ trechos curtos).
+         Vale porque um caractere ASCII nunca se mistura com os vizinhos no
+         NFD e a tabela só removeu marcas Mn, que a referência também remove.
+    """
+    if s.isascii():
+        return s
+    t = s.translate(_TABELA_ACENTOS)
+    if t.isascii():
+        return t
+    return _NAO_ASCII.sub(_rm_acentos_trecho, t)
+
 # Palavras-chave (usamos raízes p/ cobrir variações; _rm_acentos já remove acentos)
 PROD_KEYWORDS = [
     # fluxo / acompanhamento
@@ -72,20 +161,154 @@ REQUEST_PAT = re.compile(
     re.I,
 )
 
-def _pontuar(texto: str) -> Tuple[int, int]:
-    t = _rm_acentos(texto.lower())
+# ---------------------------------------------------------------------
+# Varredura compilada das palavras-chave (uma passada só pelo texto)
+# ---------------------------------------------------------------------
+# Quase todos os padrões têm a forma \bpalavra\b ou \bradical\w*\b, que
+# equivalem a "algum token \w+ do texto é igual à palavra / começa com o
+# radical". Esses viram consultas em dicionário sobre os tokens únicos do
+# texto. Os demais (várias palavras, [e]?, emojis…) continuam como regex
+# pré-compiladas, mas só rodam quando o radical inicial aparece no texto
+# (condição necessária para casarem) — a contagem fica idêntica à do
+# antigo laço de re.search.
+_TOKEN = re.compile(r"\w+")
+_FORMA_PALAVRA = re.compile(r"\\b(\w+)\\b")
+_FORMA_RADICAL = re.compile(r"\\b(\w+)\\w\*\\b")
+_FORMA_INICIO = re.compile(r"\\b(\w+)")
+
+class _Varredor:
+    """Motor de busca das listas de palavras-chave, compilado uma única vez."""
+
+    def __init__(self, grupos: Dict[str, List[str]]):
+        self.grupos = list(grupos)
+        # token exato -> [(grupo, índice)]
+        self._palavras: Dict[str, List[Tuple[str, int]]] = {}
+        # radical -> [(grupo, índice, regex a confirmar ou None)]
+        self._radicais: Dict[str, List[Tuple[str, int, Optional[Pattern]]]] = {}
+        # padrões sem radical inicial (ex.: emojis): sempre verificados
+        self._sempre: List[Tuple[str, int, Pattern]] = []
+
+        for grupo, padroes in grupos.items():
+            for idx, p in enumerate(padroes):
+                m = _FORMA_PALAVRA.fullmatch(p)
+                if m:
+                    self._palavras.setdefault(m.group(1), []).append((grupo, idx))
+                    continue
+                m = _FORMA_RADICAL.fullmatch(p)
+                if m:
+                    self._radicais.setdefault(m.group(1), []).append((grupo, idx, None))
+                    continue
+                m = _FORMA_INICIO.match(p)
+                if m:
+                    self._radicais.setdefault(m.group(1), []).append((grupo, idx, re.compile(p)))
+                else:
+                    self._sempre.append((grupo, idx, re.compile(p)))
+
+        self._tamanhos = sorted({len(r) for r in self._radicais})
+        self._iniciais = {r[0] for r in self._radicais}
 
-    prod = sum(1 for p in PROD_KEYWORDS if re.search(p, t))
-    impr = sum(1 for p in IMPROD_KEYWORDS if re.search(p, t))
+    def varrer(self, t: str) -> Dict[str, Set[int]]:
+        """Retorna, por grupo, os índices dos padrões que casam em `t`."""
+        achados: Dict[str, Set[int]] = {g: set() for g in self.grupos}
+        a_confirmar: Dict[Tuple[str, int], Pattern] = {}
+        palavras, radicais, tamanhos = self._palavras, self._radicais, self._tamanhos
 
-    # boost por termos de ação
-    if ACTION_BOOST.search(t):
-        prod += 3  # estava 2
+        for tok in set(_TOKEN.findall(t)):
+            for grupo, idx in palavras.get(tok, ()):
+                achados[grupo].add(idx)
+            if tok[0] not in self._iniciais:
+                continue
+            for k in tamanhos:
+                if k > len(tok):
+                    break
+                for grupo, idx, rx in radicais.get(tok[:k], ()):
+                    if rx is None:
+                        achados[grupo].add(idx)
+                    else:
+                        a_confirmar[(grupo, idx)] = rx
 
-    # pedido direto explícito (pode verificar? favor informar…)
-    if REQUEST_PAT.search(t):
-        prod += 2
+        for (grupo, idx), rx in a_confirmar.items():
+            if idx not in achados[grupo] and rx.search(t):
+                achados[grupo].add(idx)
+        for grupo, idx, rx in self._sempre:
+            if rx.search(t):
+                achados[grupo].add(idx)
+        return achados
+
+_VARREDOR = _Varredor({"prod": PROD_KEYWORDS, "impr": IMPROD_KEYWORDS})
+
+# ---------------------------------------------------------------------
+# Intenção do email (escolhe a resposta sugerida em responders.py)
+# ---------------------------------------------------------------------
+# Cada intenção é um subconjunto das palavras-chave acima: sai dos mesmos
+# achados do varredor, sem outra passada pelo texto. Ordem = prioridade.
+INTENCOES = [
+    ("cancelamento", "prod", [r"\bcancel\w*\b", r"\bdesativ\w*\b"]),
+    ("fatura", "prod", [
+        r"\bbolet\w*\b", r"\bfatur\w*\b", r"\bnf[e]?\b", r"\bnota\s*fiscal\b",
+        r"\bcomprovant\w*\b", r"\breembols\w*\b",
+    ]),
+    ("protocolo", "prod", [
+        r"\bprotocolo\b", r"\bchamado\b", r"\bticket\b", r"\bstatus\b",
+        r"\bprotocolo\s*\d+\b", r"\bchamado\s*\d+\b",
+    ]),
+    ("agradecimento", "impr", [
+        r"\bobrigad\w*\b", r"\bagrade\w*\b", r"\bvaleu\b", r"\bmuito\s+obrigado\w*\b", r"\bgrato\w*\b", r"🙏",
+    ]),
+]
+_LISTAS = {"prod": PROD_KEYWORDS, "impr": IMPROD_KEYWORDS}
+_INDICES_INTENCAO = [
+    (nome, grupo, frozenset(_LISTAS[grupo].index(p) for p in padroes))  # ValueError: padrão fora da lista
+    for nome, grupo, padroes in INTENCOES
+]
+# nº do protocolo/chamado (texto já sem acentos e minúsculo): "protocolo 123", "chamado nº 4567", "ticket #89"
+_NUMERO_PROTOCOLO = re.compile(r"\b(?:protocolo|chamado|ticket)\s*(?:n[o.º°]*\s*|#\s*|:\s*)?(\d{2,20})\b")
+
+def _intencao(achados: Dict[str, Set[int]], t: str) -> Intencao:
+    """Intenções candidatas e parâmetros da resposta; "protocolo" sem número vira "status"."""
+    candidatos: List[str] = []
+    parametros = ()
+    for nome, grupo, indices in _INDICES_INTENCAO:
+        if indices.isdisjoint(achados[grupo]):
+            continue
+        if nome == "protocolo":
+            m = _NUMERO_PROTOCOLO.search(t)
+            if m:
+                candidatos.append("protocolo")
+                parametros = (("protocolo", m.group(1)),)
+            candidatos.append("status")
+        else:
+            candidatos.append(nome)
+    return tuple(candidatos), parametros
 
+def parametros_resposta(texto: str) -> Parametros:
+    """Campos que as respostas podem usar (nº do protocolo), sem pontuar o texto."""
+    m = _NUMERO_PROTOCOLO.search(_rm_acentos(texto.lower()))
+    return (("protocolo", m.group(1)),) if m else ()
+
+def _analisar(texto: str) -> Tuple[int, int, Intencao]:
+    """Pontuação heurística (prod, impr) + intenção do email, numa passada só."""
+    with metricas.estagio("pontuacao"):
+        t = _rm_acentos(texto.lower())
+
+        achados = _VARREDOR.varrer(t)
+        prod = len(achados["prod"])
+        impr = len(achados["impr"])
+
+        # boost por termos de ação
+        if ACTION_BOOST.search(t):
+            prod += 3  # estava 2
+
+        # pedido direto explícito (pode verificar? favor informar…)
+        if REQUEST_PAT.search(t):
+            prod += 2
+
+        intencao = _intencao(achados, t)
+
+    return prod, impr, intencao
+
+def _pontuar(texto: str) -> Tuple[int, int]:
+    prod, impr, _ = _analisar(texto)
     return prod, impr
 
 def _conf_por_scores(prod: int, impr: int) -> float:
@@ -102,69 +325,378 @@ def _meta_score(proba_prod: float, prod_hits: int, impr_hits: int) -> float:
 # ---------------------------------------------------------------------
 # Carregamento de modelo local
 # ---------------------------------------------------------------------
-def carregar_modelo():
-    """Carrega o Pipeline treinado de disco (lazy-load)."""
-    global _modelo
-    if _modelo is None and CAMINHO_MODELO.exists():
+def _stat(caminho: Path) -> tuple:
+    try:
+        st = caminho.stat()
+    except OSError:
+        return ()
+    return (st.st_size, st.st_mtime_ns)
+
+def _usa_leve() -> bool:
+    global _auto_memo
+    if RUNTIME != "auto":
+        return RUNTIME == "leve"
+    meta = CAMINHO_MODELO_LEVE / "meta.json"
+    chave = (_stat(CAMINHO_MODELO), _stat(meta))
+    if chave != _auto_memo[0]:
+        from .modelo_leve import origem, sha256_arquivo
+        usa = bool(chave[1]) and (not chave[0] or origem(CAMINHO_MODELO_LEVE) == sha256_arquivo(CAMINHO_MODELO))
+        _auto_memo = (chave, usa)
+    return _auto_memo[1]
+
+def _arquivos_modelo() -> List[Path]:
+    """Arquivos de que o runtime escolhido depende."""
+    if _usa_leve():
+        from .modelo_leve import caminhos
+        return caminhos(CAMINHO_MODELO_LEVE)
+    return [CAMINHO_MODELO]
+
+def impressao_disco() -> str:
+    """
+    Impressão digital do modelo em disco (tamanho + mtime).
+    Muda a cada novo treino/deploy do model.pkl (ou exportação do modelo leve).
+    """
+    partes = []
+    for caminho in _arquivos_modelo():
         try:
-            _modelo = joblib.load(CAMINHO_MODELO)
-        except Exception:
-            traceback.print_exc()
-            _modelo = None
+            st = caminho.stat()
+        except OSError:
+            return "sem-modelo"
+        partes.append(f"{st.st_size}-{st.st_mtime_ns}")
+    return "+".join(partes)
+
+def _ler_modelo():
+    """Lê o modelo do runtime escolhido (imports pesados só aqui, sob demanda)."""
+    if _usa_leve():
+        from .modelo_leve import carregar
+        return carregar(CAMINHO_MODELO_LEVE, mmap=MODELO_MMAP), "leve"
+    import joblib
+    return joblib.load(CAMINHO_MODELO), "pickle"
+
+def impressao_modelo() -> str:
+    """
+    Impressão do modelo em uso (o carregado; senão, o que está em disco).
+    Usada para invalidar caches quando o modelo muda.
+    """
+    return _modelo_impressao or impressao_disco()
+
+def impressao_config(*extra) -> str:
+    """
+    Impressão da configuração que muda o veredito ou a resposta sem mudar o
+    modelo: cascata, respostas por intenção e o registro de modelos de
+    resposta (`extra`: o que o chamador acrescenta, ex.: limites do PDF).
+    Vai junto com `impressao_modelo` na chave do cache de resultados.
+    """
+    return _hash_config((CASCATA, CASCATA_IMPROD, responders.INTENCOES, responders.IMPRESSAO) + extra)
+
+@lru_cache(maxsize=16)
+def _hash_config(config: tuple) -> str:
+    return hashlib.sha256(repr(config).encode("utf-8")).hexdigest()[:16]
+
+def _aquecer(modelo):
+    """Predição de teste: valida o modelo e paga o custo da 1ª chamada antes do tráfego real."""
+    with metricas.descartando():
+        _probas_produtivo(modelo, ["Bom dia, qual o status do protocolo 123?"])
+        _analisar("Bom dia, qual o status do protocolo 123? Obrigado!")
+
+def recarregar_modelo(respeitar_backoff: bool = False) -> bool:
+    """
+    Lê o modelo, valida com uma predição de teste e só então troca o
+    modelo em uso (atribuição única → atômica). Requisições em andamento
+    seguem com a referência antiga; se a carga falhar, o modelo anterior
+    continua servindo e entra o backoff do cache negativo.
+    """
+    global _modelo, _modelo_impressao, _modelo_runtime, _falhas, _proxima_tentativa
+    with _lock_carga:
+        if respeitar_backoff and time.monotonic() < _proxima_tentativa:
+            return False
+        impressao = impressao_disco()
+        try:
+            if impressao == "sem-modelo":
+                raise FileNotFoundError(f"Modelo não encontrado: {', '.join(map(str, _arquivos_modelo()))}")
+            novo, runtime = _ler_modelo()
+            _aquecer(novo)
+        except Exception as e:
+            if not isinstance(e, FileNotFoundError):
+                traceback.print_exc()
+            metricas.contar("falha_carga_modelo")
+            _falhas += 1
+            _proxima_tentativa = time.monotonic() + min(BACKOFF_MAX, BACKOFF_INICIAL * 2 ** (_falhas - 1))
+            return False
+        _modelo, _modelo_impressao, _modelo_runtime = novo, impressao, runtime
+        _falhas, _proxima_tentativa = 0, 0.0
+        return True
+
+def carregar_modelo():
+    """Carrega o Pipeline treinado de disco (lazy-load, com backoff após falhas)."""
+    if _modelo is None and time.monotonic() >= _proxima_tentativa:
+        with _lock_carga:
+            if _modelo is None:  # outra thread pode ter carregado enquanto esperávamos
+                recarregar_modelo(respeitar_backoff=True)
     return _modelo
 
+def aquecer_modelo() -> bool:
+    """Carrega (se preciso) e exercita o modelo. Usado no startup e ao criar processos do pool."""
+    modelo = carregar_modelo()
+    if modelo is None:
+        return False
+    _aquecer(modelo)
+    return True
+
+def estado_modelo() -> dict:
+    """Resumo para o /config."""
+    return {
+        "carregado": _modelo is not None,
+        "runtime": _modelo_runtime,
+        "impressao": _modelo_impressao,
+        "impressao_disco": impressao_disco(),
+        "falhas_seguidas": _falhas,
+        "proxima_tentativa_em": round(max(0.0, _proxima_tentativa - time.monotonic()), 1),
+        "cascata": {"ativa": CASCATA, "improdutivo_margem": CASCATA_IMPROD},
+    }
+
 # ---------------------------------------------------------------------
 # Caminho Modelo Local
 # ---------------------------------------------------------------------
-def _com_modelo_local(texto: str) -> Tuple[str, float, str, str]:
-    modelo = carregar_modelo()
-    if not modelo:
-        raise RuntimeError("Modelo local indisponível.")
-
-    # Probabilidade do lado "Produtivo"
+def _probas_produtivo(modelo, textos: List[str], falhar: bool = False) -> List[float]:
+    """
+    Probabilidade do lado "Produtivo" para cada texto (uma única chamada vetorizada).
+    Se a predição falhar, 0.5 para todos — ou a exceção, com `falhar`.
+    """
     try:
         proba = getattr(modelo, "predict_proba", None)
         if proba:
-            probs = proba([texto])[0]
+            with metricas.estagio("inferencia"):
+                probs = proba(textos)
             classes: List[str] = list(getattr(modelo, "classes_", ["Improdutivo", "Produtivo"]))
             idx_prod = classes.index("Produtivo") if "Produtivo" in classes else 1
-            proba_prod = float(probs[idx_prod])
-        else:
-            proba_prod = 0.5
+            return [float(p[idx_prod]) for p in probs]
     except Exception:
+        if falhar:
+            raise
         traceback.print_exc()
-        proba_prod = 0.5
+    if falhar:
+        raise RuntimeError("Modelo local sem predict_proba.")
+    return [0.5] * len(textos)
 
-    sp, si = _pontuar(texto)
+def _decidir(proba_prod: float, sp: int, si: int, intencao: Intencao = SEM_INTENCAO) -> Tuple[str, float, str, str]:
     score_hibrido = _meta_score(proba_prod, sp, si)
     categoria = "Produtivo" if (score_hibrido >= 0.5 or sp >= si) else "Improdutivo"
     confianca = float(max(0.6, min(0.99, score_hibrido)))
-    resp = resposta_produtiva() if categoria == "Produtivo" else resposta_improdutiva()
-    return str(categoria), float(confianca), resp, "modelo"
+    return str(categoria), float(confianca), responder(categoria, *intencao), "modelo"
+
+def _com_modelo_local(
+    texto: str, pontos: Optional[Tuple[int, int, Intencao]] = None
+) -> Tuple[str, float, str, str]:
+    modelo = carregar_modelo()
+    if not modelo:
+        raise RuntimeError("Modelo local indisponível.")
+
+    proba_prod = _probas_produtivo(modelo, [texto], falhar=True)[0]
+    return _decidir(proba_prod, *(pontos or _analisar(texto)))
+
+# ---------------------------------------------------------------------
+# Estágio heurístico da cascata
+# ---------------------------------------------------------------------
+def _pela_cascata(sp: int, si: int, intencao: Intencao = SEM_INTENCAO) -> Optional[Tuple[str, float, str, str]]:
+    """Decisão sem o modelo quando a cascata permite; None = o rótulo depende do modelo."""
+    if sp >= si:
+        categoria, confianca = "Produtivo", _conf_por_scores(sp, si)
+    elif CASCATA_IMPROD > 0 and si - sp >= CASCATA_IMPROD:
+        categoria, confianca = "Improdutivo", _conf_por_scores(si, sp)
+    else:
+        return None
+    return categoria, confianca, responder(categoria, *intencao), "cascata"
+
+# ---------------------------------------------------------------------
+# Caminho Heurística
+# ---------------------------------------------------------------------
+def _com_heuristica(sp: int, si: int, intencao: Intencao = SEM_INTENCAO) -> Tuple[str, float, str, str]:
+    categoria = "Produtivo" if sp >= si else "Improdutivo"
+    confianca = _conf_por_scores(sp, si)
+    return categoria, confianca, responder(categoria, *intencao), "heuristica"
 
 # ---------------------------------------------------------------------
 # Orquestrador (Modelo -> Heurística)
 # ---------------------------------------------------------------------
+def _classificar(texto: str) -> Tuple[str, float, str, str]:
+    texto = (texto or "").strip()
+    if not texto:
+        return "Improdutivo", 0.5, resposta_improdutiva(), "heuristica"
+
+    # 0) Cascata: heurística primeiro, modelo só se o rótulo depender dele
+    pontos = None
+    if CASCATA:
+        pontos = _analisar(texto)
+        decidido = _pela_cascata(*pontos)
+        if decidido is not None:
+            return decidido
+
+    # 1) Modelo Local
+    try:
+        return _com_modelo_local(texto, pontos)
+    except Exception:
+        traceback.print_exc()
+
+    # 2) Heurística pura (última linha de defesa)
+    metricas.contar("fallback_heuristica", metricas.tipo_entrada.get())
+    return _com_heuristica(*(pontos or _analisar(texto)))
+
 def classificar_e_sugerir(texto: str) -> Tuple[str, float, str, str]:
     """
     Fluxo LOCAL-ONLY:
+      0) Cascata (AUTOU_CASCATA=1): heurística decide sozinha quando pode
       1) Modelo Local (TF-IDF + Classificador)
       2) Heurística (fallback)
     Retorna: (categoria, confiança, resposta_sugerida, origem)
+    origem: "modelo" | "cascata" (modelo pulado) | "heuristica" (fallback)
     """
-    texto = (texto or "").strip()
-    if not texto:
-        return "Improdutivo", 0.5, resposta_improdutiva(), "heuristica"
+    t0 = time.perf_counter()
+    return _observado(_classificar(texto), time.perf_counter() - t0)
 
-    # 1) Modelo Local
+def _observado(resultado: Tuple[str, float, str, str], segundos: float) -> Tuple[str, float, str, str]:
+    """Registra o tempo de classificação no histograma, pela origem do veredito."""
+    metricas.observar("classificacao", segundos, metricas.tipo_entrada.get(), resultado[3])
+    return resultado
+
+def classificar_lote(textos: List[str]) -> List[Tuple[str, float, str, str]]:
+    """
+    Mesmo fluxo de `classificar_e_sugerir`, mas para vários textos de uma vez:
+      - UMA chamada de `predict_proba` para o lote inteiro (TF-IDF vetorizado;
+        com a cascata, só para os textos que dependem do modelo);
+      - pontuação heurística feita em sequência sobre o lote.
+    Retorna uma tupla (categoria, confiança, resposta_sugerida, origem) por texto,
+    na mesma ordem da entrada.
+    """
+    textos = [(t or "").strip() for t in textos]
+    resultados: List[Tuple[str, float, str, str]] = [
+        ("Improdutivo", 0.5, resposta_improdutiva(), "heuristica")
+    ] * len(textos)
+
+    idx_validos = [i for i, t in enumerate(textos) if t]
+    if not idx_validos:
+        return resultados
+
+    t0 = time.perf_counter()
+    pontos = [_analisar(textos[i]) for i in idx_validos]
+
+    # 0) Cascata: só o que depende do modelo segue para o predict_proba
+    if CASCATA:
+        pendentes = []
+        for i, p in zip(idx_validos, pontos):
+            decidido = _pela_cascata(*p)
+            if decidido is None:
+                pendentes.append((i, p))
+            else:
+                resultados[i] = decidido
+        if not pendentes:
+            metricas.observar("classificacao", time.perf_counter() - t0, metricas.tipo_entrada.get(), "cascata")
+            return resultados
+        idx_validos = [i for i, _ in pendentes]
+        pontos = [p for _, p in pendentes]
+
+    # 1) Modelo Local (lote inteiro)
     try:
-        return _com_modelo_local(texto)
+        modelo = carregar_modelo()
+        if not modelo:
+            raise RuntimeError("Modelo local indisponível.")
+        probas = _probas_produtivo(modelo, [textos[i] for i in idx_validos], falhar=True)
+        for i, proba_prod, p in zip(idx_validos, probas, pontos):
+            resultados[i] = _decidir(proba_prod, *p)
+        metricas.observar("classificacao", time.perf_counter() - t0, metricas.tipo_entrada.get(), "modelo")
+        return resultados
     except Exception:
         traceback.print_exc()
 
-    # 2) Heurística pura (última linha de defesa)
-    sp, si = _pontuar(texto)
-    categoria = "Produtivo" if sp >= si else "Improdutivo"
-    confianca = _conf_por_scores(sp, si)
-    resp = resposta_produtiva() if categoria == "Produtivo" else resposta_improdutiva()
-    return categoria, confianca, resp, "heuristica"
+    # 2) Heurística pura
+    metricas.contar("fallback_heuristica", metricas.tipo_entrada.get(), valor=len(idx_validos))
+    for i, p in zip(idx_validos, pontos):
+        resultados[i] = _com_heuristica(*p)
+    metricas.observar("classificacao", time.perf_counter() - t0, metricas.tipo_entrada.get(), "heuristica")
+    return resultados
+
+# ---------------------------------------------------------------------
+# Documentos paginados (PDF) com parada antecipada
+# ---------------------------------------------------------------------
+def _checkpoint(texto: str) -> Tuple[Tuple[str, float, str, str], float]:
+    """
+    Veredito do texto acumulado pelas mesmas etapas do `_classificar`
+    (cascata → modelo) e a distância dele ao limiar: |score híbrido - 0.5|
+    no modelo; confiança - 0.5 quando a cascata decide sem o modelo.
+    Levanta exceção se o modelo estiver indisponível ou a predição falhar.
+    """
+    sp, si, intencao = _analisar(texto)
+    if CASCATA:
+        decidido = _pela_cascata(sp, si, intencao)
+        if decidido is not None:
+            return decidido, decidido[1] - 0.5
+    modelo = carregar_modelo()
+    if not modelo:
+        raise RuntimeError("Modelo local indisponível.")
+    proba_prod = _probas_produtivo(modelo, [texto], falhar=True)[0]
+    return _decidir(proba_prod, sp, si, intencao), abs(_meta_score(proba_prod, sp, si) - 0.5)
+
+def classificar_paginas(
+    paginas: Iterable[str], margem: float = 0.0
+) -> Tuple[Optional[Tuple[str, float, str, str]], int]:
+    """
+    Classifica um documento consumindo as páginas sob demanda.
+
+    margem > 0 liga a parada antecipada: nos checkpoints (páginas 1, 2, 4,
+    8…) o texto acumulado é classificado de novo (`_checkpoint`); se o
+    veredito estiver a pelo menos `margem` do limiar, já está decidido e as
+    páginas restantes nem são lidas. Os checkpoints geométricos limitam o
+    custo extra a ~2x o de classificar uma vez. Se o modelo falhar num
+    checkpoint, a parada antecipada é desligada e o documento inteiro segue
+    o fluxo normal (com o fallback heurístico).
+
+    O tempo de classificação (todos os checkpoints + o final) entra no
+    histograma como no `classificar_e_sugerir`.
+
+    Retorna (resultado, páginas_lidas); resultado é None se não houver texto.
+    """
+    partes: List[str] = []
+    proximo_checkpoint = 1
+    ultimo = None  # (texto avaliado, resultado)
+    antecipar = margem > 0
+    gasto = 0.0
+
+    for texto in paginas:
+        partes.append(texto)
+        if not antecipar or len(partes) < proximo_checkpoint:
+            continue
+        proximo_checkpoint *= 2
+
+        acumulado = "\n".join(partes).strip()
+        if not acumulado:
+            continue
+        t0 = time.perf_counter()
+        try:
+            resultado, distancia = _checkpoint(acumulado)
+        except Exception:
+            traceback.print_exc()
+            antecipar, ultimo = False, None
+            continue
+        finally:
+            gasto += time.perf_counter() - t0
+        ultimo = (acumulado, resultado)
+        if distancia >= margem:
+            return _observado(resultado, gasto), len(partes)
+
+    texto = "\n".join(partes).strip()
+    if not texto:
+        return None, len(partes)
+    if ultimo is not None and ultimo[0] == texto:
+        return _observado(ultimo[1], gasto), len(partes)
+    t0 = time.perf_counter()
+    resultado = _classificar(texto)
+    return _observado(resultado, gasto + time.perf_counter() - t0), len(partes)
+
+def classificar_pdf(
+    binary: Union[bytes, BinaryIO],
+    max_paginas: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    margem: float = 0.0,
+) -> Tuple[Optional[Tuple[str, float, str, str]], int]:
+    """Extração página a página + `classificar_paginas` (uma tarefa só, para rodar num pool)."""
+    return classificar_paginas(iter_paginas_pdf(binary, max_paginas, max_chars), margem)
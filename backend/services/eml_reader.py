@@ -1,43 +1,215 @@
-import email
+import os
 from email import policy
+from email.message import EmailMessage
 from email.parser import BytesParser
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+from typing import BinaryIO, Callable, Iterable, List, Optional, Tuple, Union
 
 # ---------------------------------------------------------------------
 # Este módulo cuida da leitura de arquivos .eml (emails salvos em disco).
 # Objetivo: extrair o "conteúdo de texto" para ser classificado depois.
+#
+# Configuração (.env):
+#   AUTOU_EML_MAX_CHARS   máx. caracteres extraídos do corpo (e de cada
+#                         anexo); o HTML para de ser lido no limite
+#                         0 = sem limite                      (padrão: 0)
+#   AUTOU_EML_ANEXOS      1 = junta o texto dos anexos .pdf/.txt ao corpo
+#                         (extraídos em paralelo)               (padrão: 0)
+#   AUTOU_EML_MAX_ANEXOS  máx. anexos lidos por email           (padrão: 10)
 # ---------------------------------------------------------------------
 
+MAX_CHARS = int(os.getenv("AUTOU_EML_MAX_CHARS", "0")) or None
+ANEXOS = os.getenv("AUTOU_EML_ANEXOS", "0").strip() not in ("0", "false", "")
+MAX_ANEXOS = int(os.getenv("AUTOU_EML_MAX_ANEXOS", "10"))
 
-def _html_to_text(html: str) -> str:
+_BLOCO_HTML = 65536  # o HTML é entregue ao parser aos poucos (para cedo no limite)
+
+
+class _ExtratorTexto(HTMLParser):
+    """
+    HTML → texto sem montar árvore: guarda só os trechos de texto, cada um
+    sem espaços nas pontas, pulando <script>, <style> e <template> (mesma
+    saída do get_text(" ", strip=True) do BeautifulSoup, sem o custo da
+    árvore). Com `max_chars`, marca `cheio` ao atingir o limite.
+    """
+
+    IGNORAR = frozenset(("script", "style", "template"))
+
+    def __init__(self, max_chars: Optional[int] = None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.partes: List[str] = []
+        self.total = 0
+        self.cheio = False
+        self._trecho: List[str] = []  # pedaços do nó de texto atual
+        self._ignorando = 0
+
+    def _fechar_trecho(self):
+        if not self._trecho:
+            return
+        texto = "".join(self._trecho).strip()
+        self._trecho = []
+        if texto and not self.cheio:
+            self.partes.append(texto)
+            self.total += len(texto) + 1
+            if self.max_chars is not None and self.total >= self.max_chars:
+                self.cheio = True
+
+    def handle_starttag(self, tag, attrs):
+        self._fechar_trecho()
+        if tag in self.IGNORAR:
+            self._ignorando += 1
+
+    def handle_endtag(self, tag):
+        self._fechar_trecho()
+        if tag in self.IGNORAR and self._ignorando:
+            self._ignorando -= 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._fechar_trecho()
+
+    def handle_data(self, data):
+        if not self._ignorando:
+            self._trecho.append(data)
+
+    def handle_comment(self, data):
+        self._fechar_trecho()
+
+    def handle_decl(self, decl):
+        self._fechar_trecho()
+
+    def handle_pi(self, data):
+        self._fechar_trecho()
+
+    def unknown_decl(self, data):
+        self._fechar_trecho()
+        if data.startswith("CDATA[") and not self._ignorando:
+            self._trecho.append(data[6:])
+            self._fechar_trecho()
+
+    def texto(self) -> str:
+        self._fechar_trecho()
+        saida = " ".join(self.partes)
+        return saida[: self.max_chars] if self.max_chars is not None else saida
+
+
+def _html_to_text(html: str, max_chars: Optional[int] = None) -> str:
     """
     Converte HTML → texto simples.
 
-    Usamos o BeautifulSoup para:
-      - Remover tags (div, span, etc.).
+    Usamos um parser em streaming (html.parser da biblioteca padrão) para:
+      - Remover tags (div, span, etc.) e o conteúdo de script/style.
       - Preservar o conteúdo em texto.
       - Normalizar espaços em branco.
+      - Parar de ler ao atingir `max_chars` (HTML de marketing é enorme).
 
     Se der erro por algum HTML malformado, retorna o HTML original.
     """
     try:
-        soup = BeautifulSoup(html, "html.parser")
-        return soup.get_text(separator=" ", strip=True)
+        extrator = _ExtratorTexto(max_chars)
+        for i in range(0, len(html), _BLOCO_HTML):
+            extrator.feed(html[i:i + _BLOCO_HTML])
+            if extrator.cheio:
+                break
+        else:
+            extrator.close()
+        return extrator.texto()
     except Exception:
         return html
 
 
-def extract_text_from_eml(binary: bytes) -> str:
+def _texto_da_parte(part: EmailMessage, max_chars: Optional[int]) -> str:
+    if part.get_content_type() == "text/html":
+        return _html_to_text(part.get_content(), max_chars).strip()
+    texto = part.get_content().strip()
+    return texto[:max_chars] if max_chars is not None else texto
+
+
+def _corpo(msg: EmailMessage) -> Optional[EmailMessage]:
+    """
+    Parte com o corpo: text/plain de preferência, senão text/html.
+    O get_body segue só a estrutura do corpo (alternative/related), sem
+    entrar nos anexos; se não achar nada (ex.: corpo marcado como anexo),
+    cai na busca antiga pela primeira parte de texto.
+    """
+    corpo = msg.get_body(preferencelist=("plain", "html"))
+    if corpo is not None:
+        return corpo
+    for part in msg.walk():
+        if part.get_content_type() in ("text/plain", "text/html"):
+            return part
+    return None
+
+
+def _anexos(msg: EmailMessage, corpo: Optional[EmailMessage]) -> List[Tuple[str, bytes]]:
+    """Anexos com texto extraível: [(".pdf" | ".txt", bytes)] (no máximo MAX_ANEXOS)."""
+    achados: List[Tuple[str, bytes]] = []
+    for part in msg.walk():
+        if part is corpo or part.is_multipart():
+            continue
+        nome = (part.get_filename() or "").lower()
+        ctype = part.get_content_type()
+        if ctype == "application/pdf" or nome.endswith(".pdf"):
+            ext = ".pdf"
+        elif nome.endswith(".txt") or (ctype == "text/plain" and part.is_attachment()):
+            ext = ".txt"
+        else:
+            continue
+        dados = part.get_payload(decode=True)
+        if dados:
+            achados.append((ext, dados))
+            if len(achados) >= MAX_ANEXOS:
+                break
+    return achados
+
+
+def separar_eml(binary: Union[bytes, BinaryIO], anexos: bool = False,
+                max_chars: Optional[int] = MAX_CHARS) -> Tuple[str, List[Tuple[str, bytes]]]:
+    """
+    Texto do corpo + (com anexos=True) os anexos .pdf/.txt ainda brutos,
+    para quem chama extrair em paralelo (ver `texto_anexo`).
+    """
+    parser = BytesParser(policy=policy.default)
+    msg = parser.parse(binary) if hasattr(binary, "read") else parser.parsebytes(binary)
+    corpo = _corpo(msg)
+    texto = _texto_da_parte(corpo, max_chars) if corpo is not None else ""
+    return texto, (_anexos(msg, corpo) if anexos else [])
+
+
+def texto_anexo(ext: str, dados: bytes, max_chars: Optional[int] = MAX_CHARS) -> str:
+    """Texto de um anexo; anexo ilegível vira "" (não derruba o email)."""
+    try:
+        if ext == ".pdf":
+            from .pdf_reader import extract_text_from_pdf
+            return extract_text_from_pdf(dados, None, max_chars)
+        texto = dados.decode("utf-8", errors="ignore").strip()
+        return texto[:max_chars] if max_chars is not None else texto
+    except Exception:
+        return ""
+
+
+def juntar(corpo: str, textos_anexos: Iterable[str]) -> str:
+    return "\n\n".join(t for t in [corpo, *textos_anexos] if t).strip()
+
+
+def extract_text_from_eml(
+    binary: Union[bytes, BinaryIO],
+    anexos: Optional[bool] = None,
+    max_chars: Optional[int] = MAX_CHARS,
+    mapa: Callable = map,
+) -> str:
     """
-    Extrai o corpo textual de um email (.eml) recebido em bytes.
+    Extrai o corpo textual de um email (.eml) recebido em bytes ou como arquivo binário aberto.
 
     Fluxo:
-      1. Parseia o conteúdo binário com o parser oficial do Python (policy default).
-      2. Se for multipart:
-           - Procura primeiro por "text/plain".
-           - Se não achar, tenta "text/html" e converte para texto.
-      3. Se não for multipart:
-           - Verifica se é plain ou html e trata do mesmo jeito.
+      1. Parseia o conteúdo com o parser oficial do Python (policy default);
+         arquivos são lidos em streaming, sem montar um `bytes` inteiro.
+      2. Procura o corpo (sem varrer os anexos):
+           - Primeiro "text/plain".
+           - Se não achar, "text/html" convertido para texto.
+      3. Com anexos=True (padrão: AUTOU_EML_ANEXOS), junta o texto dos
+         anexos .pdf/.txt; `mapa` permite extraí-los em paralelo
+         (ex.: `ProcessPoolExecutor().map`).
       4. Se não conseguir nada, retorna string vazia.
 
     Essa ordem garante:
@@ -45,23 +217,8 @@ def extract_text_from_eml(binary: bytes) -> str:
       - Fallback para HTML.
       - Nunca quebra: sempre retorna string.
     """
-    msg = BytesParser(policy=policy.default).parsebytes(binary)
-
-    if msg.is_multipart():
-        # Emails podem ter várias "partes" (texto, HTML, anexos…)
-        for part in msg.walk():
-            ctype = part.get_content_type()
-            if ctype == "text/plain":
-                return part.get_content().strip()
-            if ctype == "text/html":
-                return _html_to_text(part.get_content()).strip()
-    else:
-        # Caso simples: apenas uma parte
-        ctype = msg.get_content_type()
-        if ctype == "text/plain":
-            return msg.get_content().strip()
-        if ctype == "text/html":
-            return _html_to_text(msg.get_content()).strip()
-
-    # Última linha de defesa: nada encontrado
-    return ""
+    corpo, lista = separar_eml(binary, ANEXOS if anexos is None else anexos, max_chars)
+    if not lista:
+        return corpo
+    exts, dados = zip(*lista)
+    return juntar(corpo, mapa(texto_anexo, exts, dados, [max_chars] * len(lista)))
@@ -0,0 +1,152 @@
+import asyncio
+import contextvars
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+
+from . import metricas
+from .classifier import aquecer_modelo
+
+# ---------------------------------------------------------------------
+# Este módulo tira do event loop o trabalho CPU-bound (extração de PDF/EML
+# e classificação). Rodar isso direto dentro do `async def` trava todas
+# as conexões do worker do uvicorn enquanto um PDF grande é lido.
+#
+# Dois pools:
+#   - leve:   threads (EML, textos curtos)
+#   - pesado: processos (PDF, inferência em textos grandes) no modo
+#             "process"; threads no modo "thread"
+# Cada pool aceita no máximo N tarefas entre execução e fila. Passou
+# disso, `Saturado` é levantado e a API responde 503 (backpressure), em
+# vez de acumular requisições e degradar a latência de todo mundo.
+#
+# Threads recebem uma cópia do contexto (ContextVars, ex.: o tipo de
+# entrada das métricas); processos devolvem as métricas observadas
+# junto com o resultado, para o /metrics do processo principal.
+#
+# Configuração (.env):
+#   AUTOU_EXECUTOR       thread | process | inline   (padrão: thread)
+#   AUTOU_THREADS        threads do pool leve        (padrão: 4)
+#   AUTOU_PROCESSOS      workers do pool pesado      (padrão: nº de CPUs)
+#   AUTOU_FILA_LEVE      máx. tarefas no pool leve   (padrão: 64)
+#   AUTOU_FILA_PESADA    máx. tarefas no pool pesado (padrão: 16)
+#   AUTOU_LIMIAR_PESADO  textos acima de N caracteres vão para o pool pesado
+# ---------------------------------------------------------------------
+
+MODO = os.getenv("AUTOU_EXECUTOR", "thread").strip().lower()
+THREADS = int(os.getenv("AUTOU_THREADS", "4"))
+PROCESSOS = int(os.getenv("AUTOU_PROCESSOS", str(os.cpu_count() or 2)))
+FILA_LEVE = int(os.getenv("AUTOU_FILA_LEVE", "64"))
+FILA_PESADA = int(os.getenv("AUTOU_FILA_PESADA", "16"))
+LIMIAR_PESADO = int(os.getenv("AUTOU_LIMIAR_PESADO", "20000"))
+
+
+class Saturado(RuntimeError):
+    """Pool sem vaga: a requisição deve ser recusada com 503."""
+
+
+class Pool:
+    """
+    Executor com limite de tarefas pendentes (em execução + na fila).
+
+    O contador só é alterado dentro do event loop, então não precisa de lock.
+    Sem fábrica (modo "inline") a função roda direto, como antes.
+    """
+
+    def __init__(self, nome: str, fabrica: Optional[Callable[[], Executor]], max_pendentes: int,
+                 processos: bool = False):
+        self.nome = nome
+        self.processos = processos  # argumentos precisam ser picláveis (sem arquivos abertos)
+        self.max_pendentes = max_pendentes
+        self.pendentes = 0
+        self._fabrica = fabrica
+        self._executor: Optional[Executor] = None
+
+    def _obter(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._fabrica()
+        return self._executor
+
+    async def rodar(self, fn: Callable, *args):
+        if self._fabrica is None:
+            return fn(*args)
+        if self.pendentes >= self.max_pendentes:
+            raise Saturado(f"Pool '{self.nome}' saturado ({self.pendentes} tarefas pendentes).")
+        self.pendentes += 1
+        try:
+            loop = asyncio.get_running_loop()
+            if self.processos:
+                resultado, observacoes = await loop.run_in_executor(
+                    self._obter(), metricas.executar_capturando, fn, metricas.tipo_entrada.get(), args
+                )
+                metricas.reproduzir(observacoes)
+                return resultado
+            ctx = contextvars.copy_context()
+            return await loop.run_in_executor(self._obter(), partial(ctx.run, fn, *args))
+        finally:
+            self.pendentes -= 1
+
+    def estado(self) -> dict:
+        return {"pendentes": self.pendentes, "max_pendentes": self.max_pendentes}
+
+    def reciclar(self):
+        """
+        Troca o executor por um novo (criado sob demanda). O antigo termina
+        o que já recebeu — nada em andamento é derrubado. Usado após recarregar
+        o modelo, para os processos novos já nascerem com ele.
+        """
+        antigo, self._executor = self._executor, None
+        if antigo is not None:
+            antigo.shutdown(wait=False)
+
+    def encerrar(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _fabrica_threads(prefixo: str) -> Callable[[], Executor]:
+    return lambda: ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix=prefixo)
+
+
+def _fabrica_processos() -> Executor:
+    # "spawn" evita herdar via fork o estado do event loop e das threads do uvicorn;
+    # cada processo novo carrega e aquece o modelo antes de receber trabalho
+    return ProcessPoolExecutor(
+        max_workers=PROCESSOS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=aquecer_modelo,
+    )
+
+
+if MODO == "inline":
+    leve = Pool("leve", None, FILA_LEVE)
+    pesado = Pool("pesado", None, FILA_PESADA)
+elif MODO == "process":
+    leve = Pool("leve", _fabrica_threads("autou-leve"), FILA_LEVE)
+    pesado = Pool("pesado", _fabrica_processos, FILA_PESADA, processos=True)
+else:
+    leve = Pool("leve", _fabrica_threads("autou-leve"), FILA_LEVE)
+    pesado = Pool("pesado", _fabrica_threads("autou-pesado"), FILA_PESADA)
+
+
+def pool_para_texto(texto: str) -> Pool:
+    """Textos curtos ficam no pool leve; textos grandes vão para o pesado."""
+    return pesado if len(texto) > LIMIAR_PESADO else leve
+
+
+def estado() -> dict:
+    """Resumo para o /config."""
+    return {
+        "modo": MODO,
+        "limiar_pesado": LIMIAR_PESADO,
+        "leve": leve.estado(),
+        "pesado": pesado.estado(),
+    }
+
+
+def encerrar():
+    leve.encerrar()
+    pesado.encerrar()
@@ -0,0 +1,483 @@
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import urllib.parse
+import urllib.request
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .executor import Saturado
+
+# ---------------------------------------------------------------------
+# Jobs assíncronos: POST /jobs devolve um id na hora e a classificação
+# roda em segundo plano; GET /jobs/{id} consulta o estado/resultado e,
+# se houver callback_url, o job pronto é enviado por POST para ela.
+#
+#   pendente → processando → concluido | erro
+#
+# Concorrência limitada: no máximo AUTOU_JOBS_CONCORRENCIA jobs rodando
+# ao mesmo tempo (os outros esperam a vez) e no máximo AUTOU_JOBS_FILA
+# jobs abertos — passou disso, 503. Assim uma enxurrada de PDFs grandes
+# ocupa só alguns lugares dos pools e o /classify interativo segue
+# atendendo. Um job que encontra o pool cheio espera e tenta de novo, em
+# vez de falhar como a requisição síncrona — até AUTOU_JOBS_ESPERA_MAX
+# segundos; depois disso vira "erro" e libera a vaga.
+#
+# Estado dos jobs num armazenamento trocável (classe `Armazem`):
+#   - memória (padrão): só serve a um worker. Com `uvicorn --workers N`,
+#     o GET /jobs/{id} que cair em outro worker dá 404 — use o SQLite.
+#   - SQLite (AUTOU_JOBS_SQLITE): compartilhado pelos workers da máquina e
+#     sobrevive a reinícios. Cada job guarda o dono (pid + id aleatório do
+#     boot do worker) e cada worker renova um batimento a cada
+#     AUTOU_JOBS_BATIMENTO segundos; jobs abertos de um dono sem batimento
+#     há 3 intervalos (worker morto/reciclado) viram "erro" — o upload não
+#     fica guardado. Os de workers vivos não são tocados.
+# Jobs terminados expiram depois de AUTOU_JOBS_TTL segundos.
+#
+# callback_url (SSRF): o servidor faz POST para uma URL escolhida pelo
+# cliente, então só aceita hosts que resolvem para endereços públicos
+# (nada de loopback, rede privada, link-local/metadados de nuvem...). Com
+# AUTOU_CALLBACK_HOSTS, só os hosts da lista (que podem ser internos). A
+# checagem se repete na hora do envio (o DNS pode ter mudado) e
+# redirecionamentos não são seguidos.
+#
+# Configuração (.env):
+#   AUTOU_JOBS_CONCORRENCIA      jobs rodando ao mesmo tempo   (padrão: 2)
+#   AUTOU_JOBS_FILA              máx. jobs abertos             (padrão: 100)
+#   AUTOU_JOBS_TTL               validade dos terminados, s    (padrão: 3600)
+#   AUTOU_JOBS_MAX               máx. jobs guardados em memória (padrão: 10000)
+#   AUTOU_JOBS_SQLITE            caminho do .sqlite; vazio = memória
+#   AUTOU_JOBS_CALLBACK_TIMEOUT  timeout do POST de callback   (padrão: 10)
+#   AUTOU_JOBS_ESPERA_MAX        máx. s esperando pool cheio   (padrão: 300)
+#   AUTOU_JOBS_BATIMENTO         batimento do worker no SQLite, s (padrão: 10)
+#   AUTOU_CALLBACK_HOSTS         hosts permitidos p/ callback, separados por
+#                                vírgula (".exemplo.com" = subdomínios);
+#                                vazio = qualquer host público
+# ---------------------------------------------------------------------
+
+CONCORRENCIA = int(os.getenv("AUTOU_JOBS_CONCORRENCIA", "2"))
+MAX_ABERTOS = int(os.getenv("AUTOU_JOBS_FILA", "100"))
+TTL = float(os.getenv("AUTOU_JOBS_TTL", "3600"))
+MAX_JOBS = int(os.getenv("AUTOU_JOBS_MAX", "10000"))
+CALLBACK_TIMEOUT = float(os.getenv("AUTOU_JOBS_CALLBACK_TIMEOUT", "10"))
+CALLBACK_HOSTS = tuple(h.strip().lower().rstrip(".") for h in os.getenv("AUTOU_CALLBACK_HOSTS", "").split(",") if h.strip())
+CALLBACK_TENTATIVAS = 3
+ESPERA_SATURADO = 0.5  # segundos entre tentativas quando o pool está cheio
+ESPERA_MAX = float(os.getenv("AUTOU_JOBS_ESPERA_MAX", "300"))
+BATIMENTO = float(os.getenv("AUTOU_JOBS_BATIMENTO", "10"))
+
+ABERTOS = ("pendente", "processando")
+
+# id, estado, tipo, criado_em, iniciado_em, concluido_em, resultado, erro,
+# callback_url, callback_estado
+Job = Dict[str, Any]
+
+
+class Armazem(ABC):
+    """Interface do armazenamento de jobs. Implementações: memória e SQLite."""
+
+    @abstractmethod
+    def criar(self, job: Job):
+        ...
+
+    @abstractmethod
+    def atualizar(self, job_id: str, **campos):
+        ...
+
+    @abstractmethod
+    def obter(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def contar(self) -> Dict[str, int]:
+        """Quantidade de jobs por estado."""
+
+    @abstractmethod
+    def expurgar(self, antes_de: float) -> int:
+        """Remove jobs terminados antes de `antes_de` (timestamp)."""
+
+    def renovar(self):
+        """Batimento deste worker (armazéns compartilhados entre processos)."""
+
+    def interromper_abertos(self) -> int:
+        """Jobs abertos de workers que morreram sem terminá-los viram erro."""
+        return 0
+
+
+class ArmazemMemoria(Armazem):
+    """
+    Dicionário em memória; acima de `max_jobs`, descarta os terminados mais
+    antigos. Um worker só: outro processo não enxerga estes jobs.
+    """
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def criar(self, job: Job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            if len(self._jobs) > self.max_jobs:
+                for job_id in [i for i, j in self._jobs.items() if j["estado"] not in ABERTOS]:
+                    del self._jobs[job_id]
+                    if len(self._jobs) <= self.max_jobs:
+                        break
+
+    def atualizar(self, job_id: str, **campos):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(campos)
+
+    def obter(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def contar(self) -> Dict[str, int]:
+        with self._lock:
+            cont: Dict[str, int] = {}
+            for job in self._jobs.values():
+                cont[job["estado"]] = cont.get(job["estado"], 0) + 1
+            return cont
+
+    def expurgar(self, antes_de: float) -> int:
+        with self._lock:
+            velhos = [i for i, j in self._jobs.items()
+                      if j["estado"] not in ABERTOS and (j.get("concluido_em") or 0) < antes_de]
+            for job_id in velhos:
+                del self._jobs[job_id]
+            return len(velhos)
+
+
+class ArmazemSQLite(Armazem):
+    """
+    Uma linha por job (estado/tempos/dono em colunas p/ consulta, o job
+    inteiro em JSON) e uma por worker vivo (`donos`, com o último batimento).
+    """
+
+    def __init__(self, caminho: str, batimento: float = BATIMENTO):
+        import sqlite3  # só quem usa AUTOU_JOBS_SQLITE paga o import
+
+        # pid sozinho se repete (reinício do container, pid reaproveitado)
+        self.dono = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        self.batimento = batimento
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, estado TEXT NOT NULL,"
+            " criado_em REAL NOT NULL, concluido_em REAL, dados TEXT NOT NULL, dono TEXT)"
+        )
+        colunas = {r[1] for r in self._db.execute("PRAGMA table_info(jobs)")}
+        if "dono" not in colunas:  # tabela criada antes do dono existir
+            self._db.execute("ALTER TABLE jobs ADD COLUMN dono TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_estado ON jobs (estado, concluido_em)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS donos (dono TEXT PRIMARY KEY, visto_em REAL NOT NULL)")
+        self._db.commit()
+        self.renovar()
+
+    def _gravar(self, job: Job, dono: Optional[str] = None):
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs (id, estado, criado_em, concluido_em, dados, dono) VALUES (?, ?, ?, ?, ?, ?)",
+            (job["id"], job["estado"], job["criado_em"], job.get("concluido_em"),
+             json.dumps(job, ensure_ascii=False), dono),
+        )
+        self._db.commit()
+
+    def _ler(self, job_id: str) -> Optional[Job]:
+        row = self._db.execute("SELECT dados FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _dono(self, job_id: str) -> Optional[str]:
+        row = self._db.execute("SELECT dono FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def criar(self, job: Job):
+        with self._lock:
+            self._gravar(job, self.dono)
+
+    def atualizar(self, job_id: str, **campos):
+        with self._lock:
+            job = self._ler(job_id)
+            if job is not None:
+                job.update(campos)
+                self._gravar(job, self._dono(job_id))
+
+    def obter(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._ler(job_id)
+
+    def contar(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute("SELECT estado, COUNT(*) FROM jobs GROUP BY estado").fetchall())
+
+    def expurgar(self, antes_de: float) -> int:
+        with self._lock:
+            cur = self._db.execute(
+                "DELETE FROM jobs WHERE estado NOT IN (?, ?) AND concluido_em < ?", (*ABERTOS, antes_de)
+            )
+            self._db.commit()
+            return cur.rowcount
+
+    def renovar(self):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO donos (dono, visto_em) VALUES (?, ?)",
+                             (self.dono, time.time()))
+            self._db.commit()
+
+    def interromper_abertos(self) -> int:
+        """Só os jobs de donos sem batimento há 3 intervalos (ou sem dono: tabela antiga)."""
+        agora = time.time()
+        with self._lock:
+            ids = [r[0] for r in self._db.execute(
+                "SELECT id FROM jobs WHERE estado IN (?, ?) AND (dono IS NULL OR dono NOT IN"
+                " (SELECT dono FROM donos WHERE visto_em >= ?))",
+                (*ABERTOS, agora - 3 * self.batimento)).fetchall()]
+            self._db.execute("DELETE FROM donos WHERE visto_em < ?", (agora - 3 * self.batimento,))
+            self._db.commit()
+        for job_id in ids:
+            self.atualizar(job_id, estado="erro", concluido_em=agora,
+                           erro="Interrompido: o worker que rodava o job parou antes de terminar.")
+        return len(ids)
+
+
+def _criar_armazem() -> Armazem:
+    caminho = (os.getenv("AUTOU_JOBS_SQLITE") or "").strip()
+    if caminho:
+        try:
+            return ArmazemSQLite(caminho)
+        except Exception:
+            traceback.print_exc()
+    return ArmazemMemoria(MAX_JOBS)
+
+
+# ---------------------------------------------------------------------
+# Callback
+# ---------------------------------------------------------------------
+def _host_permitido(host: str) -> bool:
+    return any(host == h or (h.startswith(".") and host.endswith(h)) for h in CALLBACK_HOSTS)
+
+
+def validar_callback(url: str) -> str:
+    """
+    Levanta ValueError se a URL não puder receber o callback: esquema que não
+    é http(s), host fora de AUTOU_CALLBACK_HOSTS (se configurada) ou, sem
+    lista, host que não resolve ou resolve para algum endereço não público.
+    Faz resolução de DNS (bloqueante).
+    """
+    partes = urllib.parse.urlsplit(url)
+    if partes.scheme.lower() not in ("http", "https"):
+        raise ValueError("callback_url deve ser http:// ou https://.")
+    try:
+        host = (partes.hostname or "").rstrip(".")
+        porta = partes.port
+    except ValueError:
+        raise ValueError("callback_url inválida.")
+    if not host:
+        raise ValueError("callback_url sem host.")
+    if CALLBACK_HOSTS:
+        if not _host_permitido(host):
+            raise ValueError(f"Host de callback não permitido: {host}.")
+        return url
+    try:
+        enderecos = socket.getaddrinfo(host, porta or 80, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"Host de callback não resolve: {host}.")
+    for *_, sockaddr in enderecos:
+        ip = ipaddress.ip_address(sockaddr[0].split("%", 1)[0])
+        ip = getattr(ip, "ipv4_mapped", None) or ip
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"Host de callback resolve para endereço não público: {host} ({ip}).")
+    return url
+
+
+class _SemRedirecionar(urllib.request.HTTPRedirectHandler):
+    """Um 3xx levaria o POST para outro host sem passar pela validação."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_abridor = urllib.request.build_opener(_SemRedirecionar)
+
+
+def _post_json(url: str, corpo: bytes):
+    validar_callback(url)
+    req = urllib.request.Request(url, data=corpo, method="POST",
+                                 headers={"Content-Type": "application/json", "User-Agent": "autou-jobs"})
+    with _abridor.open(req, timeout=CALLBACK_TIMEOUT) as r:
+        r.read()
+
+
+# ---------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------
+
+
+class FilaJobs:
+    """
+    Roda cada job como uma tarefa do event loop, com no máximo `concorrencia`
+    ao mesmo tempo. O trabalho pesado em si (extração/classificação) vai
+    para os pools do executor, como no /classify.
+    """
+
+    def __init__(self, armazem: Armazem, concorrencia: int, max_abertos: int, ttl: float):
+        self.armazem = armazem
+        self.concorrencia = concorrencia
+        self.max_abertos = max_abertos
+        self.ttl = ttl
+        self.abertos = 0  # só alterado dentro do event loop
+        self.rodando = 0
+        self._semaforo: Optional[asyncio.Semaphore] = None  # criado dentro do loop (_semaforo_do_loop)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tarefas = set()
+        self._ultimo_expurgo = 0.0
+
+    def enviar(self, trabalho: Callable[[], Awaitable[dict]], tipo: str,
+               callback_url: Optional[str] = None, limpar: Optional[Callable[[], None]] = None) -> Job:
+        """
+        Cria o job e agenda `trabalho` (uma corrotina sem argumentos que devolve
+        o payload da classificação). `limpar` roda ao final (ex.: apagar a cópia
+        do upload). Levanta `Saturado` se já houver `max_abertos` jobs abertos.
+        """
+        if self.abertos >= self.max_abertos:
+            raise Saturado(f"Fila de jobs cheia ({self.abertos} jobs abertos).")
+        self._expurgar()
+        job: Job = {
+            "id": uuid.uuid4().hex,
+            "estado": "pendente",
+            "tipo": tipo,
+            "criado_em": time.time(),
+            "callback_url": callback_url,
+            "callback_estado": "pendente" if callback_url else None,
+        }
+        self.armazem.criar(job)
+        self.abertos += 1
+        tarefa = asyncio.create_task(self._rodar(job["id"], trabalho, callback_url, limpar))
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+        return job
+
+    def _semaforo_do_loop(self) -> asyncio.Semaphore:
+        """
+        O semáforo pertence ao event loop em que é usado pela primeira vez:
+        criado aqui, e não no import, e recriado se o loop mudar (testes,
+        reload do servidor).
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaforo is None or self._loop is not loop:
+            self._semaforo = asyncio.Semaphore(max(1, self.concorrencia))
+            self._loop = loop
+        return self._semaforo
+
+    async def _rodar(self, job_id: str, trabalho: Callable[[], Awaitable[dict]],
+                     callback_url: Optional[str], limpar: Optional[Callable[[], None]]):
+        try:
+            async with self._semaforo_do_loop():
+                self.rodando += 1
+                try:
+                    self.armazem.atualizar(job_id, estado="processando", iniciado_em=time.time())
+                    limite = time.monotonic() + ESPERA_MAX
+                    while True:
+                        try:
+                            resultado = await trabalho()
+                            break
+                        except Saturado:
+                            if time.monotonic() >= limite:
+                                raise Saturado(f"Servidor ocupado: o job esperou {ESPERA_MAX:.0f}s por vaga nos pools.")
+                            await asyncio.sleep(ESPERA_SATURADO)
+                finally:
+                    self.rodando -= 1
+            self.armazem.atualizar(job_id, estado="concluido", resultado=resultado, concluido_em=time.time())
+        except asyncio.CancelledError:
+            self.armazem.atualizar(job_id, estado="erro", concluido_em=time.time(),
+                                   erro="Cancelado: o servidor foi encerrado.")
+            raise
+        except Exception as e:
+            # HTTPException do app traz a mensagem em `detail`
+            self.armazem.atualizar(job_id, estado="erro", concluido_em=time.time(),
+                                   erro=str(getattr(e, "detail", None) or e))
+        finally:
+            self.abertos -= 1
+            if limpar is not None:
+                try:
+                    limpar()
+                except Exception:
+                    traceback.print_exc()
+        if callback_url:
+            await self._notificar(job_id, callback_url)
+
+    async def _notificar(self, job_id: str, url: str):
+        """POST do job terminado na callback_url (3 tentativas: 0s, 1s, 2s)."""
+        job = self.armazem.obter(job_id)
+        if job is None:
+            return
+        corpo = json.dumps(job, ensure_ascii=False).encode("utf-8")
+        erro = None
+        for tentativa in range(CALLBACK_TENTATIVAS):
+            if tentativa:
+                await asyncio.sleep(tentativa)
+            try:
+                await asyncio.to_thread(_post_json, url, corpo)
+                self.armazem.atualizar(job_id, callback_estado="enviado")
+                return
+            except Exception as e:
+                erro = e
+        self.armazem.atualizar(job_id, callback_estado=f"falhou: {erro}")
+
+    async def vigiar(self):
+        """
+        Tarefa de fundo (lifespan): renova o batimento deste worker e fecha
+        os jobs órfãos de workers mortos — logo no startup e depois a cada
+        `BATIMENTO` segundos.
+        """
+        while True:
+            try:
+                self.armazem.renovar()
+                self.armazem.interromper_abertos()
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(BATIMENTO)
+
+    def _expurgar(self):
+        agora = time.time()
+        if self.ttl > 0 and agora - self._ultimo_expurgo > 60:
+            self._ultimo_expurgo = agora
+            try:
+                self.armazem.expurgar(agora - self.ttl)
+            except Exception:
+                traceback.print_exc()
+
+    def obter(self, job_id: str) -> Optional[Job]:
+        self._expurgar()
+        job = self.armazem.obter(job_id)
+        if job is not None and self.ttl > 0 and job.get("concluido_em") and job["concluido_em"] < time.time() - self.ttl:
+            return None
+        return job
+
+    def estado(self) -> dict:
+        """Resumo para o /config."""
+        return {
+            "concorrencia": self.concorrencia,
+            "abertos": self.abertos,
+            "rodando": self.rodando,
+            "max_abertos": self.max_abertos,
+            "armazem": "sqlite" if isinstance(self.armazem, ArmazemSQLite) else "memoria",
+            "por_estado": self.armazem.contar(),
+        }
+
+    def encerrar(self):
+        for tarefa in list(self._tarefas):
+            tarefa.cancel()
+
+
+fila = FilaJobs(_criar_armazem(), CONCORRENCIA, MAX_ABERTOS, TTL)
@@ -0,0 +1,215 @@
+import bisect
+import contextlib
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# ---------------------------------------------------------------------
+# Métricas do pipeline no formato texto do Prometheus (GET /metrics).
+#
+# Histogramas por estágio (leitura do upload, extração, pontuação,
+# inferência, classificação) com rótulo do tipo de entrada
+# (texto/.txt/.pdf/.eml) e, quando já se sabe, da origem
+# (modelo/heuristica). Contadores de fallback para heurística e de
+# falhas de carga do modelo.
+#
+# O tipo de entrada viaja num ContextVar (o executor copia o contexto
+# para as threads). Em processos do pool, as observações são capturadas
+# no filho e reaplicadas no processo principal (`executar_capturando`).
+#
+# Desligado (AUTOU_METRICAS=0), `estagio()` devolve um nullcontext
+# compartilhado e `observar`/`contar` retornam na primeira linha.
+# Com vários workers do uvicorn, cada worker tem seu próprio registro.
+# ---------------------------------------------------------------------
+
+ATIVO = os.getenv("AUTOU_METRICAS", "1").strip() not in ("0", "false", "")
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+tipo_entrada: ContextVar[str] = ContextVar("tipo_entrada", default="texto")
+_captura: ContextVar[Optional[list]] = ContextVar("captura_metricas", default=None)
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(nomes: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class Histograma:
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str], buckets: Sequence[float] = BUCKETS):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}  # rótulos -> [contagens por bucket, soma, total]
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, valores: Tuple[str, ...]):
+        i = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * len(self.buckets), 0.0, 0]
+            if i < len(self.buckets):
+                serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            series = [(v, list(s[0]), s[1], s[2]) for v, s in sorted(self._series.items())]
+        for valores, contagens, soma, total in series:
+            acumulado = 0
+            for limite, c in zip(self.buckets, contagens):
+                acumulado += c
+                le = f'le="{limite}"'
+                linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, valores, le)} {acumulado}")
+            le = 'le="+Inf"'
+            linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, valores, le)} {total}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, valores)} {soma}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, valores)} {total}")
+        return linhas
+
+
+class Contador:
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome, self.ajuda, self.rotulos = nome, ajuda, tuple(rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def somar(self, valor: float, valores: Tuple[str, ...]):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + valor
+
+    def exportar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        with self._lock:
+            itens = sorted(self._valores.items())
+        linhas += [f"{self.nome}{_rotulos(self.rotulos, v)} {total}" for v, total in itens]
+        return linhas
+
+
+# ---------------------------------------------------------------------
+# Registro
+# ---------------------------------------------------------------------
+_METRICAS = {
+    "estagio": Histograma(
+        "autou_estagio_segundos", "Duração de cada estágio do pipeline.", ("estagio", "tipo")),
+    "classificacao": Histograma(
+        "autou_classificacao_segundos", "Duração da classificação completa por origem.", ("tipo", "origem")),
+    "requisicao": Histograma(
+        "autou_requisicao_segundos", "Duração das requisições de classificação.", ("rota", "tipo", "origem")),
+    "fallback_heuristica": Contador(
+        "autou_fallback_heuristica_total", "Classificações que caíram na heurística (modelo indisponível).", ("tipo",)),
+    "falha_carga_modelo": Contador(
+        "autou_falha_carga_modelo_total", "Falhas ao carregar o model.pkl."),
+    "feedback": Contador(
+        "autou_feedback_total", "Correções de revisores recebidas no POST /feedback.", ("categoria",)),
+    "atraso_loop": Histograma(
+        "autou_event_loop_atraso_segundos",
+        "Atraso do event loop além do agendado (alto = algo bloqueando o loop).", ()),
+    "atualizacao_online": Histograma(
+        "autou_atualizacao_online_segundos", "Duração de cada atualização incremental do modelo online.", ()),
+}
+
+# Coletores extras chamados na exportação (ex.: contadores do cache)
+_coletores: List[Callable[[], List[str]]] = []
+
+
+def registrar_coletor(fn: Callable[[], List[str]]):
+    _coletores.append(fn)
+
+
+def observar(metrica: str, valor: float, *valores: str):
+    """Observa um valor num histograma (ou acumula, se estiver capturando num processo filho)."""
+    if not ATIVO:
+        return
+    captura = _captura.get()
+    if captura is not None:
+        captura.append((metrica, valor, valores))
+        return
+    _METRICAS[metrica].observar(valor, valores)
+
+
+def contar(metrica: str, *valores: str, valor: float = 1):
+    if not ATIVO:
+        return
+    captura = _captura.get()
+    if captura is not None:
+        captura.append((metrica, valor, valores))
+        return
+    _METRICAS[metrica].somar(valor, valores)
+
+
+class _Cronometro:
+    __slots__ = ("nome", "t0")
+
+    def __init__(self, nome: str):
+        self.nome = nome
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observar("estagio", time.perf_counter() - self.t0, self.nome, tipo_entrada.get())
+        return False
+
+
+_NULO = contextlib.nullcontext()
+
+
+def estagio(nome: str):
+    """`with estagio("pontuacao"): ...` → histograma autou_estagio_segundos."""
+    return _Cronometro(nome) if ATIVO else _NULO
+
+
+@contextlib.contextmanager
+def descartando():
+    """Ignora as observações do bloco (ex.: predições de aquecimento)."""
+    tok = _captura.set([])
+    try:
+        yield
+    finally:
+        _captura.reset(tok)
+
+
+# ---------------------------------------------------------------------
+# Processos do pool: captura no filho, reaplica no principal
+# ---------------------------------------------------------------------
+def executar_capturando(fn: Callable, tipo: str, args: tuple):
+    """Roda no processo filho: devolve (resultado, observações feitas durante a chamada)."""
+    observacoes: list = []
+    tok_tipo = tipo_entrada.set(tipo)
+    tok_cap = _captura.set(observacoes)
+    try:
+        return fn(*args), observacoes
+    finally:
+        _captura.reset(tok_cap)
+        tipo_entrada.reset(tok_tipo)
+
+
+def reproduzir(observacoes: list):
+    for metrica, valor, valores in observacoes:
+        m = _METRICAS[metrica]
+        if isinstance(m, Histograma):
+            m.observar(valor, valores)
+        else:
+            m.somar(valor, valores)
+
+
+def exportar() -> str:
+    """Texto no formato de exposição do Prometheus (0.0.4)."""
+    linhas: List[str] = []
+    for m in _METRICAS.values():
+        linhas += m.exportar()
+    for coletor in _coletores:
+        linhas += coletor()
+    return "\n".join(linhas) + "\n"
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# ---------------------------------------------------------------------
+# Runtime leve de inferência: reproduz o `predict_proba` do Pipeline
+# TF-IDF + LogisticRegression só com NumPy, sem importar sklearn/scipy/
+# joblib no servidor.
+#
+# Formato exportado pelo `train_classifier.py --exportar-leve` (uma pasta):
+#   termos.npy   vocabulário em bytes UTF-8, ordenado (busca por searchsorted)
+#   idf.npy      pesos IDF, na ordem de termos.npy
+#   coef.npy     coeficientes da regressão, na ordem de termos.npy
+#   meta.json    classes, intercepto, configuração do analisador e sha256
+#                do model.pkl de origem (detecta exportação velha)
+#
+# Os .npy são abertos com mmap_mode="r": com `uvicorn --workers N` (ou o
+# pool de processos) todos os processos compartilham as mesmas páginas
+# físicas do page cache, em vez de cada um ter sua cópia do modelo.
+#
+# Só cobre o que o treino usa: analyzer="word" com token_pattern,
+# lowercase, n-gramas, sublinear_tf, norm l2/None e classificação binária,
+# com ou sem o passo "preprocessamento" (nlp_preprocess.limpar_textos, que
+# só é importado se o modelo usar). Qualquer outra configuração é recusada
+# na exportação.
+# ---------------------------------------------------------------------
+
+FORMATO = 2
+ARQUIVOS = ("meta.json", "termos.npy", "idf.npy", "coef.npy")
+
+
+def caminhos(base: Path) -> List[Path]:
+    """Arquivos do modelo exportado (meta.json primeiro)."""
+    return [base / nome for nome in ARQUIVOS]
+
+
+class ModeloLeve:
+    """Mesma interface usada pelo classifier: `predict_proba(textos)` e `classes_`."""
+
+    def __init__(self, termos: np.ndarray, idf: np.ndarray, coef: np.ndarray, intercepto: float,
+                 classes: List[str], config: dict):
+        if not (len(termos) == len(idf) == len(coef)):
+            raise ValueError("Vocabulário, idf e coeficientes com tamanhos diferentes.")
+        self.termos = termos          # dtype "S<largura>", ordenado
+        self.idf = idf
+        self.coef = coef
+        self.intercepto = float(intercepto)
+        self.classes_ = list(classes)
+        self._largura = termos.dtype.itemsize
+        self._token = re.compile(config["token_pattern"])
+        self._min_n, self._max_n = config["ngram_range"]
+        self._minusculas = config["lowercase"]
+        self._sublinear = config["sublinear_tf"]
+        self._binario = config["binary"]
+        self._norma_l2 = config["norm"] == "l2"
+        self._preprocessar = config.get("preprocessar", False)
+
+    def _gramas(self, texto: str) -> Counter:
+        """Contagem dos n-gramas do texto (mesmo analisador do TfidfVectorizer)."""
+        if self._minusculas:
+            texto = texto.lower()
+        tokens = self._token.findall(texto)
+        cont: Counter = Counter()
+        for n in range(self._min_n, min(self._max_n, len(tokens)) + 1):
+            if n == 1:
+                cont.update(tokens)
+            else:
+                cont.update(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return cont
+
+    def _colunas(self, texto: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(posições no vocabulário, contagens) dos termos conhecidos do texto."""
+        cont = self._gramas(texto)
+        largura = self._largura
+        brutos, contagens = [], []
+        for grama, c in cont.items():
+            b = grama.encode("utf-8")
+            if len(b) <= largura:  # mais largo que o maior termo: fora do vocabulário
+                brutos.append(b)
+                contagens.append(c)
+        if not brutos or not len(self.termos):
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        alvo = np.array(brutos, dtype=self.termos.dtype)
+        pos = np.searchsorted(self.termos, alvo)
+        pos[pos == len(self.termos)] = 0
+        achou = self.termos[pos] == alvo
+        return pos[achou], np.asarray(contagens)[achou]
+
+    def decision_function(self, textos: List[str]) -> np.ndarray:
+        if self._preprocessar:
+            from .nlp_preprocess import limpar_textos
+            textos = limpar_textos(textos)
+        saida = np.full(len(textos), self.intercepto)
+        for k, texto in enumerate(textos):
+            cols, contagens = self._colunas(texto)
+            if not len(cols):
+                continue
+            tf = contagens.astype(np.float64)
+            if self._binario:
+                tf[:] = 1.0
+            elif self._sublinear:
+                tf = np.log(tf) + 1.0
+            pesos = tf * self.idf[cols]
+            produto = float(pesos @ self.coef[cols])
+            if self._norma_l2:
+                produto /= float(np.sqrt(pesos @ pesos))
+            saida[k] += produto
+        return saida
+
+    def predict_proba(self, textos: List[str]) -> np.ndarray:
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(textos)))
+        return np.column_stack([1.0 - p, p])
+
+
+# ---------------------------------------------------------------------
+# Exportação (roda no treino, com o Pipeline do sklearn em mãos)
+# ---------------------------------------------------------------------
+def sha256_arquivo(caminho: Path) -> str:
+    return hashlib.sha256(caminho.read_bytes()).hexdigest()
+
+
+def origem(base: Path) -> Optional[str]:
+    """sha256 do model.pkl de onde o modelo leve foi exportado (None se não houver)."""
+    try:
+        return json.loads((base / "meta.json").read_text(encoding="utf-8")).get("origem_sha256")
+    except (OSError, ValueError):
+        return None
+
+
+def gravar(base: Path, termos: List[str], idf: np.ndarray, coef: np.ndarray, intercepto: float,
+           classes: List[str], config: dict, origem_sha256: Optional[str] = None):
+    """
+    Ordena o vocabulário (com idf/coef na mesma ordem) e grava a pasta.
+    Escreve numa pasta temporária e troca de uma vez: um servidor que já
+    mapeou os arquivos antigos continua com eles (o inode segue válido);
+    quem carregar no meio da troca falha e entra no backoff do classifier.
+    """
+    brutos = [t.encode("utf-8") for t in termos]
+    if any(b"\x00" in b for b in brutos):
+        raise ValueError("Termos com byte nulo não são suportados pelo runtime leve.")
+    largura = max((len(b) for b in brutos), default=1)
+    arr = np.array(brutos, dtype=f"S{largura}")
+    ordem = np.argsort(arr, kind="stable")
+
+    tmp = base.with_name(base.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    np.save(tmp / "termos.npy", arr[ordem])
+    np.save(tmp / "idf.npy", np.ascontiguousarray(np.asarray(idf, dtype=np.float64)[ordem]))
+    np.save(tmp / "coef.npy", np.ascontiguousarray(np.asarray(coef, dtype=np.float64)[ordem]))
+    (tmp / "meta.json").write_text(json.dumps({
+        "formato": FORMATO,
+        "n_termos": len(brutos),
+        "intercepto": float(intercepto),
+        "classes": [str(c) for c in classes],
+        "config": config,
+        "origem_sha256": origem_sha256,
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    antigo = base.with_name(base.name + ".old")
+    shutil.rmtree(antigo, ignore_errors=True)
+    if base.exists():
+        os.replace(base, antigo)
+    os.replace(tmp, base)
+    shutil.rmtree(antigo, ignore_errors=True)
+
+
+def exportar(pipe, base: Path, origem_pkl: Optional[Path] = None) -> Path:
+    """Grava o Pipeline ([preprocessamento +] TF-IDF + LogisticRegression) no formato leve."""
+    pre = dict(pipe.steps).get("preprocessamento")
+    func = getattr(pre, "func", None)
+    vet, clf = pipe.steps[-2][1], pipe.steps[-1][1]
+    p = vet.get_params()
+    incompativel = [
+        nome for nome, ok in (
+            ("passos", len(pipe.steps) == (3 if pre is not None else 2)),
+            ("preprocessamento", pre is None or (
+                getattr(func, "__module__", "").endswith("nlp_preprocess") and func.__name__ == "limpar_textos")),
+            ("analyzer", p["analyzer"] == "word"),
+            ("tokenizer", p["tokenizer"] is None),
+            ("preprocessor", p["preprocessor"] is None),
+            ("stop_words", p["stop_words"] is None),
+            ("strip_accents", p["strip_accents"] is None),
+            ("norm", p["norm"] in ("l2", None)),
+            ("classes", len(clf.classes_) == 2),
+        ) if not ok
+    ]
+    if incompativel:
+        raise ValueError(f"Configuração não suportada pelo runtime leve: {', '.join(incompativel)}")
+
+    n = len(vet.vocabulary_)
+    termos = [""] * n
+    for termo, col in vet.vocabulary_.items():
+        termos[col] = termo
+    gravar(
+        base, termos,
+        idf=vet.idf_ if p["use_idf"] else np.ones(n),
+        coef=clf.coef_[0],
+        intercepto=float(clf.intercept_[0]),
+        classes=list(clf.classes_),
+        config={
+            "token_pattern": p["token_pattern"],
+            "ngram_range": list(p["ngram_range"]),
+            "lowercase": bool(p["lowercase"]),
+            "sublinear_tf": bool(p["sublinear_tf"]),
+            "binary": bool(p["binary"]),
+            "norm": p["norm"],
+            "preprocessar": pre is not None,
+        },
+        origem_sha256=sha256_arquivo(origem_pkl) if origem_pkl else None,
+    )
+    return base
+
+
+def carregar(base: Path, mmap: bool = True) -> ModeloLeve:
+    """Abre o modelo exportado; com mmap=True os arrays ficam mapeados (somente leitura)."""
+    info = json.loads((base / "meta.json").read_text(encoding="utf-8"))
+    if info.get("formato") != FORMATO:
+        raise ValueError(f"Formato do modelo leve desconhecido: {info.get('formato')}")
+    modo = "r" if mmap else None
+    termos = np.load(base / "termos.npy", mmap_mode=modo, allow_pickle=False)
+    idf = np.load(base / "idf.npy", mmap_mode=modo, allow_pickle=False)
+    coef = np.load(base / "coef.npy", mmap_mode=modo, allow_pickle=False)
+    if len(termos) != info["n_termos"]:
+        raise ValueError(f"{base.name}: arquivos de exportações diferentes (exportação incompleta?)")
+    return ModeloLeve(termos, idf, coef, info["intercepto"], info["classes"], info["config"])
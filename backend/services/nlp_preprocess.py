@@ -1,7 +1,8 @@
+import os
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import RSLPStemmer
+import threading
+from functools import lru_cache
+from typing import Iterable, List, Optional
 
 # ---------------------------------------------------------------------
 # Este módulo cuida do pré-processamento de texto (NLP).
@@ -9,20 +10,82 @@ from nltk.stem import RSLPStemmer
 # Inclui:
 #   - Remoção de links, caracteres estranhos e stopwords.
 #   - Redução de palavras para o radical (stemming).
+#
+# Desempenho:
+#   - NLTK só é importado/carregado no primeiro uso, e sem rede: os dados
+#     vêm instalados no passo de build/deploy
+#       python -m nltk.downloader stopwords rslp
+#     Sem eles, o primeiro uso falha com erro claro (RuntimeError) em vez de
+#     travar numa requisição esperando a rede. AUTOU_NLTK_BAIXAR=1 volta a
+#     baixar no primeiro uso (ambiente de desenvolvimento).
+#   - Uma única regex faz minúsculas→links→tokens de uma vez (antes eram três
+#     re.sub + split).
+#   - O RSLP é uma cascata de regras em Python puro e emails repetem as mesmas
+#     palavras: o radical (já com o filtro de stopwords) fica num cache LRU
+#     limitado (AUTOU_STEM_CACHE entradas; 0 desliga).
 # ---------------------------------------------------------------------
 
-# Garante que os pacotes do NLTK necessários estão disponíveis.
-for pkg in ("stopwords", "rslp"):
-    try:
-        nltk.data.find(f"corpora/{pkg}")
-    except:
-        nltk.download(pkg)
+BAIXAR_NLTK = os.getenv("AUTOU_NLTK_BAIXAR", "0") == "1"
+CACHE_RADICAIS = int(os.getenv("AUTOU_STEM_CACHE", "50000"))
 
-# Stopwords em português (palavras irrelevantes para análise, ex: "de", "para", "com").
-STOPWORDS = set(stopwords.words("portuguese"))
+# Letras (com acento), números — o mesmo conjunto da versão original
+_LETRAS = "a-záéíóúâêîôûàèìòùãõç0-9"
+# Texto sem "http"/"www": tokens = sequências de caracteres permitidos
+_TOKENS = re.compile(f"[{_LETRAS}]+")
+# Com link possível: o link é consumido (e descartado) antes de virar token,
+# e um token para antes de onde um link começaria ("abchttp://x" → "abc")
+_TOKENS_COM_LINKS = re.compile(rf"http\S+|www\S+|((?:(?!http\S|www\S)[{_LETRAS}])+)")
 
-# Stemmer específico para português (RSLP = algoritmo adaptado ao idioma).
-STEM = RSLPStemmer()
+_trava = threading.Lock()
+_stopwords: Optional[frozenset] = None
+_stemmer = None
+
+
+def _recursos():
+    """Carrega stopwords + RSLPStemmer na primeira chamada (thread-safe)."""
+    global _stopwords, _stemmer
+    if _stemmer is not None:
+        return _stopwords, _stemmer
+    with _trava:
+        if _stemmer is None:
+            import nltk
+            # rslp fica em stemmers/, não em corpora/
+            for pkg, caminho in (("stopwords", "corpora/stopwords"), ("rslp", "stemmers/rslp")):
+                try:
+                    nltk.data.find(caminho)
+                except LookupError:
+                    if not BAIXAR_NLTK or not nltk.download(pkg, quiet=True):
+                        raise RuntimeError(
+                            f"Recurso NLTK '{pkg}' não encontrado. Rode o passo de download antes de subir: "
+                            "python -m nltk.downloader stopwords rslp (ou AUTOU_NLTK_BAIXAR=1 para baixar no primeiro uso)."
+                        )
+            from nltk.corpus import stopwords
+            from nltk.stem import RSLPStemmer
+
+            # Stopwords em português (palavras irrelevantes para análise, ex: "de", "para", "com").
+            _stopwords = frozenset(stopwords.words("portuguese"))
+            # Stemmer específico para português (RSLP = algoritmo adaptado ao idioma).
+            _stemmer = RSLPStemmer()
+    return _stopwords, _stemmer
+
+
+def _radical_sem_cache(token: str) -> Optional[str]:
+    """Radical do token, ou None se for stopword."""
+    stopwords, stemmer = _recursos()
+    if token in stopwords:
+        return None
+    return stemmer.stem(token)
+
+
+_radical = lru_cache(maxsize=CACHE_RADICAIS)(_radical_sem_cache) if CACHE_RADICAIS > 0 else _radical_sem_cache
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Passos 1–5 de `limpar_texto`: minúsculas, sem links, só letras/números."""
+    texto = (texto or "").lower()
+    if "http" in texto or "www" in texto:
+        return [t for t in _TOKENS_COM_LINKS.findall(texto) if t]
+    return _TOKENS.findall(texto)
 
 
 def limpar_texto(texto: str) -> str:
@@ -43,19 +106,27 @@ def limpar_texto(texto: str) -> str:
       Entrada: "Poderiam atualizar o status do protocolo 2319? Ainda ocorre erro!"
       Saída:   "pod atual status protocol 2319 aind ocorr err"
     """
-    # Garantia contra None
-    texto = (texto or "").lower()
+    radical = _radical
+    return " ".join([r for r in map(radical, tokenizar(texto)) if r is not None])
 
-    # Remove links
-    texto = re.sub(r"http\S+|www\S+", " ", texto)
 
-    # Mantém apenas letras (com acento), números e espaços
-    texto = re.sub(r"[^a-záéíóúâêîôûàèìòùãõç0-9\s]", " ", texto)
-
-    # Normaliza espaços (múltiplos → um só)
-    texto = re.sub(r"\s+", " ", texto).strip()
+def limpar_textos(textos: Iterable[str]) -> List[str]:
+    """
+    `limpar_texto` para uma lista de textos (mesma ordem). Textos repetidos
+    são processados uma vez só. Aceita qualquer iterável — é a função usada
+    no passo "preprocessamento" do Pipeline de treino (FunctionTransformer).
+    """
+    feitos = {}
+    saida = []
+    for texto in textos:
+        limpo = feitos.get(texto)
+        if limpo is None:
+            limpo = feitos[texto] = limpar_texto(texto)
+        saida.append(limpo)
+    return saida
 
-    # Remove stopwords e aplica stemming
-    tokens = [STEM.stem(t) for t in texto.split() if t not in STOPWORDS]
 
-    return " ".join(tokens)
+def info_cache() -> dict:
+    """Hits/misses do cache de radicais (vazio se desligado)."""
+    info = getattr(_radical, "cache_info", None)
+    return info()._asdict() if info else {}
@@ -1,43 +1,83 @@
 from io import BytesIO
-from PyPDF2 import PdfReader
+from typing import BinaryIO, Iterator, Optional, Union
 
 # ---------------------------------------------------------------------
 # Este módulo cuida da leitura de arquivos PDF.
 # Objetivo: extrair o texto de cada página e devolvê-lo como string.
+# O PyPDF2 só é importado no primeiro PDF (partida mais rápida para quem
+# só manda texto); `importar_leitor` antecipa isso no aquecimento.
 # ---------------------------------------------------------------------
 
 
-def extract_text_from_pdf(binary: bytes) -> str:
+def importar_leitor():
+    """PdfReader do PyPDF2 (importado na primeira chamada)."""
+    from PyPDF2 import PdfReader
+    return PdfReader
+
+
+def iter_paginas_pdf(
+    binary: Union[bytes, BinaryIO],
+    max_paginas: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Gera o texto de cada página, sob demanda (a página N+1 só é lida se
+    quem consome o gerador pedir).
+
+    Orçamentos opcionais:
+      - max_paginas: para depois de N páginas.
+      - max_chars:   para quando o total de caracteres chegar a N
+                     (a última página é cortada no limite).
+
+    Páginas que falham na extração (PDF escaneado, erro de parsing)
+    geram string vazia — continuam contando como páginas lidas.
     """
-    Extrai o texto de um arquivo PDF (recebido em bytes).
+    reader = importar_leitor()(binary if hasattr(binary, "read") else BytesIO(binary))
+    total = 0
+
+    for i, page in enumerate(reader.pages):
+        if max_paginas is not None and i >= max_paginas:
+            break
+        try:
+            # Extrai o texto da página (pode retornar None se vazio)
+            texto = page.extract_text() or ""
+        except Exception:
+            # Silencia erros de parsing em páginas específicas
+            texto = ""
+        if max_chars is not None:
+            texto = texto[: max(0, max_chars - total)]
+        total += len(texto)
+        yield texto
+        if max_chars is not None and total >= max_chars:
+            break
+
+
+def extract_text_from_pdf(
+    binary: Union[bytes, BinaryIO],
+    max_paginas: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> str:
+    """
+    Extrai o texto de um arquivo PDF (recebido em bytes ou como arquivo binário aberto).
 
     Passos:
-      1. Lê o binário com PyPDF2 (usando BytesIO como buffer em memória).
-      2. Percorre todas as páginas do PDF.
+      1. Lê o PDF com PyPDF2 — direto do arquivo, quando for um (ex.: o
+         arquivo temporário do upload), sem copiar para outro buffer.
+      2. Percorre as páginas do PDF (respeitando max_paginas/max_chars, se informados).
       3. Para cada página, tenta extrair texto com `page.extract_text()`.
-         - Se não conseguir (PDF escaneado ou erro), ignora a página.
+         - Se não conseguir (PDF escaneado ou erro), a página fica vazia.
       4. Junta todo o texto das páginas em uma única string.
 
     Observações:
       - PDFs baseados em imagem (scans) não terão texto extraído aqui
         → para esses casos seria necessário OCR (ex.: Tesseract).
       - O retorno é sempre uma string (pode ser vazia se não extrair nada).
+      - Para ler página a página (e parar cedo), use `iter_paginas_pdf`.
 
     Exemplo de uso:
       with open("fatura.pdf", "rb") as f:
           conteudo = extract_text_from_pdf(f.read())
     """
-    reader = PdfReader(BytesIO(binary))
-    parts = []
-
-    for page in reader.pages:
-        try:
-            # Extrai o texto da página (pode retornar None se vazio)
-            parts.append(page.extract_text() or "")
-        except Exception:
-            # Silencia erros de parsing em páginas específicas
-            pass
-
     # Junta todas as partes, separadas por quebras de linha
-    text = "\n".join(parts).strip()
+    text = "\n".join(iter_paginas_pdf(binary, max_paginas, max_chars)).strip()
     return text
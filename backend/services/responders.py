@@ -7,29 +7,162 @@
 #
 # A ideia é sempre retornar uma resposta profissional mínima,
 # mesmo sem IA generativa disponível.
+#
+# Registro de modelos: uma resposta por categoria e, quando a pontuação
+# detecta a intenção do email (status de protocolo, fatura/boleto,
+# cancelamento, agradecimento), uma mais específica — com campos como
+# {protocolo} preenchidos a partir do texto. Os modelos são compilados
+# uma vez na importação e cada (modelo, parâmetros) é renderizado uma
+# vez só (LRU).
+#
+# Configuração (.env):
+#   AUTOU_RESPOSTAS_INTENCAO  0 = só as duas respostas genéricas (padrão: 1)
 # -------------------------------------------------------------------
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
-def resposta_produtiva() -> str:
-    """
-    Resposta padrão para emails classificados como PRODUTIVOS.
-    - Confirma recebimento
-    - Solicita dados objetivos (ex: protocolo, anexos)
-    - Define expectativa de prazo (SLA curto)
-    """
-    return (
+INTENCOES = os.getenv("AUTOU_RESPOSTAS_INTENCAO", "1").strip() not in ("0", "false", "")
+MAX_RENDERIZADAS = 4096  # (modelo, parâmetros) guardados; protocolos variam muito
+
+# Parâmetros de um modelo: pares (campo, valor) em tupla (hashável, para o LRU)
+Parametros = Tuple[Tuple[str, str], ...]
+# O que a pontuação detectou: intenções candidatas (em ordem de prioridade) + parâmetros
+Intencao = Tuple[Tuple[str, ...], Parametros]
+SEM_INTENCAO: Intencao = ((), ())
+
+# Resposta padrão de cada categoria; "<padrão>_<intenção>" é a específica
+PADRAO = {"Produtivo": "produtiva", "Improdutivo": "improdutiva"}
+
+MODELOS: Dict[str, str] = {
+    # - Confirma recebimento
+    # - Solicita dados objetivos (ex: protocolo, anexos)
+    # - Define expectativa de prazo (SLA curto)
+    "produtiva": (
         "Olá! Recebemos sua solicitação e já estamos analisando. "
         "Se possível, informe o número do protocolo e anexos relevantes. "
         "Daremos retorno até o fim do dia útil."
-    )
+    ),
+    "produtiva_protocolo": (
+        "Olá! Recebemos sua mensagem sobre o protocolo {protocolo} e já estamos verificando o status. "
+        "Daremos retorno até o fim do dia útil."
+    ),
+    "produtiva_status": (
+        "Olá! Recebemos seu pedido de atualização e já estamos verificando. "
+        "Se possível, informe o número do protocolo para agilizar a consulta. "
+        "Daremos retorno até o fim do dia útil."
+    ),
+    "produtiva_fatura": (
+        "Olá! Recebemos sua mensagem sobre fatura/boleto e já encaminhamos ao financeiro. "
+        "Se possível, anexe o documento ou informe o número e o vencimento. "
+        "Daremos retorno até o fim do dia útil."
+    ),
+    "produtiva_cancelamento": (
+        "Olá! Recebemos seu pedido de cancelamento e já estamos tratando. "
+        "Confirmaremos por aqui assim que for concluído, até o fim do dia útil."
+    ),
+    # - Agradece cordialmente
+    # - Orienta o usuário caso precise de suporte real
+    "improdutiva": (
+        "Olá! Agradecemos a mensagem. Caso precise de suporte ou acompanhamento "
+        "de alguma requisição, envie os detalhes para acelerarmos o atendimento."
+    ),
+    "improdutiva_agradecimento": (
+        "Olá! Nós que agradecemos o contato. Se precisar de suporte ou acompanhamento "
+        "de alguma requisição, é só responder este email."
+    ),
+}
+
+
+def _compilar(texto: str) -> Tuple[Tuple[Tuple[str, Optional[str]], ...], FrozenSet[str]]:
+    """Modelo → partes (literal, campo ou None) e o conjunto de campos exigidos."""
+    partes: List[Tuple[str, Optional[str]]] = []
+    for literal, campo, _, _ in Formatter().parse(texto):
+        partes.append((literal, campo or None))
+    return tuple(partes), frozenset(c for _, c in partes if c)
+
+
+_COMPILADOS = {id_: _compilar(texto) for id_, texto in MODELOS.items()}
+# (categoria, intenção) -> (id, campos exigidos)
+_POR_INTENCAO = {
+    (categoria, id_[len(base) + 1:]): (id_, _COMPILADOS[id_][1])
+    for categoria, base in PADRAO.items()
+    for id_ in MODELOS
+    if id_.startswith(base + "_")
+}
+
+
+# Impressão do registro: muda quando algum modelo de resposta muda (invalida o cache de resultados)
+IMPRESSAO = hashlib.sha256(json.dumps([PADRAO, MODELOS], sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def escolher(categoria: str, candidatos: Tuple[str, ...] = (), parametros: Parametros = ()) -> str:
+    """
+    Id do modelo: a 1ª intenção candidata que tem modelo nesta categoria e
+    cujos campos vieram nos parâmetros; senão, a resposta padrão da categoria.
+    """
+    if INTENCOES:
+        for nome in candidatos:
+            achado = _POR_INTENCAO.get((categoria, nome))
+            if achado is not None and (not achado[1] or achado[1] <= {c for c, _ in parametros}):
+                return achado[0]
+    return PADRAO.get(categoria, "improdutiva")
+
+
+@lru_cache(maxsize=MAX_RENDERIZADAS)
+def renderizar(id_modelo: str, parametros: Parametros = ()) -> str:
+    """Texto do modelo com os campos preenchidos (memoizado por modelo + parâmetros)."""
+    valores = dict(parametros)
+    return "".join(literal + (valores[campo] if campo else "") for literal, campo in _COMPILADOS[id_modelo][0])
+
+
+def responder(categoria: str, candidatos: Tuple[str, ...] = (), parametros: Parametros = ()) -> str:
+    """Resposta sugerida para a categoria e a intenção detectada (ver `escolher`)."""
+    id_ = escolher(categoria, candidatos, parametros)
+    # só os modelos com campos guardam uma entrada por parâmetro no LRU
+    return renderizar(id_, parametros if _COMPILADOS[id_][1] else ())
+
+
+# Modelos com campos → regex que reconhece o texto renderizado (e captura os campos)
+_RENDERIZADOS = {
+    id_: re.compile("".join(re.escape(literal) + (f"(?P<{campo}>.+?)" if campo else "") for literal, campo in partes))
+    for id_, (partes, campos) in _COMPILADOS.items()
+    if campos
+}
+
+
+def reaplicar(resposta: str, parametros: Parametros) -> Optional[str]:
+    """
+    A mesma resposta para outro email: se ela veio de um modelo com campos,
+    renderiza de novo com os `parametros` do email novo (None se falta
+    algum campo); texto fixo volta como está.
+    """
+    for id_, padrao in _RENDERIZADOS.items():
+        if padrao.fullmatch(resposta):
+            campos = _COMPILADOS[id_][1]
+            valores = tuple((c, v) for c, v in parametros if c in campos)
+            return renderizar(id_, valores) if len(valores) == len(campos) else None
+    return resposta
+
+
+def resposta_produtiva() -> str:
+    """Resposta padrão para emails classificados como PRODUTIVOS."""
+    return MODELOS["produtiva"]
 
 
 def resposta_improdutiva() -> str:
+    """Resposta padrão para emails classificados como IMPRODUTIVOS."""
+    return MODELOS["improdutiva"]
+
+
+def modelos() -> dict:
     """
-    Resposta padrão para emails classificados como IMPRODUTIVOS.
-    - Agradece cordialmente
-    - Orienta o usuário caso precise de suporte real
+    Respostas sem campos a preencher, por id estável. No modo compacto da
+    API o cliente recebe só o id (`resposta_id`) e busca os textos uma vez
+    em GET /respostas; respostas com campos (ex.: nº do protocolo) vão por extenso.
     """
-    return (
-        "Olá! Agradecemos a mensagem. Caso precise de suporte ou acompanhamento "
-        "de alguma requisição, envie os detalhes para acelerarmos o atendimento."
-    )
+    return {id_: MODELOS[id_] for id_, (_, campos) in _COMPILADOS.items() if not campos}
@@ -0,0 +1,325 @@
+import hashlib
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from .classifier import _rm_acentos, parametros_resposta
+from .nlp_preprocess import tokenizar
+from .responders import reaplicar
+
+# ---------------------------------------------------------------------
+# Índice de quase-duplicatas (MinHash + LSH) para reaproveitar vereditos.
+#
+# Threads de email repetem quase todo o corpo nas respostas citadas, e
+# notificações automáticas só mudam o nº do chamado: o hash exato do
+# cache de resultados (cache.py) não pega nenhum dos dois.
+#
+# Assinatura de um texto:
+#   1. minúsculas + _rm_acentos (o mesmo texto que a pontuação varre);
+#   2. histórico citado removido (linhas "> ...", "Em ... escreveu:",
+#      "-----Mensagem original-----", cabeçalho "De:/Enviado:" do Outlook);
+#      se não sobrar nada (encaminhamento puro), vale o texto citado;
+#   3. números viram "0" (nº de chamado/protocolo não separa duas
+#      notificações do mesmo modelo);
+#   4. tokens de `tokenizar` (passos 1–5 do limpar_texto; o stemming do
+#      NLTK custaria mais que a própria classificação) → trigramas de
+#      palavras → MinHash com PERMUTACOES funções de hash (NumPy).
+#
+# O índice divide a assinatura em BANDAS (LSH): textos que coincidem em
+# alguma banda são candidatos, e a similaridade (fração de posições
+# iguais ≈ Jaccard dos trigramas) decide. Acima do LIMIAR, o veredito do
+# vizinho é reaproveitado — com a resposta sugerida refeita se o modelo
+# de resposta tem campos (ex.: {protocolo} do email novo). Quem entra no
+# índice sem vizinho abre um cluster novo; o id do cluster sai do hash
+# da assinatura de quem o abriu (o mesmo em todos os workers).
+#
+# Memória limitada: LRU de até MAX_ITENS assinaturas (cada uma leva
+# junto as suas entradas nos baldes das bandas). Modelo trocou (impressão
+# digital diferente) → índice zerado, como no cache de resultados.
+#
+# Configuração (.env):
+#   AUTOU_SIMILARES               1 | 0                        (padrão: 0)
+#   AUTOU_SIMILARES_LIMIAR        similaridade mínima 0–1      (padrão: 0.85)
+#   AUTOU_SIMILARES_ITENS         máx. assinaturas (LRU)       (padrão: 20000)
+#   AUTOU_SIMILARES_MIN_PALAVRAS  textos menores não entram    (padrão: 8)
+#   AUTOU_SIMILARES_PERMUTACOES   funções de hash do MinHash   (padrão: 64)
+#   AUTOU_SIMILARES_BANDAS        bandas do LSH (divide o nº de
+#                                 permutações)                 (padrão: 16)
+# ---------------------------------------------------------------------
+
+# Campos da resposta (categoria, confianca, resposta_sugerida, origem…)
+Resultado = Dict[str, Any]
+
+SHINGLE = 3                # palavras por trigrama
+MAX_PALAVRAS = 5000        # só o começo de textos enormes entra na assinatura
+MAX_CANDIDATOS = 64        # candidatos comparados por consulta (baldes muito cheios)
+_SEMENTE = 20240917        # coeficientes fixos: mesma assinatura em todo processo
+
+_CITADA = re.compile(r"^[ \t]*>")
+_CORTE = re.compile(
+    r"^[ \t]*(?:"
+    r"(?:em|on)\b[^\n]{0,200}(?:\n[^\n]{0,200})?\b(?:escreveu|wrote)[ \t]*:"
+    r"|-{2,}[ \t]*(?:mensagem original|original message|mensagem encaminhada|forwarded message)"
+    r"|(?:de|from)[ \t]*:[^\n]*\n[ \t]*(?:enviad[oa]|sent|data|date|para|to)[ \t]*:"
+    r")",
+    re.MULTILINE,
+)
+# Encaminhamento puro: o texto citado sem os ">" e sem as linhas de cabeçalho/marcador
+_PREFIXO_CITACAO = re.compile(r"^[ \t]*(?:>[ \t]*)+", re.MULTILINE)
+_CABECALHO = re.compile(
+    r"^[ \t]*(?:(?:de|from|enviad[oa]|sent|data|date|para|to|cc|assunto|subject)[ \t]*:[^\n]*"
+    r"|-{2,}[^\n]*|(?:em|on)\b[^\n]*\b(?:escreveu|wrote)[ \t]*:[ \t]*)$",
+    re.MULTILINE,
+)
+_DIGITOS = re.compile(r"\d+")
+
+
+def remover_citacoes(texto: str) -> str:
+    """
+    Só o que o remetente escreveu: corta a partir do primeiro marcador de
+    resposta/encaminhamento e descarta linhas citadas com ">". Espera o
+    texto já em minúsculas e sem acentos.
+    """
+    m = _CORTE.search(texto)
+    if m:
+        texto = texto[:m.start()]
+    if ">" in texto:
+        texto = "\n".join(l for l in texto.split("\n") if not _CITADA.match(l))
+    return texto
+
+
+def _palavras(texto: str) -> List[str]:
+    t = _rm_acentos(texto.lower())
+    palavras = tokenizar(_DIGITOS.sub("0", remover_citacoes(t)))
+    if not palavras:
+        citado = _CABECALHO.sub("", _PREFIXO_CITACAO.sub("", t))  # encaminhamento puro: vale o citado
+        palavras = tokenizar(_DIGITOS.sub("0", citado))
+    return palavras[:MAX_PALAVRAS]
+
+
+@lru_cache(maxsize=None)
+def _coeficientes(permutacoes: int):
+    """(a, b) das funções h(x) = (a·x + b) >> 32 em 64 bits (a ímpar)."""
+    import numpy as np
+
+    rnd = np.random.default_rng(_SEMENTE)
+    a = rnd.integers(1, 2**63, size=permutacoes, dtype=np.uint64) | np.uint64(1)
+    b = rnd.integers(0, 2**63, size=permutacoes, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+def assinatura(texto: str, permutacoes: Optional[int] = None, min_palavras: Optional[int] = None):
+    """
+    MinHash (array uint64 com `permutacoes` posições) do texto, ou None se
+    sobrarem menos de `min_palavras` palavras (ou nenhuma, qualquer que seja
+    o mínimo). Função pura: roda nos pools.
+    """
+    import numpy as np
+
+    palavras = _palavras(texto)
+    if not palavras or len(palavras) < (MIN_PALAVRAS if min_palavras is None else min_palavras):
+        return None
+    a, b = _coeficientes(PERMUTACOES if permutacoes is None else permutacoes)
+    h = np.fromiter((zlib.crc32(p.encode()) for p in palavras), dtype=np.uint64, count=len(palavras))
+    k = min(SHINGLE, len(h))
+    # trigrama = combinação dos hashes das palavras (crc32 de cada palavra uma vez só)
+    x = h[:len(h) - k + 1]
+    for j in range(1, k):
+        x = x * np.uint64(0x9E3779B97F4A7C15) ^ h[j:len(h) - k + 1 + j]
+    x = np.unique(x)
+    with np.errstate(over="ignore"):
+        return ((a * x + b) >> np.uint64(32)).min(axis=1)
+
+
+def assinaturas(textos: List[str]) -> list:
+    """`assinatura` de vários textos (uma ida ao pool para o lote inteiro)."""
+    return [assinatura(t) for t in textos]
+
+
+def adaptar(valor: Resultado, texto: str) -> Optional[Resultado]:
+    """
+    Veredito do vizinho para o `texto` novo: a resposta sugerida é refeita
+    com os parâmetros dele (ex.: outro nº de protocolo). None se o modelo
+    de resposta pede um campo que o texto novo não tem (classifique de novo).
+    """
+    resposta = valor.get("resposta_sugerida")
+    if resposta is None:
+        return valor
+    nova = reaplicar(resposta, parametros_resposta(texto))
+    if nova is None:
+        return None
+    return valor if nova == resposta else {**valor, "resposta_sugerida": nova}
+
+
+class IndiceSimilares:
+    """LSH sobre assinaturas MinHash, com LRU e invalidação pela impressão do modelo."""
+
+    def __init__(self, limiar: float, max_itens: int, bandas: int):
+        self.limiar = limiar
+        self.max_itens = max(1, max_itens)
+        self.bandas = bandas
+        # id = linha da assinatura em _matriz → (chaves das bandas, cluster, valor), em ordem de uso
+        self._itens: "OrderedDict[int, Tuple[Tuple[bytes, ...], str, Any]]" = OrderedDict()
+        self._baldes: Dict[bytes, Dict[int, None]] = {}  # banda → ids (dict = conjunto ordenado)
+        self._matriz = None  # assinaturas, uma por linha (cresce dobrando até max_itens)
+        self._usadas = 0
+        self._livres: List[int] = []
+        self._impressao: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sem_assinatura = 0
+        self.evictions = 0
+        self.invalidacoes = 0
+
+    # ------------------------------------------------------------------
+    def _sincronizar_modelo(self, impressao: str):
+        """Modelo trocou → vereditos do anterior não valem mais."""
+        if impressao == self._impressao:
+            return
+        if self._impressao is not None:
+            self.invalidacoes += 1
+        self._impressao = impressao
+        self._zerar()
+
+    def _zerar(self):
+        self._itens.clear()
+        self._baldes.clear()
+        self._usadas = 0
+        self._livres = []
+
+    def _chaves(self, sig) -> Tuple[bytes, ...]:
+        dados = sig.tobytes()
+        passo = len(dados) // self.bandas
+        return tuple(bytes((i,)) + dados[i * passo:(i + 1) * passo] for i in range(self.bandas))
+
+    def _nova_linha(self, sig) -> int:
+        import numpy as np
+
+        if self._livres:
+            return self._livres.pop()
+        if self._matriz is None or self._usadas == len(self._matriz):
+            maior = np.empty((min(self.max_itens, max(256, 2 * self._usadas)), len(sig)), dtype=sig.dtype)
+            if self._matriz is not None:
+                maior[:self._usadas] = self._matriz[:self._usadas]
+            self._matriz = maior
+        self._usadas += 1
+        return self._usadas - 1
+
+    def _melhor(self, sig, chaves: Tuple[bytes, ...]) -> Optional[Tuple[int, float]]:
+        """Vizinho mais parecido acima do limiar (id, similaridade)."""
+        candidatos: Dict[int, None] = {}
+        for chave in chaves:
+            balde = self._baldes.get(chave)
+            if balde:
+                candidatos.update(balde)
+                if len(candidatos) >= MAX_CANDIDATOS:
+                    break
+        if not candidatos:
+            return None
+        import numpy as np
+
+        ids = list(candidatos)
+        # todas as comparações numa operação só (linhas dos candidatos x permutações)
+        iguais = np.count_nonzero(self._matriz[ids] == sig, axis=1)
+        j = int(iguais.argmax())
+        sim = iguais[j] / len(sig)
+        return (ids[j], sim) if sim >= self.limiar else None
+
+    def _remover(self, id_: int):
+        chaves, _, _ = self._itens.pop(id_)
+        self._livres.append(id_)
+        for chave in chaves:
+            balde = self._baldes[chave]
+            del balde[id_]
+            if not balde:
+                del self._baldes[chave]
+
+    # ------------------------------------------------------------------
+    def buscar(self, sig, impressao: str) -> Optional[Tuple[str, Any, float]]:
+        """(cluster, valor, similaridade) do vizinho mais parecido, ou None."""
+        if sig is None:
+            with self._lock:
+                self.sem_assinatura += 1
+            return None
+        chaves = self._chaves(sig)
+        with self._lock:
+            self._sincronizar_modelo(impressao)
+            achado = self._melhor(sig, chaves)
+            if achado is None:
+                self.misses += 1
+                return None
+            self._itens.move_to_end(achado[0])
+            self.hits += 1
+            _, cluster, valor = self._itens[achado[0]]
+            return cluster, valor, achado[1]
+
+    def guardar(self, sig, impressao: str, valor: Any) -> Optional[str]:
+        """
+        Indexa a assinatura com o veredito e devolve o cluster: o do vizinho
+        mais parecido (acima do limiar) ou um novo. Assinatura idêntica a uma
+        já guardada só atualiza o veredito.
+        """
+        if sig is None:
+            return None
+        chaves = self._chaves(sig)
+        with self._lock:
+            self._sincronizar_modelo(impressao)
+            achado = self._melhor(sig, chaves)
+            if achado is not None:
+                id_, sim = achado
+                cluster = self._itens[id_][1]
+                if sim == 1.0:
+                    self._itens[id_] = (chaves, cluster, valor)
+                    self._itens.move_to_end(id_)
+                    return cluster
+            else:
+                cluster = hashlib.blake2b(sig.tobytes(), digest_size=6).hexdigest()
+            if len(self._itens) >= self.max_itens:
+                self._remover(next(iter(self._itens)))
+                self.evictions += 1
+            id_ = self._nova_linha(sig)
+            self._matriz[id_] = sig
+            self._itens[id_] = (chaves, cluster, valor)
+            for chave in chaves:
+                self._baldes.setdefault(chave, {})[id_] = None
+            return cluster
+
+    def limpar(self):
+        with self._lock:
+            self._zerar()
+
+    def estado(self) -> dict:
+        """Contadores para o /config."""
+        total = self.hits + self.misses
+        return {
+            "itens": len(self._itens),
+            "baldes": len(self._baldes),
+            "max_itens": self.max_itens,
+            "limiar": self.limiar,
+            "permutacoes": PERMUTACOES,
+            "bandas": self.bandas,
+            "hits": self.hits,
+            "misses": self.misses,
+            "sem_assinatura": self.sem_assinatura,
+            "taxa_acerto": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidacoes": self.invalidacoes,
+        }
+
+
+ATIVO = os.getenv("AUTOU_SIMILARES", "0").strip() not in ("0", "false", "")
+LIMIAR = float(os.getenv("AUTOU_SIMILARES_LIMIAR", "0.85"))
+MIN_PALAVRAS = int(os.getenv("AUTOU_SIMILARES_MIN_PALAVRAS", "8"))
+PERMUTACOES = int(os.getenv("AUTOU_SIMILARES_PERMUTACOES", "64"))
+BANDAS = int(os.getenv("AUTOU_SIMILARES_BANDAS", "16"))
+
+indice = IndiceSimilares(
+    limiar=LIMIAR,
+    max_itens=int(os.getenv("AUTOU_SIMILARES_ITENS", "20000")),
+    bandas=BANDAS,
+)
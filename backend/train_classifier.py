@@ -1,9 +1,23 @@
+import argparse
 import csv
+import hashlib
+import json
+import os
+import resource
+import shutil
+import sys
+import time
+from array import array
 from collections import Counter
 from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
 import joblib
+import numpy as np
+import scipy.sparse as sp
 
+import sklearn
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import FunctionTransformer
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
@@ -14,44 +28,123 @@ from sklearn.metrics import classification_report
 # ==========================
 DADOS = Path(__file__).parent / "data" / "samples.csv"
 MODELO = Path(__file__).parent / "data" / "model.pkl"
+MODELO_LEVE = Path(__file__).parent / "data" / "model_leve"  # pasta com .npy + meta.json (runtime sem sklearn)
+FEEDBACK = Path(__file__).parent / "data" / "feedback.csv"    # correções dos revisores (POST /feedback)
+CACHE = Path(__file__).parent / "data" / "cache_treino"        # matrizes de contagem da busca (--buscar)
+RELATORIO = Path(__file__).parent / "data" / "relatorio_busca.json"
+BLOCO = 20000  # linhas do CSV por bloco na leitura em streaming
 
 
-def carregar_dados():
+def ler_em_blocos(arquivos: Optional[List[Path]] = None, tamanho: int = BLOCO) -> Iterator[Tuple[List[str], List[str]]]:
+    """
+    Lê os CSVs (colunas text,label) em blocos de até `tamanho` linhas, sem
+    carregar o arquivo inteiro: só um bloco de textos fica em memória.
+    Padrão: samples.csv + feedback.csv (se existir).
+    """
+    if arquivos is None:
+        arquivos = [DADOS] + ([FEEDBACK] if FEEDBACK.exists() else [])
+    textos, labels = [], []
+    for arquivo in arquivos:
+        with open(arquivo, encoding="utf-8", newline="") as f:
+            for linha in csv.DictReader(f):
+                txt = (linha.get("text") or "").strip()
+                lb  = (linha.get("label") or "").strip()
+                if txt and lb:
+                    textos.append(txt)
+                    labels.append(lb)
+                    if len(textos) >= tamanho:
+                        yield textos, labels
+                        textos, labels = [], []
+    if textos:
+        yield textos, labels
+
+
+def carregar_dados(arquivos: Optional[List[Path]] = None):
     """
     Lê o CSV com colunas:
       - text  : conteúdo do email
       - label : "Produtivo" | "Improdutivo"
+    Mais as correções dos revisores em feedback.csv (mesmo formato), se houver.
     Retorna: X (textos) e y (rótulos).
     """
     textos, labels = [], []
-    with open(DADOS, encoding="utf-8") as f:
-        leitor = csv.DictReader(f)
-        for linha in leitor:
-            txt = (linha.get("text") or "").strip()
-            lb  = (linha.get("label") or "").strip()
-            if txt and lb:
-                textos.append(txt)
-                labels.append(lb)
+    for bloco_x, bloco_y in ler_em_blocos(arquivos):
+        textos += bloco_x
+        labels += bloco_y
     if not textos:
-        raise RuntimeError(f"Nenhum dado encontrado em {DADOS}.")
+        raise RuntimeError(f"Nenhum dado encontrado em {arquivos or DADOS}.")
     return textos, labels
 
 
-def montar_pipeline() -> Pipeline:
+def montar_pipeline(preprocessar: bool = False, ngram_range: Tuple[int, int] = (1, 2),
+                    min_df: int = 1, C: float = 1.0) -> Pipeline:
     """
     Monta o pipeline padrão:
       - TF-IDF (unigramas+bigramas) -> LogisticRegression
+    `ngram_range`, `min_df` e `C` são os hiperparâmetros que o --buscar varia.
+    Com preprocessar=True, antes do TF-IDF entra o `limpar_textos` do
+    services/nlp_preprocess.py (stopwords + radical RSLP) — o servidor
+    aplica o mesmo passo automaticamente, pois ele faz parte do model.pkl.
     Dica: class_weight='balanced' ajuda em datasets desbalanceados.
     """
-    return Pipeline([
-        ("vetorizador", TfidfVectorizer(ngram_range=(1, 2), min_df=1)),
-        ("classificador", LogisticRegression(max_iter=1000, class_weight="balanced")),
-    ])
+    passos = []
+    if preprocessar:
+        # Importado pelo pacote `backend` para o pickle apontar para um módulo
+        # que o servidor consegue importar (exige python -m backend.train_classifier)
+        from .services.nlp_preprocess import limpar_textos
+        passos.append(("preprocessamento", FunctionTransformer(limpar_textos)))
+    passos += [
+        ("vetorizador", TfidfVectorizer(ngram_range=ngram_range, min_df=min_df)),
+        ("classificador", LogisticRegression(C=C, max_iter=1000, class_weight="balanced")),
+    ]
+    return Pipeline(passos)
 
 
-def treinar():
-    # 1) Carrega dados
+def exportar_leve(pipe: Pipeline):
+    """Exporta vocabulário, IDF e coeficientes para o runtime NumPy (services/modelo_leve.py)."""
+    try:
+        from .services.modelo_leve import exportar   # python -m backend.train_classifier
+    except ImportError:
+        from services.modelo_leve import exportar    # python backend/train_classifier.py
+    pasta = exportar(pipe, MODELO_LEVE, origem_pkl=MODELO)
+    print(f"✅ Modelo leve exportado em: {pasta}")
+
+
+def importar_aprendizado():
+    try:
+        from .services import aprendizado   # python -m backend.train_classifier
+    except ImportError:
+        from services import aprendizado    # python backend/train_classifier.py
+    return aprendizado
+
+
+def treinar_online():
+    """
+    (Re)cria o modelo online (HashingVectorizer + SGD, services/aprendizado.py)
+    com samples.csv + feedback.csv. Depois disso, as correções novas entram
+    por atualizações incrementais, sem treinar tudo de novo.
+    """
+    aprendizado = importar_aprendizado()
+    offset = FEEDBACK.stat().st_size if FEEDBACK.exists() else 0
     X, y = carregar_dados()
+    estado = aprendizado.inicializar(X, y, offset=offset)
+    print(f"✅ Modelo online criado com {estado['exemplos']} exemplos em: {aprendizado.CAMINHO_MODELO_ONLINE}")
+
+
+def atualizar_online():
+    """Aprende todo o feedback pendente, um mini-lote por vez (ex.: via cron)."""
+    aprendizado = importar_aprendizado()
+    passos = 0
+    while (info := aprendizado.atualizar()) is not None:
+        passos += 1
+        print(f"🔁 +{info['ultimo_lote']} exemplos em {info['segundos'] * 1000:.0f} ms (total {info['exemplos']})")
+    if not passos:
+        print("Nada novo para aprender (ou modelo online inexistente: rode --online).")
+
+
+def treinar(preprocessar: bool = False, arquivos: Optional[List[Path]] = None):
+    # 1) Carrega dados
+    X, y = carregar_dados(arquivos)
     n = len(y)
     cont = Counter(y)
     print(f"🔎 Total de exemplos: {n} | Distribuição por classe: {dict(cont)}")
@@ -63,7 +156,7 @@ def treinar():
     pode_estratificar = all(v >= 2 for v in cont.values())
     dataset_pequeno = n < 6
 
-    pipe = montar_pipeline()
+    pipe = montar_pipeline(preprocessar)
 
     if dataset_pequeno:
         print("⚠️ Dataset muito pequeno (<6). Treinando em TODO o conjunto e pulando avaliação.")
@@ -92,10 +185,374 @@ def treinar():
             pipe.fit(X, y)
 
     # 3) Salva modelo
+    salvar_modelo(pipe)
+    return pipe
+
+
+def salvar_modelo(pipe: Pipeline):
+    """Arquivo temporário + rename atômico: um servidor que esteja vigiando/recarregando o model.pkl nunca lê um arquivo pela metade."""
     MODELO.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(pipe, MODELO)
+    tmp = MODELO.with_suffix(".pkl.tmp")
+    joblib.dump(pipe, tmp)
+    os.replace(tmp, MODELO)
     print(f"\n✅ Modelo salvo em: {MODELO}")
 
 
+# ==========================
+# 🔬 Busca de hiperparâmetros (--buscar)
+# ==========================
+# Para corpora grandes (centenas de milhares de emails):
+#   1) os CSVs são lidos em blocos e viram uma matriz esparsa de CONTAGENS
+#      (uma passada, com a maior faixa de n-gramas; as faixas menores são
+#      recortes de colunas), gravada em data/cache_treino/ — chave =
+#      conteúdo dos CSVs + faixa + pré-processamento, então a próxima busca
+#      com os mesmos dados nem relê os textos;
+#   2) cada (ngram_range, min_df, dobra) vira uma tarefa paralela (joblib):
+#      min_df e IDF são calculados SÓ com as linhas de treino da dobra (sem
+#      vazamento, igual a um TfidfVectorizer ajustado na dobra) e todos os C
+#      são ajustados em cima da mesma matriz TF-IDF;
+#   3) o relatório (JSON) traz por configuração: métricas médias da validação
+#      cruzada, tempo, pico de RSS e latência de inferência por email;
+#   4) o melhor (F1 macro; opcionalmente sob um teto de latência) é
+#      reajustado com todos os dados a partir do cache e salvo no model.pkl.
+
+
+def _impressao_dados(arquivos: List[Path]) -> str:
+    """Hash do conteúdo dos CSVs (a chave do cache muda se qualquer linha mudar)."""
+    h = hashlib.blake2b(digest_size=16)
+    for arquivo in arquivos:
+        h.update(str(arquivo.name).encode())
+        with open(arquivo, "rb") as f:
+            while bloco := f.read(1 << 20):
+                h.update(bloco)
+    return h.hexdigest()
+
+
+def _analisador(ngram_range: Tuple[int, int]):
+    # Mesmo analisador do TfidfVectorizer do montar_pipeline (tokens, lowercase, n-gramas)
+    return TfidfVectorizer(ngram_range=ngram_range).build_analyzer()
+
+
+def contar_termos(arquivos: List[Path], ngram_range: Tuple[int, int], preprocessar: bool,
+                  bloco: int = BLOCO, usar_cache: bool = True, amostra: int = 200):
+    """
+    Matriz de contagens (documentos x n-gramas), rótulos e termos (na ordem
+    das colunas), construída em streaming ou lida do cache. Devolve também
+    até `amostra` textos crus (para medir latência) e um resumo da carga.
+    """
+    t0 = time.perf_counter()
+    _zerar_pico()
+    chave = hashlib.blake2b(
+        f"{_impressao_dados(arquivos)}|{ngram_range}|{preprocessar}|{sklearn.__version__}".encode(),
+        digest_size=12).hexdigest()
+    pasta = CACHE / chave
+    exemplos: List[str] = next(ler_em_blocos(arquivos, amostra), ([], []))[0]
+
+    if usar_cache and (pasta / "termos.json").exists():
+        matriz = sp.csr_matrix(
+            (np.load(pasta / "data.npy", mmap_mode="r"), np.load(pasta / "indices.npy", mmap_mode="r"),
+             np.load(pasta / "indptr.npy", mmap_mode="r")),
+            shape=tuple(json.loads((pasta / "forma.json").read_text())), copy=False)
+        y = np.load(pasta / "y.npy")
+        termos = json.loads((pasta / "termos.json").read_text(encoding="utf-8"))
+        do_cache = True
+    else:
+        # Mesmo laço do CountVectorizer, mas bloco a bloco: o vocabulário
+        # cresce e as colunas de cada documento vão direto para os arrays
+        # do CSR (os textos do bloco são descartados em seguida)
+        analisar = _analisador(ngram_range)
+        if preprocessar:
+            from .services.nlp_preprocess import limpar_textos
+        vocab: dict = {}
+        dados, indices, indptr, rotulos = array("i"), array("i"), array("q", [0]), []
+        for textos, labels in ler_em_blocos(arquivos, bloco):
+            if preprocessar:
+                textos = limpar_textos(textos)
+            for doc in textos:
+                contagem: dict = {}
+                for termo in analisar(doc):
+                    col = vocab.setdefault(termo, len(vocab))
+                    contagem[col] = contagem.get(col, 0) + 1
+                indices.extend(contagem.keys())
+                dados.extend(contagem.values())
+                indptr.append(len(indices))
+            rotulos += labels
+        if not rotulos:
+            raise RuntimeError(f"Nenhum dado encontrado em {arquivos}.")
+        matriz = sp.csr_matrix(
+            (np.frombuffer(dados, dtype=np.int32), np.frombuffer(indices, dtype=np.int32),
+             np.frombuffer(indptr, dtype=np.int64)), shape=(len(rotulos), len(vocab)))
+        y = np.array(rotulos)
+        termos = list(vocab)  # dict preserva a ordem de inserção = ordem das colunas
+        del vocab
+        if usar_cache:
+            tmp = CACHE / f"{chave}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            np.save(tmp / "data.npy", matriz.data)
+            np.save(tmp / "indices.npy", matriz.indices)
+            np.save(tmp / "indptr.npy", matriz.indptr)
+            np.save(tmp / "y.npy", y)
+            (tmp / "forma.json").write_text(json.dumps(matriz.shape))
+            (tmp / "termos.json").write_text(json.dumps(termos, ensure_ascii=False), encoding="utf-8")
+            shutil.rmtree(pasta, ignore_errors=True)
+            os.replace(tmp, pasta)
+        do_cache = False
+
+    carga = {
+        "ngram_range": list(ngram_range),
+        "documentos": matriz.shape[0],
+        "termos": matriz.shape[1],
+        "cache": do_cache,
+        "segundos": round(time.perf_counter() - t0, 3),
+        "rss_pico_mb": _rss_pico_mb(),
+    }
+    return matriz, y, termos, exemplos, carga
+
+
+def _zerar_pico():
+    """Zera o pico de RSS do processo (Linux: VmHWM via clear_refs), para medir uma tarefa."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass  # fora do Linux o pico é o do processo inteiro
+
+
+def _rss_pico_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return round(int(linha.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024, 1)
+
+
+def _colunas_ngram(termos: List[str], ngram_range: Tuple[int, int]) -> np.ndarray:
+    """
+    Colunas de uma faixa de n-gramas dentro da matriz da faixa maior: os
+    tokens não têm espaço, então um termo com k espaços é um (k+1)-grama.
+    Assim uma única passada pelos CSVs serve para todas as faixas da busca.
+    """
+    n = np.fromiter((t.count(" ") + 1 for t in termos), dtype=np.int32, count=len(termos))
+    return np.flatnonzero((n >= ngram_range[0]) & (n <= ngram_range[1]))
+
+
+def _filtrar_min_df(contagens, min_df) -> np.ndarray:
+    """Colunas mantidas pelo min_df (mesma regra do CountVectorizer: int = nº de documentos, float = fração)."""
+    df = np.bincount(contagens.indices, minlength=contagens.shape[1])
+    minimo = min_df if isinstance(min_df, int) else min_df * contagens.shape[0]
+    return np.flatnonzero(df >= minimo)
+
+
+def _avaliar_dobra(matriz, y, treino, teste, ngram_range, min_df, Cs, dobra: int) -> List[dict]:
+    """Uma dobra da validação cruzada para um (ngram_range, min_df) e todos os C."""
+    from sklearn.feature_extraction.text import TfidfTransformer
+    from sklearn.metrics import accuracy_score, f1_score
+
+    _zerar_pico()
+    t0 = time.perf_counter()
+    contagens = matriz[treino]
+    colunas = _filtrar_min_df(contagens, min_df)
+    tfidf = TfidfTransformer().fit(contagens[:, colunas])
+    Xtreino = tfidf.transform(contagens[:, colunas])
+    Xteste = tfidf.transform(matriz[teste][:, colunas])
+    preparo = time.perf_counter() - t0
+
+    resultados = []
+    for C in Cs:
+        t1 = time.perf_counter()
+        clf = LogisticRegression(C=C, max_iter=1000, class_weight="balanced").fit(Xtreino, y[treino])
+        preds = clf.predict(Xteste)
+        resultados.append({
+            "ngram_range": list(ngram_range), "min_df": min_df, "C": C, "dobra": dobra,
+            "termos": len(colunas),
+            "acuracia": accuracy_score(y[teste], preds),
+            "f1_macro": f1_score(y[teste], preds, average="macro"),
+            "segundos": preparo + time.perf_counter() - t1,
+            "rss_pico_mb": _rss_pico_mb(),  # do processo que rodou a dobra (inclui o que já estava carregado)
+        })
+    return resultados
+
+
+def montar_de_contagens(matriz, y, termos: List[str], ngram_range, min_df, C,
+                        preprocessar: bool = False, ajustar: bool = True) -> Pipeline:
+    """
+    Pipeline equivalente ao montar_pipeline(...).fit(textos), mas ajustado a
+    partir da matriz de contagens (sem reler os textos): o TfidfVectorizer
+    recebe o vocabulário filtrado pelo min_df e o IDF calculado aqui.
+    Com ajustar=False o classificador fica com coeficientes zerados (só para
+    medir latência: o custo não depende dos valores).
+    """
+    from sklearn.feature_extraction.text import TfidfTransformer
+
+    colunas = _filtrar_min_df(matriz, min_df)
+    contagens = matriz[:, colunas]
+    tfidf = TfidfTransformer().fit(contagens)
+    pipe = montar_pipeline(preprocessar, tuple(ngram_range), min_df, C)
+    vet, clf = pipe.named_steps["vetorizador"], pipe.named_steps["classificador"]
+    vet.vocabulary_ = {termos[c]: i for i, c in enumerate(colunas)}
+    vet.idf_ = tfidf.idf_
+    if ajustar:
+        clf.fit(tfidf.transform(contagens), y)
+    else:
+        clf.classes_ = np.unique(y)
+        clf.coef_ = np.zeros((1, len(colunas)))
+        clf.intercept_ = np.zeros(1)
+    if preprocessar:
+        pipe.steps[0][1].fit(None)
+    return pipe
+
+
+def _latencia_ms(pipe: Pipeline, textos: List[str]) -> float:
+    """p50 de predict_proba de um email por vez (como no /classify)."""
+    tempos = []
+    for t in textos:
+        t0 = time.perf_counter()
+        pipe.predict_proba([t])
+        tempos.append(time.perf_counter() - t0)
+    tempos.sort()
+    return tempos[len(tempos) // 2] * 1000
+
+
+def buscar(arquivos: Optional[List[Path]] = None, ngrams=((1, 1), (1, 2)), min_dfs=(1, 2, 5),
+           Cs=(0.3, 1.0, 3.0, 10.0), dobras: int = 5, jobs: int = -1, preprocessar: bool = False,
+           latencia_max: Optional[float] = None, usar_cache: bool = True, bloco: int = BLOCO,
+           relatorio: Path = RELATORIO) -> Pipeline:
+    """Busca com validação cruzada, grava o relatório e devolve o melhor pipeline (ajustado em tudo)."""
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import StratifiedKFold
+
+    if arquivos is None:
+        arquivos = [DADOS] + ([FEEDBACK] if FEEDBACK.exists() else [])
+    inicio = time.perf_counter()
+    # Uma passada pelos CSVs com a maior faixa; cada faixa da busca é um recorte de colunas
+    total_ng = (min(a for a, _ in ngrams), max(b for _, b in ngrams))
+    tarefas, matrizes = [], {}
+    matriz, y, termos, exemplos, carga = contar_termos(arquivos, total_ng, preprocessar, bloco, usar_cache)
+    origem = "cache" if carga["cache"] else "CSV"
+    print(f"📦 {carga['documentos']} docs x {carga['termos']} termos até {total_ng[1]}-gramas "
+          f"({origem}, {carga['segundos']:.1f}s)")
+    for ng in ngrams:
+        colunas = _colunas_ngram(termos, ng)
+        matrizes[ng] = (matriz[:, colunas] if len(colunas) < len(termos) else matriz, [termos[c] for c in colunas])
+
+    menor = min(Counter(y.tolist()).values())
+    if menor < 2:
+        raise RuntimeError("Validação cruzada precisa de pelo menos 2 exemplos por classe.")
+    k = min(dobras, menor)
+    divisoes = list(StratifiedKFold(n_splits=k, shuffle=True, random_state=42).split(np.zeros(len(y)), y))
+    for ng in ngrams:
+        for m in min_dfs:
+            for i, (treino, teste) in enumerate(divisoes):
+                tarefas.append(delayed(_avaliar_dobra)(matrizes[ng][0], y, treino, teste, ng, m, Cs, i))
+    print(f"🔬 {len(ngrams) * len(min_dfs) * len(Cs)} configurações x {k} dobras em {len(tarefas)} tarefas paralelas")
+    por_dobra = [r for lote in Parallel(n_jobs=jobs)(tarefas) for r in lote]
+
+    configs = []
+    for ng in ngrams:
+        for m in min_dfs:
+            amostra = montar_de_contagens(matrizes[ng][0], y, matrizes[ng][1], ng, m, 1.0, preprocessar, ajustar=False)
+            latencia = _latencia_ms(amostra, exemplos)
+            for C in Cs:
+                linhas = [r for r in por_dobra if r["ngram_range"] == list(ng) and r["min_df"] == m and r["C"] == C]
+                f1s = [r["f1_macro"] for r in linhas]
+                configs.append({
+                    "ngram_range": list(ng), "min_df": m, "C": C,
+                    "f1_macro": round(float(np.mean(f1s)), 4),
+                    "f1_macro_desvio": round(float(np.std(f1s)), 4),
+                    "acuracia": round(float(np.mean([r["acuracia"] for r in linhas])), 4),
+                    "termos_medio": int(np.mean([r["termos"] for r in linhas])),
+                    "segundos": round(sum(r["segundos"] for r in linhas), 3),   # soma das dobras (tempo de CPU)
+                    "rss_pico_mb": max(r["rss_pico_mb"] for r in linhas),
+                    "latencia_p50_ms": round(latencia, 3),
+                })
+
+    candidatas = [c for c in configs if latencia_max is None or c["latencia_p50_ms"] <= latencia_max]
+    if not candidatas:
+        print(f"⚠️ Nenhuma configuração com latência <= {latencia_max} ms; escolhendo entre todas.")
+        candidatas = configs
+    melhor = max(candidatas, key=lambda c: (c["f1_macro"], -c["latencia_p50_ms"]))
+
+    ng = tuple(melhor["ngram_range"])
+    pipe = montar_de_contagens(matrizes[ng][0], y, matrizes[ng][1], ng, melhor["min_df"], melhor["C"], preprocessar)
+    total = time.perf_counter() - inicio
+
+    rel = {
+        "dados": [str(a) for a in arquivos],
+        "documentos": int(len(y)),
+        "distribuicao": dict(Counter(y.tolist())),
+        "dobras": k,
+        "preprocessar": preprocessar,
+        "tempo_total_s": round(total, 2),
+        "rss_pico_mb": max([carga["rss_pico_mb"], _rss_pico_mb()] + [r["rss_pico_mb"] for r in por_dobra]),
+        "carga": carga,
+        "configuracoes": sorted(configs, key=lambda c: -c["f1_macro"]),
+        "escolhida": melhor,
+        "latencia_max_ms": latencia_max,
+    }
+    relatorio.parent.mkdir(parents=True, exist_ok=True)
+    relatorio.write_text(json.dumps(rel, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print(f"\n{'ngram':>7}{'min_df':>7}{'C':>7}{'F1':>8}{'±':>7}{'acurácia':>10}{'termos':>9}{'tempo':>9}{'pico':>9}{'latência':>10}")
+    for c in rel["configuracoes"]:
+        marca = " ⬅" if c is melhor else ""
+        print(f"{'%d-%d' % tuple(c['ngram_range']):>7}{c['min_df']:>7}{c['C']:>7g}{c['f1_macro']:>8.3f}"
+              f"{c['f1_macro_desvio']:>7.3f}{c['acuracia']:>10.3f}{c['termos_medio']:>9}{c['segundos']:>8.1f}s"
+              f"{c['rss_pico_mb']:>7.0f}MB{c['latencia_p50_ms']:>8.3f}ms{marca}")
+    print(f"\n⏱️ {total:.1f}s no total | relatório em: {relatorio}")
+    return pipe
+
+
 if __name__ == "__main__":
-    treinar()
+    ap = argparse.ArgumentParser(description="Treina o classificador (TF-IDF + LogisticRegression).")
+    ap.add_argument("--exportar-leve", action="store_true",
+                    help="também exporta o modelo para o runtime leve (pasta model_leve/)")
+    ap.add_argument("--sem-treino", action="store_true",
+                    help="não treina: só exporta o model.pkl existente (com --exportar-leve)")
+    ap.add_argument("--preprocessar", action="store_true",
+                    help="adiciona o pré-processamento (stopwords + stemming RSLP) antes do TF-IDF")
+    ap.add_argument("--online", action="store_true",
+                    help="cria o modelo online (hashing + SGD) em vez do TF-IDF")
+    ap.add_argument("--online-atualizar", action="store_true",
+                    help="aprende o feedback pendente no modelo online e sai")
+    ap.add_argument("--dados", type=Path, action="append",
+                    help="CSV(s) text,label a usar no lugar de samples.csv + feedback.csv (repetível)")
+    busca = ap.add_argument_group("busca de hiperparâmetros (validação cruzada em paralelo)")
+    busca.add_argument("--buscar", action="store_true",
+                       help="busca ngram_range x min_df x C, grava o relatório e salva o melhor modelo")
+    busca.add_argument("--ngrams", default="1-1,1-2", help="faixas de n-gramas (ex.: 1-1,1-2,1-3)")
+    busca.add_argument("--min-df", default="1,2,5", help="valores de min_df (int = documentos, float = fração)")
+    busca.add_argument("--C", default="0.3,1,3,10", help="valores de regularização C da LogisticRegression")
+    busca.add_argument("--dobras", type=int, default=5, help="dobras da validação cruzada estratificada")
+    busca.add_argument("--jobs", type=int, default=-1, help="processos em paralelo (-1 = todos os núcleos)")
+    busca.add_argument("--latencia-max", type=float, help="só escolhe configurações com latência p50 <= este valor (ms)")
+    busca.add_argument("--sem-cache", action="store_true", help="não lê/grava as matrizes em data/cache_treino/")
+    busca.add_argument("--relatorio", type=Path, default=RELATORIO, help="onde gravar o relatório JSON")
+    args = ap.parse_args()
+    if args.online:
+        treinar_online()
+        raise SystemExit(0)
+    if args.online_atualizar:
+        atualizar_online()
+        raise SystemExit(0)
+    if args.preprocessar and not __package__:
+        ap.error("--preprocessar: rode como `python -m backend.train_classifier` (o model.pkl guarda o módulo)")
+
+    if args.buscar:
+        pipe = buscar(
+            args.dados,
+            ngrams=[tuple(int(n) for n in faixa.split("-")) for faixa in args.ngrams.split(",")],
+            min_dfs=[float(v) if "." in v else int(v) for v in args.min_df.split(",")],
+            Cs=[float(v) for v in args.C.split(",")],
+            dobras=args.dobras, jobs=args.jobs, preprocessar=args.preprocessar,
+            latencia_max=args.latencia_max, usar_cache=not args.sem_cache, relatorio=args.relatorio,
+        )
+        salvar_modelo(pipe)
+    else:
+        pipe = joblib.load(MODELO) if args.sem_treino else treinar(args.preprocessar, args.dados)
+    if args.exportar_leve:
+        exportar_leve(pipe)
@@ -0,0 +1,18 @@
+import random
+
+from backend.bench.acentos import _FAIXAS, _aleatoria
+from backend.bench.corpus import carregar_amostras
+from backend.services.classifier import _rm_acentos, _rm_acentos_lento
+
+
+def test_rm_acentos_amostras_e_faixas_inteiras():
+    textos = [t for t, _ in carregar_amostras()]
+    textos += ["".join(chr(c) for c in range(ini, fim + 1)) for ini, fim in _FAIXAS]
+    assert [t for t in textos if _rm_acentos(t) != _rm_acentos_lento(t)] == []
+
+
+def test_rm_acentos_fuzz_contra_unicodedata():
+    """Strings aleatórias (seed fixa) nas faixas do bench: mesma saída que NFD + unicodedata.category."""
+    rnd = random.Random(42)
+    textos = [_aleatoria(rnd) for _ in range(20000)]
+    assert [t for t in textos if _rm_acentos(t) != _rm_acentos_lento(t)] == []
@@ -0,0 +1,8 @@
+from backend.bench.pontuar import _pontuar_ingenuo, montar_corpus
+from backend.services.classifier import _pontuar
+
+
+def test_pontuar_paridade_com_referencia():
+    """Varredor compilado x laço de re.search: samples.csv + variações sintéticas."""
+    divergentes = [t[:80] for t in montar_corpus() if _pontuar(t) != _pontuar_ingenuo(t)]
+    assert divergentes == []